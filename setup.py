@@ -40,7 +40,11 @@ setup(
         ]
     },
     extras_require={
-        "gui": ["PyQt5", "pillow"]
+        "gui": ["PyQt5", "pillow"],
+        "boto3": ["boto3 >= 1.14.44"],
+        "fast": ["orjson"],
+        "normalize": ["pillow"],
+        "split": ["pillow", "pypdf"]
     },
     license='commercial',
     packages=[
@@ -54,9 +58,8 @@ setup(
     package_data={"werk24": ["assets/*"]},
     install_requires=[
         "aiohttp >= 3.6.2",
-        "boto3 >= 1.14.44",
         "devtools>=0.6.1",
-        "pydantic >= 1.4",
+        "pydantic >= 1.7",
         "python-dotenv>=0.10.1",
         "websockets >= 8.1"
     ],
@@ -0,0 +1,51 @@
+import subprocess
+import sys
+import unittest
+from typing import List
+
+IMPORT_TIME_BUDGET = 0.5
+""" Maximal number of seconds that `import werk24` may take """
+
+LAZY_MODULES = ["aiohttp", "boto3", "botocore", "dotenv", "PIL", "websockets"]
+""" Heavy modules that must only be imported when they are used """
+
+
+class TestImportTime(unittest.TestCase):
+    """ Test case for the import time of the client
+    """
+
+    @staticmethod
+    def _call_python(arguments: List[str]) -> str:
+        """ Run the code in a fresh interpreter, so that
+        no module is cached
+        """
+        return subprocess.check_output(
+            [sys.executable] + arguments,
+            stderr=subprocess.STDOUT
+        ).decode()
+
+    def test_import_time(self) -> None:
+        """ Test whether `import werk24` stays within the budget
+
+        User Story: As API user I want to use the client in
+        serverless functions and CLI calls without paying for
+        a slow import on every invocation.
+        """
+        output = self._call_python(["-X", "importtime", "-c", "import werk24"])
+
+        # each line reads: import time: self [us] | cumulative | package
+        cumulative = max(
+            int(line.split("|")[1])
+            for line in output.splitlines()
+            if line.split("|")[-1].strip() == "werk24")
+        self.assertLess(cumulative / 1e6, IMPORT_TIME_BUDGET)
+
+    def test_lazy_modules(self) -> None:
+        """ Test whether the heavy dependencies are loaded lazily
+        """
+        output = self._call_python([
+            "-c",
+            "import sys, werk24; print(' '.join(sys.modules))"])
+        loaded = set(output.split())
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, loaded)
@@ -1,5 +1,8 @@
+import asyncio
+import time
 from unittest import mock
 
+import aiohttp
 import aiounittest
 import boto3
 from botocore.exceptions import ClientError
@@ -9,7 +12,7 @@ from werk24.exceptions import LicenseError, UnauthorizedException
 from werk24.models.techread import W24TechreadRequest
 from werk24.techread_client import W24TechreadClient
 
-from .utils import CWD
+from .utils import CWD, make_jwt_token
 
 LICENSE_PATH_INVALID_CREDS = CWD / "assets" / "invalid_creds.werk24"
 """ Path to the license file with invalid credentials """
@@ -53,6 +56,33 @@ class TestTechreadClient(aiounittest.AsyncTestCase):
         # start the client
         client = W24TechreadClient.make_from_env(None)
 
+        # mock the aiohttp session to raise a ClientError
+        m = mock.Mock()
+        m.side_effect = aiohttp.ClientConnectionError()
+
+        # assert
+        with mock.patch('aiohttp.ClientSession.post', m):
+            with self.assertRaises(UnauthorizedException):
+                async with client:
+                    pass
+
+    async def test_cognito_error_boto3(self):
+        """ Test UnauthorizedException if Cognito Identity is unavailable
+        when using the legacy boto3 login
+
+        User Story: As API user, I want to obtain an exception
+            when the Cognito service is down, so that I can
+            retry.
+        """
+        auth_client = AuthClient(
+            "eu-central-1",
+            "some id",
+            "some user pool id",
+            "some client id",
+            "some client secret",
+            use_boto3=True)
+        auth_client.register("some user", "some password")
+
         # mock the boto3 client to raise a ClientError
         boto3_client = boto3.client
         m = mock.Mock()
@@ -61,8 +91,7 @@ class TestTechreadClient(aiounittest.AsyncTestCase):
 
         # assert
         with self.assertRaises(UnauthorizedException):
-            async with client:
-                pass
+            await auth_client.login()
 
         # restore
         boto3.client = boto3_client
@@ -107,3 +136,77 @@ class TestTechreadClient(aiounittest.AsyncTestCase):
                 "some partner password")
             # auth_client.register(None, None)
             await auth_client.login()
+
+    async def test_token_refresh(self) -> None:
+        """ Test whether the token is refreshed in the background
+
+        User Story: As API user I want my long-running service
+            to keep working after the first token expired, so that
+            I do not need to restart it.
+        """
+        auth_client = AuthClient(
+            "eu-central-1",
+            "some id",
+            "some user pool id",
+            "some client id",
+            "some client secret")
+        auth_client.register("some user", "some password")
+
+        auth_flows = []
+
+        async def initiate_auth(auth_flow, auth_parameters):
+            auth_flows.append(auth_flow)
+            result = {"IdToken": make_jwt_token(time.time() + 3600)}
+            if auth_flow == "USER_PASSWORD_AUTH":
+                result["RefreshToken"] = "some refresh token"
+            return {"AuthenticationResult": result}
+
+        auth_client._initiate_auth = initiate_auth
+        auth_client._refresh_margin = 3600
+
+        with mock.patch("werk24.auth_client.MIN_REFRESH_INTERVAL", 0.01):
+            await auth_client.login()
+            token = auth_client.token
+
+            auth_client.start_refresh()
+            await asyncio.sleep(0.05)
+            await auth_client.stop_refresh()
+
+        self.assertNotEqual(auth_client.token, token)
+        self.assertEqual(auth_flows[0], "USER_PASSWORD_AUTH")
+        self.assertEqual(set(auth_flows[1:]), {"REFRESH_TOKEN_AUTH"})
+
+    async def test_shared_login(self) -> None:
+        """ Test whether the clients of the same user share one login
+
+        User Story: As API user I want to open many sessions at
+            once without triggering one login per session, so that
+            I am not throttled by the authentication service.
+        """
+        auth_clients = [
+            AuthClient.make_shared(
+                "eu-central-1",
+                "some id",
+                "some user pool id",
+                "some client id",
+                "some client secret",
+                "some shared user",
+                "some password")
+            for _ in range(10)]
+        auth_client = auth_clients[0]
+        self.assertTrue(all(c is auth_client for c in auth_clients))
+
+        num_logins = 0
+
+        async def initiate_auth(auth_flow, auth_parameters):
+            nonlocal num_logins
+            num_logins += 1
+            await asyncio.sleep(0.01)
+            return {"AuthenticationResult": {
+                "IdToken": make_jwt_token(time.time() + 3600)}}
+
+        auth_client._initiate_auth = initiate_auth
+        await asyncio.gather(*[c.login() for c in auth_clients])
+        await auth_client.login()
+
+        self.assertEqual(num_logins, 1)
@@ -0,0 +1,118 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+import aiounittest
+from werk24.exceptions import UnsupportedMediaType
+from werk24.models.ask import W24Ask
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType)
+from werk24.techread_batch import read_drawings
+from werk24.techread_source import W24DrawingSource, check_source
+
+from .utils import CWD
+
+DRAWING_PATH = CWD / "assets" / "test_drawing.pdf"
+""" Path to the example drawing """
+
+
+class _FakeReader:
+    """ Stand-in for W24TechreadClient.read_drawing that
+    records the concurrency of the calls
+    """
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.drawings: List[W24DrawingSource] = []
+
+    async def read_drawing(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource] = None
+    ) -> AsyncIterator[W24TechreadMessage]:
+        check_source(drawing, "Drawing")
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.drawings.append(drawing)
+        try:
+            for _ in range(2):
+                await asyncio.sleep(0.01)
+                yield W24TechreadMessage(
+                    request_id="1c5e4cb1-36a6-4a5b-9e44-1bd4e36ba0f6",
+                    message_type=W24TechreadMessageType.PROGRESS,
+                    message_subtype=W24TechreadMessageSubtypeProgress.STARTED)
+        finally:
+            self.in_flight -= 1
+
+
+class TestTechreadBatch(aiounittest.AsyncTestCase):
+    """ Test case for the bounded batch engine
+    """
+
+    async def test_bounded_concurrency(self) -> None:
+        """ Test whether read_drawings respects max_concurrency
+
+        User Story: As API user I want to submit a large batch of
+        drawings without flooding the API with requests.
+        """
+        reader = _FakeReader()
+        sources = [b"%PDF-1"] * 10
+        results = [
+            source_id
+            async for source_id, _ in read_drawings(
+                reader.read_drawing, sources, [], max_concurrency=3)]
+
+        self.assertEqual(reader.max_in_flight, 3)
+        self.assertEqual(sorted(results), sorted(list(range(10)) * 2))
+
+    async def test_paths_and_pairs(self) -> None:
+        """ Test whether paths and (drawing, model) pairs are accepted
+
+        User Story: As API user I want to pass the paths of my drawings
+        so that they are only opened when they are submitted.
+        """
+        reader = _FakeReader()
+
+        async def sources():
+            yield DRAWING_PATH
+            yield (b"%PDF-2", b"model")
+
+        results = [
+            source_id
+            async for source_id, _ in read_drawings(
+                reader.read_drawing, sources(), [], max_concurrency=1)]
+
+        self.assertEqual(results, [0, 0, 1, 1])
+        self.assertEqual(reader.drawings, [DRAWING_PATH, b"%PDF-2"])
+
+    async def test_failing_source(self) -> None:
+        """ Test whether the exception of an individual request
+        is yielded with its source_id while the other sources
+        are read as usual
+
+        User Story: As API user I want one broken drawing not to
+        abort my whole batch.
+        """
+        reader = _FakeReader()
+        results = [
+            (source_id, message)
+            async for source_id, message in read_drawings(
+                reader.read_drawing,
+                [b"%PDF-0", "", b"%PDF-2"],
+                [],
+                max_concurrency=2)]
+
+        failures = [
+            (source_id, message) for source_id, message in results
+            if isinstance(message, Exception)]
+        self.assertEqual(len(failures), 1)
+        self.assertEqual(failures[0][0], 1)
+        self.assertIsInstance(failures[0][1], UnsupportedMediaType)
+
+        self.assertEqual(
+            sorted(source_id for source_id, message in results
+                   if not isinstance(message, Exception)),
+            [0, 0, 2, 2])
@@ -0,0 +1,146 @@
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+import aiounittest
+from werk24.models.ask import W24AskPageThumbnail, W24AskVariantMeasures
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType)
+from werk24.techread_cache import (W24DirectoryCacheBackend,
+                                   W24MemoryCacheBackend, W24ResultCache,
+                                   W24SQLiteCacheBackend)
+
+from .utils import CWD, FakeSession, get_drawing, make_client
+
+DRAWING_PATH = CWD / "assets" / "test_drawing.pdf"
+""" Path to the example drawing """
+
+
+def _make_messages():
+    return [
+        W24TechreadMessage(
+            request_id="1c5e4cb1-36a6-4a5b-9e44-1bd4e36ba0f6",
+            message_type=W24TechreadMessageType.PROGRESS,
+            message_subtype=W24TechreadMessageSubtypeProgress.STARTED),
+        W24TechreadMessage(
+            request_id="1c5e4cb1-36a6-4a5b-9e44-1bd4e36ba0f6",
+            message_type=W24TechreadMessageType.ASK,
+            message_subtype=W24AskPageThumbnail().ask_type,
+            payload_url="https://example.com/thumbnail",
+            payload_bytes=bytes(range(256))),
+        W24TechreadMessage(
+            request_id="1c5e4cb1-36a6-4a5b-9e44-1bd4e36ba0f6",
+            message_type=W24TechreadMessageType.PROGRESS,
+            message_subtype=W24TechreadMessageSubtypeProgress.COMPLETED)]
+
+
+class TestTechreadCache(aiounittest.AsyncTestCase):
+    """ Test case for the result cache
+    """
+
+    def test_key(self) -> None:
+        """ Test whether the key only depends on the content
+
+        User Story: As API user I want resubmitted drawings to be
+        served from the cache, no matter whether I pass the bytes,
+        the path or the file.
+        """
+        asks = [W24AskVariantMeasures()]
+        key = W24ResultCache.make_key(get_drawing(), None, asks)
+
+        with open(DRAWING_PATH, "rb") as file_handle:
+            self.assertEqual(
+                W24ResultCache.make_key(file_handle, None, asks), key)
+            self.assertEqual(file_handle.tell(), 0)
+        self.assertEqual(W24ResultCache.make_key(DRAWING_PATH, None, asks), key)
+
+        self.assertNotEqual(
+            W24ResultCache.make_key(get_drawing(), b"model", asks), key)
+        self.assertNotEqual(
+            W24ResultCache.make_key(get_drawing(), None, []), key)
+
+    def test_backends(self) -> None:
+        """ Test whether all backends replay the messages
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            backends = [
+                W24MemoryCacheBackend(),
+                W24SQLiteCacheBackend(Path(cache_dir) / "cache.sqlite"),
+                W24DirectoryCacheBackend(Path(cache_dir) / "entries")]
+            for backend in backends:
+                cache = W24ResultCache(backend)
+                messages = _make_messages()
+                self.assertIsNone(cache.get("key"))
+
+                cache.put("key", messages)
+                self.assertEqual(cache.get("key"), messages)
+
+    def test_uncacheable(self) -> None:
+        """ Test whether messages without downloaded payload
+        are not cached
+        """
+        cache = W24ResultCache()
+        messages = _make_messages()
+        messages[1].payload_bytes = None
+        cache.put("key", messages)
+        self.assertIsNone(cache.get("key"))
+
+    def test_eviction(self) -> None:
+        """ Test whether the backends respect the size limit and ttl
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for backend_type, path in [
+                    (W24MemoryCacheBackend, None),
+                    (W24SQLiteCacheBackend, Path(cache_dir) / "c.sqlite"),
+                    (W24DirectoryCacheBackend, Path(cache_dir) / "c")]:
+                args = [path] if path is not None else []
+
+                backend = backend_type(*args, max_size=25)
+                for key in ["a", "b", "c"]:
+                    backend.put(key, b"0" * 10)
+                    time.sleep(0.01)
+                self.assertIsNone(backend.get("a"))
+                self.assertEqual(backend.get("c"), b"0" * 10)
+
+                backend = backend_type(*args, ttl=0.01)
+                backend.put("d", b"0")
+                time.sleep(0.02)
+                self.assertIsNone(backend.get("d"))
+
+    async def test_truncated_request(self) -> None:
+        """ Test whether a request whose connection was closed
+        before the COMPLETED message is not cached
+
+        User Story: As API user I want a dropped connection to
+        be retried on the next call rather than replaying an
+        incomplete result.
+        """
+        cache = W24ResultCache()
+        messages = [
+            {"message_type": "PROGRESS", "message_subtype": "STARTED"},
+            {"message_type": "ASK", "message_subtype": "VARIANT_MEASURES"}]
+        client = make_client([
+            FakeSession(messages),
+            FakeSession(messages + [{
+                "message_type": "PROGRESS",
+                "message_subtype": "COMPLETED"}])],
+            result_cache=cache)
+
+        async def read() -> List[str]:
+            return [
+                message.message_subtype.value
+                async for message in client.read_drawing(
+                    b"%PDF-1", [W24AskVariantMeasures()])]
+
+        key = W24ResultCache.make_key(
+            b"%PDF-1", None, [W24AskVariantMeasures()])
+        self.assertEqual(await read(), ["STARTED", "VARIANT_MEASURES"])
+        self.assertIsNone(cache.get(key))
+
+        # the second request completes and is replayed afterwards
+        completed = ["STARTED", "VARIANT_MEASURES", "COMPLETED"]
+        self.assertEqual(await read(), completed)
+        self.assertEqual(await read(), completed)
+        self.assertEqual(len(cache.get(key)), 3)
@@ -0,0 +1,167 @@
+import asyncio
+import base64
+import binascii
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Dict, List
+
+import aiounittest
+from aiohttp import test_utils, web
+from werk24.exceptions import ResourceNotFoundException
+from werk24.models.techread import W24PresignedPost
+from werk24.techread_client_https import (TechreadClientHttps,
+                                          _Base64StreamDecoder)
+
+from .utils import make_auth_client
+
+
+class _FakeServer:
+    """ Local stand-in for the API and the upload bucket
+    that records the headers of the requests
+    """
+
+    def __init__(self) -> None:
+        self.headers: Dict[str, List[Dict[str, str]]] = {
+            "upload": [], "payload": []}
+        app = web.Application()
+        app.router.add_post("/upload", self._upload)
+        app.router.add_get("/v1/payload", self._payload)
+        app.router.add_get("/v1/broken", self._broken)
+        app.router.add_get("/v1/missing", self._missing)
+        self.server = test_utils.TestServer(app, host="127.0.0.1")
+
+    async def _upload(self, request: web.Request) -> web.Response:
+        self.headers["upload"].append(dict(request.headers))
+        await request.read()
+        return web.Response(status=204)
+
+    async def _payload(self, request: web.Request) -> web.Response:
+        self.headers["payload"].append(dict(request.headers))
+        return web.Response(text=base64.b64encode(b"payload").decode())
+
+    async def _broken(self, request: web.Request) -> web.Response:
+        # truncated base64 text that fails to decode at the end
+        return web.Response(text=base64.b64encode(b"payload").decode()[:-2])
+
+    async def _missing(self, request: web.Request) -> web.Response:
+        # large enough that aiohttp does not read it eagerly
+        return web.Response(status=404, body=b"x" * 2**20)
+
+    @property
+    def netloc(self) -> str:
+        return f"{self.server.host}:{self.server.port}"
+
+    def make_client(self, **kwargs: int) -> TechreadClientHttps:
+        client = TechreadClientHttps(self.netloc, "v1", **kwargs)
+        client.register_auth_client(make_auth_client())
+        return client
+
+
+class TestBase64StreamDecoder(unittest.TestCase):
+    """ Test case for the incremental payload decoding
+    """
+
+    def test_decode_in_chunks(self) -> None:
+        """ Test whether decoding arbitrary chunks yields the payload
+
+        User Story: As API user I want to stream large CAD payloads
+        to disk without holding them in memory.
+        """
+        payload = os.urandom(10_000)
+        encoded = base64.encodebytes(payload)  # includes line breaks
+
+        for chunk_size in [1, 3, 4, 7, 1024, len(encoded)]:
+            decoder = _Base64StreamDecoder()
+            decoded = b"".join(
+                decoder.decode(encoded[i:i + chunk_size])
+                for i in range(0, len(encoded), chunk_size))
+            decoded += decoder.flush()
+            self.assertEqual(decoded, payload)
+
+
+class TestTechreadClientHttps(aiounittest.AsyncTestCase):
+    """ Test case for the sessions of the https client
+    """
+
+    async def test_shared_connector(self) -> None:
+        """ Test whether the API session and the upload session
+        share one connection pool and only the API requests
+        carry the token
+
+        User Story: As API user I want the uploads to reuse the
+        connections without leaking my token to the bucket.
+        """
+        fake_server = _FakeServer()
+        async with fake_server.server:
+            client = fake_server.make_client()
+            async with client:
+                connector = client._connector
+                self.assertIs(
+                    client._techread_session_https.connector, connector)
+                self.assertIs(client._upload_session.connector, connector)
+
+                # count the calls of close()
+                num_closes = 0
+                close = connector.close
+
+                def counting_close():  # type: ignore
+                    nonlocal num_closes
+                    num_closes += 1
+                    return close()
+                connector.close = counting_close  # type: ignore
+
+                await client.upload_associated_file(
+                    W24PresignedPost(
+                        url=f"http://{fake_server.netloc}/upload",
+                        fields={"key": "value"}),
+                    b"drawing")
+                payload = await client.download_payload(
+                    f"http://{fake_server.netloc}/v1/payload")
+                self.assertEqual(payload, b"payload")
+
+            self.assertEqual(num_closes, 1)
+            self.assertTrue(connector.closed)
+            self.assertTrue(client._techread_session_https.closed)
+            self.assertTrue(client._upload_session.closed)
+
+        self.assertNotIn("Authorization", fake_server.headers["upload"][0])
+        self.assertEqual(
+            fake_server.headers["payload"][0]["Authorization"],
+            "Bearer token")
+
+    async def test_download_to_path(self) -> None:
+        """ Test whether a failed download leaves no file behind
+
+        User Story: As API user I want to rely on the payload file
+        being complete whenever it exists.
+        """
+        fake_server = _FakeServer()
+        async with fake_server.server:
+            async with fake_server.make_client() as client:
+                with tempfile.TemporaryDirectory() as tmp_dir:
+                    path = Path(tmp_dir) / "payload.bin"
+                    await client.download_payload_to(
+                        f"http://{fake_server.netloc}/v1/payload", path)
+                    self.assertEqual(path.read_bytes(), b"payload")
+
+                    path = Path(tmp_dir) / "broken.bin"
+                    with self.assertRaises(binascii.Error):
+                        await client.download_payload_to(
+                            f"http://{fake_server.netloc}/v1/broken", path)
+                    self.assertEqual(os.listdir(tmp_dir), ["payload.bin"])
+
+    async def test_release_failed_response(self) -> None:
+        """ Test whether the connection of a failed download
+        is handed back to the connector
+        """
+        fake_server = _FakeServer()
+        async with fake_server.server:
+            async with fake_server.make_client(connector_limit=1) as client:
+
+                # a leaked connection blocks the next request
+                for _ in range(3):
+                    with self.assertRaises(ResourceNotFoundException):
+                        await asyncio.wait_for(client.download_payload(
+                            f"http://{fake_server.netloc}/v1/missing"), 1)
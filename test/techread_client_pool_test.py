@@ -0,0 +1,104 @@
+import asyncio
+
+import aiounittest
+from werk24.techread_client_pool import W24TechreadClientPool
+
+
+class _FakeClient:
+    """ Minimal stand-in for the W24TechreadClient that
+    records how the pool interacts with it
+    """
+
+    def __init__(self) -> None:
+        self.is_connected = False
+        self.num_reconnects = 0
+        self.num_exits = 0
+
+    async def __aenter__(self) -> "_FakeClient":
+        self.is_connected = True
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.is_connected = False
+        self.num_exits += 1
+
+    async def reconnect(self) -> None:
+        self.num_reconnects += 1
+        self.is_connected = True
+
+
+class TestTechreadClientPool(aiounittest.AsyncTestCase):
+    """ Test case for the checkout / checkin semantics of the pool
+    """
+
+    async def test_checkout_limits_concurrency(self) -> None:
+        """ Test whether the pool hands out at most pool_size clients
+
+        User Story: As API user I want to process several drawings
+        concurrently without opening more connections than I
+        configured.
+        """
+        pool = W24TechreadClientPool(_FakeClient, pool_size=2)
+        in_use = set()
+        max_in_use = 0
+
+        async def borrow() -> None:
+            nonlocal max_in_use
+            async with pool.checkout() as client:
+                in_use.add(client)
+                max_in_use = max(max_in_use, len(in_use))
+                await asyncio.sleep(0.01)
+                in_use.remove(client)
+
+        async with pool:
+            await asyncio.gather(*[borrow() for _ in range(6)])
+            self.assertEqual(pool.num_idle, 2)
+
+        self.assertEqual(max_in_use, 2)
+
+    async def test_reconnect_after_failure(self) -> None:
+        """ Test whether a client is reconnected after a failed request
+
+        User Story: As API user I want the pool to repair connections
+        that were left in an undefined state, so that the next request
+        does not receive messages of the previous one.
+        """
+        pool = W24TechreadClientPool(_FakeClient, pool_size=1)
+        async with pool:
+            with self.assertRaises(ValueError):
+                async with pool.checkout():
+                    raise ValueError()
+
+            async with pool.checkout() as client:
+                self.assertEqual(client.num_reconnects, 1)
+
+    async def test_reconnect_closed_client(self) -> None:
+        """ Test whether a client with a closed connection is
+        reconnected before it is handed out
+        """
+        pool = W24TechreadClientPool(_FakeClient, pool_size=1)
+        async with pool:
+            async with pool.checkout() as client:
+                client.is_connected = False
+
+            async with pool.checkout() as client:
+                self.assertTrue(client.is_connected)
+                self.assertEqual(client.num_reconnects, 1)
+
+    async def test_failed_enter(self) -> None:
+        """ Test whether only the clients that were entered
+        are exited when one of them fails to connect
+        """
+        class _FailingClient(_FakeClient):
+            async def __aenter__(self) -> "_FakeClient":
+                raise ConnectionError()
+
+        clients = [_FakeClient(), _FailingClient(), _FakeClient()]
+        pool = W24TechreadClientPool(
+            iter(clients).__next__, pool_size=len(clients))
+        with self.assertRaises(ConnectionError):
+            async with pool:
+                pass
+
+        self.assertEqual(
+            [client.num_exits for client in clients], [1, 0, 1])
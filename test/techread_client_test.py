@@ -128,3 +128,21 @@ class TestTechreadClient(aiounittest.AsyncTestCase):
                     self.assertEqual(
                         message.exceptions[0].exception_type,
                         W24TechreadExceptionType.DRAWING_FILE_FORMAT_UNSUPPORTED)
+
+    async def test_lazy_payload(self) -> None:
+        """ Test whether payloads can be fetched on demand
+
+        User Story: As API user I want to decide myself whether
+        a thumbnail is worth downloading, so that I do not waste
+        bandwidth on payloads I do not need.
+        """
+        client = W24TechreadClient.make_from_env()
+        asks: List[W24Ask] = [W24AskPageThumbnail()]
+
+        async with client as session:
+            async for message in session.read_drawing(
+                    get_drawing(), asks=asks, download_payloads=False):
+                if message.message_type == W24TechreadMessageType.ASK:
+                    self.assertIsNone(message.payload_bytes)
+                    await session.fetch_payload(message)
+                    self.assertIsNotNone(message.payload_bytes)
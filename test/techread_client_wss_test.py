@@ -0,0 +1,284 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import List
+from unittest import mock
+
+import aiounittest
+import websockets
+from werk24 import techread_client_wss
+from werk24.exceptions import ServerException, UnauthorizedException
+from werk24.techread_client_wss import TechreadClientWss
+
+from .utils import FakeSession, make_auth_client
+
+
+def _make_message(request_id: str, message_subtype: str) -> str:
+    return json.dumps({
+        "request_id": request_id,
+        "message_type": "PROGRESS",
+        "message_subtype": message_subtype})
+
+
+class TestTechreadClientWss(aiounittest.AsyncTestCase):
+    """ Test case for keeping the websocket connection alive
+    """
+
+    @staticmethod
+    def _make_client(**kwargs) -> TechreadClientWss:
+        client = TechreadClientWss("localhost", "v1", **kwargs)
+        client.register_auth_client(make_auth_client())
+        return client
+
+    async def test_connect_with_backoff(self) -> None:
+        """ Test whether failed connection attempts are retried
+
+        User Story: As API user I want my long-running service to
+        survive short network outages without failing requests.
+        """
+        client = self._make_client(max_connect_attempts=3)
+        attempts = 0
+
+        async def connect() -> None:
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise ConnectionRefusedError()
+            client._techread_session_wss = FakeSession()
+
+        client._connect = connect  # type: ignore
+        with mock.patch.object(techread_client_wss, "CONNECT_BACKOFF_BASE", 0):
+            await client.reconnect()
+            self.assertEqual(attempts, 3)
+            self.assertTrue(client.is_open)
+
+            # give up after max_connect_attempts
+            attempts = -10
+            with self.assertRaises(ConnectionRefusedError):
+                await client.reconnect()
+            self.assertEqual(attempts, -7)
+
+    async def test_rejected_token(self) -> None:
+        """ Test whether we log in again once when the server
+        rejects the token of the handshake
+
+        User Story: As API user I want my service to recover when
+        its token was revoked before its expiry.
+        """
+        client = self._make_client()
+        rejected_tokens: List[str] = []
+
+        async def reject_token(token: str) -> None:
+            rejected_tokens.append(token)
+            client._auth_client.token = "new token"
+
+        async def connect() -> None:
+            if client._auth_client.token != "new token":
+                raise websockets.exceptions.InvalidStatusCode(403)
+            client._techread_session_wss = FakeSession()
+
+        client._auth_client.reject_token = reject_token  # type: ignore
+        client._connect = connect  # type: ignore
+        await client.reconnect()
+        self.assertEqual(rejected_tokens, ["token"])
+        self.assertTrue(client.is_open)
+
+        # the new token is rejected as well
+        client._auth_client.token = "revoked"
+        client._auth_client.reject_token = (  # type: ignore
+            lambda token: asyncio.sleep(0))
+        with self.assertRaises(websockets.exceptions.InvalidStatusCode):
+            await client.reconnect()
+
+    async def test_ensure_connection(self) -> None:
+        """ Test whether closed, idle and outdated connections
+        are replaced before the next request
+        """
+        client = self._make_client(idle_timeout=60)
+        num_connects = 0
+
+        async def connect() -> None:
+            nonlocal num_connects
+            num_connects += 1
+            client._techread_session_wss = FakeSession()
+            client._router = None
+            client._connected_token = client._auth_client.token
+            client._last_activity = time.monotonic()
+
+        client._connect = connect  # type: ignore
+        await client.ensure_connection()
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 1)
+
+        # closed by the server
+        client._techread_session_wss.open = False
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 2)
+
+        # refreshed token
+        client._auth_client.token = "new token"
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 3)
+
+        # idle for too long
+        client._last_activity -= 61
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 4)
+
+        # opened in the background
+        client._techread_session_wss.open = False
+        client.reconnect_in_background()
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 5)
+        self.assertTrue(client.is_open)
+
+        # the router stopped on a message that it could not
+        # interpret, while the socket is still open
+        class _FakeGarbageSession(FakeSession):
+            async def __aiter__(self):
+                yield "not json"
+
+        client._techread_session_wss = _FakeGarbageSession()
+        client._router = techread_client_wss._Router(
+            client._techread_session_wss)
+        await asyncio.sleep(0)
+        self.assertTrue(client._router.is_closed)
+        self.assertFalse(client.is_open)
+        await client.ensure_connection()
+        self.assertEqual(num_connects, 6)
+        self.assertTrue(client.is_open)
+
+    async def test_routing(self) -> None:
+        """ Test whether the messages are routed to the requests
+        by their request_id
+
+        User Story: As API user I want several drawings to be in
+        flight on a single connection.
+        """
+        request_ids = [str(uuid.uuid4()) for _ in range(3)]
+        release = asyncio.Event()
+
+        class _FakeMultiplexedSession(FakeSession):
+            async def __aiter__(self):
+                yield _make_message(request_ids[0], "INITIALIZATION_SUCCESS")
+                await release.wait()
+                for request_id in reversed(request_ids):
+                    yield _make_message(request_id, "STARTED")
+                for request_id in request_ids:
+                    yield _make_message(request_id, "COMPLETED")
+
+        client = self._make_client()
+
+        async def connect() -> None:
+            client._techread_session_wss = _FakeMultiplexedSession()
+            client._router = techread_client_wss._Router(
+                client._techread_session_wss)
+
+        client._connect = connect  # type: ignore
+        await client.reconnect()
+
+        # the response to INITIALIZE is not routed
+        response = await client.recv_message()
+        self.assertEqual(str(response.request_id), request_ids[0])
+
+        async def listen(request_id: str) -> List[str]:
+            return [
+                message.message_subtype.value
+                async for message in client.listen_request(request_id)]
+
+        for request_id in request_ids:
+            client.register_request(request_id)
+        self.assertEqual(client.num_inflight, 3)
+        release.set()
+
+        results = await asyncio.gather(*map(listen, request_ids))
+        self.assertEqual(results, [["STARTED", "COMPLETED"]] * 3)
+        self.assertEqual(client.num_inflight, 0)
+        self.assertFalse(client.has_abandoned_requests)
+
+    async def test_process_message(self) -> None:
+        """ Test whether the frames are decoded into messages and
+        gateway responses are turned into exceptions
+
+        User Story: As API user I want large responses to be
+        interpreted quickly, so that other requests on the same
+        connection are not held up.
+        """
+        payload_dict = {"measures": [{"label": {"blurb": "Ø 30"}}] * 100}
+        message_raw = json.dumps({
+            "request_id": str(uuid.uuid4()),
+            "message_type": "ASK",
+            "message_subtype": "VARIANT_MEASURES",
+            "payload_dict": payload_dict,
+            "exceptions": []})
+        message = await TechreadClientWss._process_message(message_raw)
+        self.assertEqual(message.message_subtype.value, "VARIANT_MEASURES")
+        self.assertEqual(message.payload_dict, payload_dict)
+
+        # invalid envelopes are rejected
+        with self.assertRaises(ServerException):
+            await TechreadClientWss._process_message(
+                json.dumps({"request_id": "invalid", "message_type": "ASK"}))
+        with self.assertRaises(ServerException):
+            await TechreadClientWss._process_message("not json")
+
+        # gateway responses
+        with self.assertRaises(UnauthorizedException):
+            await TechreadClientWss._process_message(
+                json.dumps({"message": "Forbidden", "connectionId": "1"}))
+
+    async def test_receive_watermarks(self) -> None:
+        """ Test whether the router stops reading when the consumer
+        falls behind and resumes at the low watermark
+
+        User Story: As API user I want the memory of the client to
+        stay bounded when my hooks are slower than the server.
+        """
+        request_id = str(uuid.uuid4())
+        num_messages = 20
+        num_read = 0
+
+        class _FakeBurstSession(FakeSession):
+            async def __aiter__(self):
+                nonlocal num_read
+                for _ in range(num_messages - 1):
+                    num_read += 1
+                    yield _make_message(request_id, "STARTED")
+                num_read += 1
+                yield _make_message(request_id, "COMPLETED")
+
+        client = self._make_client(
+            receive_high_watermark=4, receive_low_watermark=2)
+
+        async def connect() -> None:
+            client._techread_session_wss = _FakeBurstSession()
+            client._router = techread_client_wss._Router(
+                client._techread_session_wss,
+                client._receive_metrics,
+                client._receive_high_watermark,
+                client._receive_low_watermark)
+
+        client._connect = connect  # type: ignore
+        await client.reconnect()
+        client._router.add_route(request_id)
+
+        # the router stops reading at the high watermark
+        await asyncio.sleep(0.01)
+        self.assertEqual(num_read, 4)
+        self.assertEqual(client.receive_metrics.depth, 4)
+
+        messages = []
+        async for message in client.listen_request(request_id):
+            messages.append(message)
+            await asyncio.sleep(0.001)
+
+        metrics = client.receive_metrics
+        self.assertEqual(len(messages), num_messages)
+        self.assertEqual(metrics.num_received, num_messages)
+        self.assertLessEqual(metrics.max_depth, 4)
+        self.assertGreater(metrics.num_pauses, 1)
+
+        with self.assertRaises(ValueError):
+            self._make_client(
+                receive_high_watermark=4, receive_low_watermark=4)
@@ -0,0 +1,108 @@
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, List
+
+import aiounittest
+from werk24.models.ask import (W24Ask, W24AskPageThumbnail, W24AskType,
+                               W24AskVariantMeasures)
+from werk24.models.techread import (W24TechreadException,
+                                    W24TechreadExceptionLevel,
+                                    W24TechreadExceptionType,
+                                    W24TechreadMessage)
+from werk24.techread_deadline import (apply_deadlines, get_ask_deadlines,
+                                      get_deadline)
+
+
+def _make_message(message_subtype: str) -> W24TechreadMessage:
+    return W24TechreadMessage(
+        request_id=str(uuid.uuid4()),
+        message_type="ASK",
+        message_subtype=message_subtype)
+
+
+async def _make_timeout_messages(
+    asks: List[W24Ask]
+) -> AsyncIterator[W24TechreadMessage]:
+    for ask in asks:
+        message = _make_message(ask.ask_type.value)
+        message.exceptions = [W24TechreadException(
+            exception_level=W24TechreadExceptionLevel.ERROR,
+            exception_type=W24TechreadExceptionType.TIMEOUT)]
+        yield message
+
+
+def _summarize(messages: List[W24TechreadMessage]) -> List[tuple]:
+    return [
+        (m.message_subtype.value, bool(m.exceptions)) for m in messages]
+
+
+class TestTechreadDeadline(aiounittest.AsyncTestCase):
+    """ Test case for the timeouts of requests and asks
+    """
+
+    ASKS = [W24AskPageThumbnail(), W24AskVariantMeasures()]
+
+    async def test_request_deadline(self) -> None:
+        """ Test whether the request is cancelled when the deadline
+        passes and the unanswered asks receive TIMEOUT messages
+
+        User Story: As API user I want to limit the time that I wait
+        for a request, so that stuck requests do not block my workers.
+        """
+        cancelled = asyncio.Event()
+
+        async def request() -> AsyncIterator[W24TechreadMessage]:
+            try:
+                yield _make_message("PAGE_THUMBNAIL")
+                await asyncio.sleep(10)
+            finally:
+                cancelled.set()
+
+        start = time.monotonic()
+        messages = [
+            message async for message in apply_deadlines(
+                request(),
+                self.ASKS,
+                get_deadline(0.05, None),
+                {},
+                _make_timeout_messages)]
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(cancelled.is_set())
+        self.assertEqual(_summarize(messages), [
+            ("PAGE_THUMBNAIL", False),
+            ("VARIANT_MEASURES", True)])
+
+    async def test_ask_deadline(self) -> None:
+        """ Test whether an ask times out while the request
+        continues for the other asks
+        """
+        async def request() -> AsyncIterator[W24TechreadMessage]:
+            await asyncio.sleep(0.1)
+            yield _make_message("PAGE_THUMBNAIL")
+
+            # late responses of timed out asks are dropped
+            yield _make_message("VARIANT_MEASURES")
+
+        ask_deadlines = get_ask_deadlines(
+            self.ASKS, {W24AskType.VARIANT_MEASURES: 0.01})
+        messages = [
+            message async for message in apply_deadlines(
+                request(),
+                self.ASKS,
+                None,
+                ask_deadlines,
+                _make_timeout_messages)]
+
+        self.assertEqual(_summarize(messages), [
+            ("VARIANT_MEASURES", True),
+            ("PAGE_THUMBNAIL", False)])
+
+    def test_get_deadline(self) -> None:
+        """ Test whether the earlier of timeout and deadline is used
+        """
+        now = time.monotonic()
+        self.assertIsNone(get_deadline(None, None))
+        self.assertEqual(get_deadline(None, now), now)
+        self.assertLess(get_deadline(1, now + 10), now + 10)
@@ -0,0 +1,105 @@
+import asyncio
+from typing import AsyncIterator, List
+
+import aiounittest
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType)
+from werk24.techread_dedupe import InflightRequests
+
+
+def _make_message() -> W24TechreadMessage:
+    return W24TechreadMessage(
+        request_id="1c5e4cb1-36a6-4a5b-9e44-1bd4e36ba0f6",
+        message_type=W24TechreadMessageType.PROGRESS,
+        message_subtype=W24TechreadMessageSubtypeProgress.STARTED)
+
+
+class TestTechreadDedupe(aiounittest.AsyncTestCase):
+    """ Test case for the deduplication of concurrent requests
+    """
+
+    async def test_shared_request(self) -> None:
+        """ Test whether concurrent identical requests are only
+        submitted once and late callers receive all messages
+
+        User Story: As API user I want duplicate submissions of the
+        same drawing to be served by the request that is already
+        running, so that I do not pay twice.
+        """
+        num_requests = 0
+
+        async def request() -> AsyncIterator[W24TechreadMessage]:
+            nonlocal num_requests
+            num_requests += 1
+            for _ in range(3):
+                await asyncio.sleep(0.01)
+                yield _make_message()
+
+        async def read(delay: float) -> List[W24TechreadMessage]:
+            await asyncio.sleep(delay)
+            return [m async for m in inflight.join("key", request)]
+
+        inflight = InflightRequests()
+        first, second = await asyncio.gather(read(0), read(0.015))
+        self.assertEqual(num_requests, 1)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(first, second)
+
+        # completed requests are not shared anymore
+        await read(0)
+        self.assertEqual(num_requests, 2)
+
+    async def test_abandoned_request(self) -> None:
+        """ Test whether the request continues when one subscriber
+        leaves and is cancelled when all subscribers left
+        """
+        cancelled = asyncio.Event()
+
+        async def request() -> AsyncIterator[W24TechreadMessage]:
+            try:
+                while True:
+                    await asyncio.sleep(0.01)
+                    yield _make_message()
+            finally:
+                cancelled.set()
+
+        async def read(num_messages: int) -> None:
+            count = 0
+            async for _ in inflight.join("key", request):
+                count += 1
+                if count == num_messages:
+                    break
+
+        inflight = InflightRequests()
+        await asyncio.gather(read(1), read(3))
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    async def test_join_while_cancelling(self) -> None:
+        """ Test whether a caller that joins while the abandoned
+        request is still unwinding starts a new request
+        """
+        num_requests = 0
+
+        async def request() -> AsyncIterator[W24TechreadMessage]:
+            nonlocal num_requests
+            num_requests += 1
+            try:
+                for _ in range(2):
+                    await asyncio.sleep(0.01)
+                    yield _make_message()
+
+            # e.g., releasing the websocket
+            finally:
+                await asyncio.sleep(0.05)
+
+        inflight = InflightRequests()
+        first = inflight.join("key", request)
+        await first.__anext__()
+        closing = asyncio.ensure_future(first.aclose())  # type: ignore
+        await asyncio.sleep(0.01)
+
+        second = [m async for m in inflight.join("key", request)]
+        await closing
+        self.assertEqual(num_requests, 2)
+        self.assertEqual(len(second), 2)
@@ -0,0 +1,146 @@
+import asyncio
+import time
+import uuid
+from typing import List
+
+import aiounittest
+from werk24.exceptions import HookExecutionError
+from werk24.models.ask import W24AskVariantMeasures
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType)
+from werk24.techread_client import W24TechreadClient
+from werk24.techread_hooks import Hook, HookIndex, HookRunner
+
+
+def _make_message(
+    message_type: str,
+    message_subtype: str
+) -> W24TechreadMessage:
+    return W24TechreadMessage(
+        request_id=str(uuid.uuid4()),
+        message_type=message_type,
+        message_subtype=message_subtype)
+
+
+class TestTechreadHooks(aiounittest.AsyncTestCase):
+    """ Test case for the dispatch of messages to the hooks
+    """
+
+    async def test_dispatch(self) -> None:
+        """ Test whether all subscribers of a message are called
+        in the order of their registration
+
+        User Story: As API user I want to register several hooks
+        for the same Ask, so that I can keep independent concerns
+        (e.g., storing and displaying) apart.
+        """
+        calls: List[str] = []
+
+        async def store(message: W24TechreadMessage) -> None:
+            calls.append("store")
+
+        hooks = [
+            Hook(ask=W24AskVariantMeasures(), function=store),
+            Hook(
+                ask=W24AskVariantMeasures(),
+                function=lambda message: calls.append("print")),
+            Hook(
+                message_type=W24TechreadMessageType.PROGRESS,
+                message_subtype=W24TechreadMessageSubtypeProgress.COMPLETED,
+                function=lambda message: calls.append("completed")),
+        ]
+        hook_index = HookIndex(hooks)
+
+        for message in [
+                _make_message("ASK", "VARIANT_MEASURES"),
+                _make_message("PROGRESS", "STARTED"),
+                _make_message("PROGRESS", "COMPLETED")]:
+            await W24TechreadClient._call_hooks_for_message(
+                message, hook_index)
+        self.assertEqual(calls, ["store", "print", "completed"])
+
+    def test_unmatched_warning(self) -> None:
+        """ Test whether messages without hook are only
+        reported once per type
+        """
+        hook_index = HookIndex([])
+        message = _make_message("PROGRESS", "STARTED")
+        with self.assertLogs("w24_techread_hooks") as logs:
+            for _ in range(3):
+                self.assertEqual(hook_index.get_hooks(message), [])
+        self.assertEqual(len(logs.records), 1)
+
+    async def test_concurrent_hooks(self) -> None:
+        """ Test whether slow hooks run concurrently, ordered hooks
+        keep their order and errors are collected
+
+        User Story: As API user I want slow hooks (e.g., database
+        writes) not to delay the processing of the other messages.
+        """
+        calls: List[int] = []
+        running = 0
+        max_running = 0
+
+        def slow(message: W24TechreadMessage) -> None:
+            time.sleep(0.05)
+
+        async def ordered(message: W24TechreadMessage) -> None:
+            nonlocal running, max_running
+            running += 1
+            max_running = max(max_running, running)
+            index = len(calls)
+            await asyncio.sleep(0.01 * (3 - index))
+            calls.append(index)
+            running -= 1
+
+        def failing(message: W24TechreadMessage) -> None:
+            raise ValueError("failed")
+
+        hook_index = HookIndex([
+            Hook(ask=W24AskVariantMeasures(), function=slow),
+            Hook(ask=W24AskVariantMeasures(), function=ordered, ordered=True),
+            Hook(
+                message_type=W24TechreadMessageType.PROGRESS,
+                message_subtype=W24TechreadMessageSubtypeProgress.COMPLETED,
+                function=failing),
+        ])
+        runner = HookRunner(max_concurrent_hooks=8)
+
+        start = time.monotonic()
+        for message in [_make_message("ASK", "VARIANT_MEASURES")] * 3 \
+                + [_make_message("PROGRESS", "COMPLETED")]:
+            await W24TechreadClient._call_hooks_for_message(
+                message, hook_index, runner)
+
+        # the messages are consumed without waiting for the hooks
+        self.assertLess(time.monotonic() - start, 0.05)
+
+        with self.assertRaises(HookExecutionError) as context:
+            await runner.join()
+        self.assertEqual(len(context.exception.errors), 1)
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(max_running, 1)
+
+    async def test_backpressure(self) -> None:
+        """ Test whether the consumption waits when the maximal
+        number of hooks is running
+        """
+        release = asyncio.Event()
+
+        async def blocking(message: W24TechreadMessage) -> None:
+            await release.wait()
+
+        runner = HookRunner(max_concurrent_hooks=2)
+        hook = Hook(ask=W24AskVariantMeasures(), function=blocking)
+        message = _make_message("ASK", "VARIANT_MEASURES")
+        await runner.submit(hook, message)
+        await runner.submit(hook, message)
+
+        submit = asyncio.ensure_future(runner.submit(hook, message))
+        await asyncio.sleep(0.01)
+        self.assertFalse(submit.done())
+
+        release.set()
+        await submit
+        await runner.join()
@@ -0,0 +1,72 @@
+import unittest
+import uuid
+
+from werk24.models.ask import W24AskVariantMeasuresResponse
+from werk24.models.techread import W24TechreadMessage
+
+
+def _make_measure() -> dict:
+    return {
+        "line": [[0.1, 0.2], [0.3, 0.4]],
+        "label": {
+            "blurb": "Ø 30",
+            "size": {
+                "blurb": "30",
+                "size_type": "DIAMETER",
+                "nominal_size": 30.0}}}
+
+
+class TestTechreadMessage(unittest.TestCase):
+    """ Test case for the typed payload of the messages
+    """
+
+    def test_payload(self) -> None:
+        """ Test whether the payload_dict is parsed into the
+        registered response model once
+
+        User Story: As API user I want to receive typed responses,
+        so that I do not need to know which model belongs to which
+        Ask.
+        """
+        message = W24TechreadMessage(
+            request_id=str(uuid.uuid4()),
+            message_type="ASK",
+            message_subtype="VARIANT_MEASURES",
+            payload_dict={
+                "variant_id": str(uuid.uuid4()),
+                "sectional_id": str(uuid.uuid4()),
+                "measures": [_make_measure()] * 3})
+
+        payload = message.payload
+        self.assertIsInstance(payload, W24AskVariantMeasuresResponse)
+        self.assertEqual(len(payload.measures), 3)
+        self.assertIs(message.payload, payload)
+
+        # the default tolerances are not shared between the measures
+        self.assertIsNot(
+            payload.measures[0].label.size_tolerance,
+            payload.measures[1].label.size_tolerance)
+
+        # copies share the payload unless the payload_dict changes
+        self.assertIs(message.copy(update={"page_index": 1}).payload, payload)
+        copy = message.copy(update={"payload_dict": {
+            **message.payload_dict, "measures": []}})
+        self.assertEqual(copy.payload.measures, [])
+
+    def test_payload_without_model(self) -> None:
+        """ Test whether messages without response model have
+        no payload
+        """
+        message = W24TechreadMessage(
+            request_id=str(uuid.uuid4()),
+            message_type="PROGRESS",
+            message_subtype="STARTED",
+            payload_dict={})
+        self.assertIsNone(message.payload)
+
+        message = W24TechreadMessage(
+            request_id=str(uuid.uuid4()),
+            message_type="ASK",
+            message_subtype="SECTIONAL_THUMBNAIL",
+            payload_dict={"sectional_id": str(uuid.uuid4())})
+        self.assertIsNone(message.payload)
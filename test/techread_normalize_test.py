@@ -0,0 +1,75 @@
+import io
+
+import aiounittest
+from PIL import Image, ImageDraw
+from werk24.techread_normalize import W24NormalizeConfig, normalize_drawing
+
+
+def _make_scan(dpi: int) -> bytes:
+    image = Image.new("RGB", (1200, 800), "white")
+    draw = ImageDraw.Draw(image)
+    for offset in range(0, 800, 40):
+        draw.line([(0, offset), (1200, 800 - offset)], fill="black", width=3)
+    buffer = io.BytesIO()
+    image.save(buffer, "TIFF", dpi=(dpi, dpi))
+    return buffer.getvalue()
+
+
+def _make_large_scan() -> bytes:
+    """ Blank A1 sheet at 600 dpi (about 280 megapixels) """
+    image = Image.new("1", (14043, 19866), 1)
+    buffer = io.BytesIO()
+    image.save(buffer, "TIFF", compression="group4", dpi=(600, 600))
+    return buffer.getvalue()
+
+
+class TestTechreadNormalize(aiounittest.AsyncTestCase):
+    """ Test case for the normalization of oversized drawings
+    """
+
+    def test_bilevel(self) -> None:
+        """ Test whether colour scans are re-encoded as bilevel TIFFs
+
+        User Story: As API user I want large colour scans to be
+        shrunk automatically, so that they are not rejected by the
+        upload limit.
+        """
+        drawing = _make_scan(600)
+        config = W24NormalizeConfig(max_size=len(drawing) // 10)
+        normalized = normalize_drawing(drawing, config)
+        self.assertIsNotNone(normalized)
+        self.assertLessEqual(len(normalized), config.max_size)
+
+        image = Image.open(io.BytesIO(normalized))
+        self.assertEqual(image.mode, "1")
+        self.assertEqual(image.size, (1200, 800))
+
+    def test_min_dpi(self) -> None:
+        """ Test whether the drawing is downsampled, but not below min_dpi
+        """
+        drawing = _make_scan(600)
+        config = W24NormalizeConfig(max_size=9000, min_dpi=300)
+        normalized = normalize_drawing(drawing, config)
+        self.assertIsNotNone(normalized)
+        self.assertLessEqual(len(normalized), config.max_size)
+
+        dpi = Image.open(io.BytesIO(normalized)).info["dpi"][0]
+        self.assertLess(dpi, 600)
+        self.assertGreaterEqual(dpi, 300)
+
+        # impossible limits are not met by giving up the resolution
+        config = W24NormalizeConfig(max_size=1000, min_dpi=300)
+        self.assertIsNone(normalize_drawing(drawing, config))
+
+    def test_no_raster(self) -> None:
+        """ Test whether PDFs are left untouched
+        """
+        self.assertIsNone(
+            normalize_drawing(b"%PDF-1.4", W24NormalizeConfig(max_size=1)))
+
+    def test_large_format(self) -> None:
+        """ Test whether drawings beyond Pillow's pixel limit
+        are left untouched rather than failing the request
+        """
+        config = W24NormalizeConfig(max_size=1)
+        self.assertIsNone(normalize_drawing(_make_large_scan(), config))
@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+from typing import AsyncIterator, List
+
+import aiounittest
+from werk24.exceptions import ServerException
+from werk24.models.ask import (W24AskPageThumbnail, W24AskSheetThumbnail,
+                               W24AskType, W24AskVariantMeasures)
+from werk24.models.techread import W24TechreadMessage, W24TechreadMessageType
+
+from .utils import FakeClientHttps, FakeSession, make_client
+
+PAYLOAD_URL = "https://api.example.com/v1/payload/{}"
+""" Url of the fake payloads """
+
+
+def _make_message(
+    message_subtype: str,
+    with_payload: bool = True
+) -> W24TechreadMessage:
+    return W24TechreadMessage(
+        request_id=str(uuid.uuid4()),
+        message_type="ASK",
+        message_subtype=message_subtype,
+        payload_url=PAYLOAD_URL.format(message_subtype)
+        if with_payload else None)
+
+
+async def _stream(
+    messages: List[W24TechreadMessage]
+) -> AsyncIterator[W24TechreadMessage]:
+    for message in messages:
+        yield message
+
+
+class TestTechreadPayload(aiounittest.AsyncTestCase):
+    """ Test case for the payload downloads of read_drawing
+    """
+
+    MESSAGES = [
+        ("PAGE_THUMBNAIL", True),
+        ("VARIANT_MEASURES", False),
+        ("SHEET_THUMBNAIL", True)]
+
+    async def _prefetch(
+        self,
+        client_https: FakeClientHttps,
+        preserve_order: bool
+    ) -> List[W24TechreadMessage]:
+        client = make_client(client_https=client_https)
+        messages = [
+            _make_message(message_subtype, with_payload)
+            for message_subtype, with_payload in self.MESSAGES]
+        return [
+            message async for message in client._prefetch_payloads(
+                _stream(messages), None, 4, preserve_order, True)]
+
+    async def test_ordered_prefetch(self) -> None:
+        """ Test whether the messages keep their order while
+        the payloads are downloaded concurrently
+
+        User Story: As API user I want to receive the thumbnails
+        without waiting for each download in turn.
+        """
+        client_https = FakeClientHttps(
+            {"PAGE_THUMBNAIL": 0.05, "SHEET_THUMBNAIL": 0.01})
+        messages = await self._prefetch(client_https, True)
+
+        self.assertEqual(
+            [message.message_subtype.value for message in messages],
+            ["PAGE_THUMBNAIL", "VARIANT_MEASURES", "SHEET_THUMBNAIL"])
+        self.assertEqual(
+            [message.payload_bytes for message in messages],
+            [b"PAGE_THUMBNAIL", None, b"SHEET_THUMBNAIL"])
+
+        # both downloads ran at the same time
+        self.assertEqual(
+            client_https.downloaded, ["SHEET_THUMBNAIL", "PAGE_THUMBNAIL"])
+
+    async def test_unordered_prefetch(self) -> None:
+        """ Test whether the messages are yielded as soon as
+        their payload is available
+        """
+        client_https = FakeClientHttps(
+            {"PAGE_THUMBNAIL": 0.05, "SHEET_THUMBNAIL": 0.01})
+        messages = await self._prefetch(client_https, False)
+
+        self.assertEqual(
+            [message.message_subtype.value for message in messages],
+            ["VARIANT_MEASURES", "SHEET_THUMBNAIL", "PAGE_THUMBNAIL"])
+
+    async def test_prefetch_error(self) -> None:
+        """ Test whether a failed download is raised to the caller
+        and the outstanding downloads are cancelled
+        """
+        client_https = FakeClientHttps(
+            {"PAGE_THUMBNAIL": 0.01, "SHEET_THUMBNAIL": 10},
+            failing="PAGE_THUMBNAIL")
+        with self.assertRaises(ServerException):
+            await self._prefetch(client_https, True)
+        self.assertEqual(client_https.cancelled, ["SHEET_THUMBNAIL"])
+
+    async def test_prefetch_cancellation(self) -> None:
+        """ Test whether leaving the stream early cancels the
+        outstanding downloads
+        """
+        client_https = FakeClientHttps(
+            {"PAGE_THUMBNAIL": 0.01, "SHEET_THUMBNAIL": 10})
+        client = make_client(client_https=client_https)
+        messages = client._prefetch_payloads(
+            _stream([
+                _make_message(message_subtype, with_payload)
+                for message_subtype, with_payload in self.MESSAGES]),
+            None, 4, False, True)
+
+        async for message in messages:
+            self.assertEqual(
+                message.message_subtype.value, "VARIANT_MEASURES")
+            break
+        await messages.aclose()  # type: ignore
+
+        # none of the downloads finishes after the stream was closed
+        await asyncio.sleep(0.02)
+        self.assertIn("PAGE_THUMBNAIL", client_https.cancelled)
+        self.assertEqual(client_https.downloaded, [])
+
+    async def test_selective_download(self) -> None:
+        """ Test whether only the requested payloads are downloaded
+        and the others can be fetched later
+
+        User Story: As API user I want to decide myself whether
+        a thumbnail is worth downloading, so that I do not waste
+        bandwidth on payloads I do not need.
+        """
+        client_https = FakeClientHttps()
+        client = make_client([FakeSession([
+            {"message_type": "ASK",
+             "message_subtype": message_subtype,
+             "payload_url": PAYLOAD_URL.format(message_subtype)
+             if with_payload else None}
+            for message_subtype, with_payload in self.MESSAGES])],
+            client_https)
+
+        messages = {
+            message.message_subtype.value: message
+            async for message in client.read_drawing(
+                b"%PDF-1",
+                [W24AskPageThumbnail(),
+                 W24AskVariantMeasures(),
+                 W24AskSheetThumbnail()],
+                download_payloads=[W24AskType.SHEET_THUMBNAIL])
+            if message.message_type == W24TechreadMessageType.ASK}
+
+        page_thumbnail = messages["PAGE_THUMBNAIL"]
+        self.assertIsNotNone(page_thumbnail.payload_url)
+        self.assertIsNone(page_thumbnail.payload_bytes)
+        self.assertEqual(
+            messages["SHEET_THUMBNAIL"].payload_bytes, b"SHEET_THUMBNAIL")
+        self.assertEqual(client_https.downloaded, ["SHEET_THUMBNAIL"])
+
+        # fetch the skipped payload on demand
+        self.assertIs(
+            await client.fetch_payload(page_thumbnail), page_thumbnail)
+        self.assertEqual(page_thumbnail.payload_bytes, b"PAGE_THUMBNAIL")
+
+        with self.assertRaises(ValueError):
+            await client.fetch_payload(messages["VARIANT_MEASURES"])
@@ -0,0 +1,88 @@
+import io
+from typing import Optional
+
+import aiounittest
+from PIL import Image
+from werk24.models.ask import W24AskVariantMeasures
+from werk24.models.techread import W24TechreadExceptionType
+from werk24.techread_client import W24TechreadClient
+from werk24.techread_preflight import W24PreflightConfig, preflight_check
+
+from .utils import CWD, get_drawing
+
+DRAWING_PATH = CWD / "assets" / "test_drawing.pdf"
+""" Path to the example drawing """
+
+
+def _make_image(image_format: str, dpi: Optional[int]) -> bytes:
+    buffer = io.BytesIO()
+    kwargs = {"dpi": (dpi, dpi)} if dpi is not None else {}
+    Image.new("L", (32, 32)).save(buffer, image_format, **kwargs)
+    return buffer.getvalue()
+
+
+class TestTechreadPreflight(aiounittest.AsyncTestCase):
+    """ Test case for the local checks before the submission
+    """
+
+    def test_file_format(self) -> None:
+        """ Test whether supported files pass and others are rejected
+        """
+        config = W24PreflightConfig()
+        self.assertIsNone(preflight_check(get_drawing(), None, config))
+        self.assertIsNone(preflight_check(DRAWING_PATH, None, config))
+        for image_format in ("PNG", "JPEG", "TIFF"):
+            self.assertIsNone(preflight_check(
+                _make_image(image_format, 300), None, config))
+
+        self.assertEqual(
+            preflight_check(b"GIF89a", None, config),
+            W24TechreadExceptionType.DRAWING_FILE_FORMAT_UNSUPPORTED)
+
+    def test_file_size(self) -> None:
+        """ Test whether the size limits of drawing and model are applied
+        """
+        config = W24PreflightConfig(max_drawing_size=10, max_model_size=10)
+        with open(DRAWING_PATH, "rb") as file_handle:
+            self.assertEqual(
+                preflight_check(file_handle, None, config),
+                W24TechreadExceptionType.DRAWING_FILE_SIZE_TOO_LARGE)
+            self.assertEqual(file_handle.tell(), 0)
+
+        self.assertEqual(
+            preflight_check(b"%PDF-", b"0123456789X", config),
+            W24TechreadExceptionType.MODEL_FILE_SIZE_TOO_LARGE)
+
+    def test_resolution(self) -> None:
+        """ Test whether the resolution is read from the image metadata
+        """
+        config = W24PreflightConfig(min_dpi=150)
+        for image_format in ("PNG", "JPEG", "TIFF"):
+            self.assertEqual(
+                preflight_check(_make_image(image_format, 72), None, config),
+                W24TechreadExceptionType.DRAWING_RESOLUTION_TOO_LOW)
+            self.assertIsNone(
+                preflight_check(_make_image(image_format, 300), None, config))
+
+        # images without resolution are left to the API
+        self.assertIsNone(
+            preflight_check(_make_image("PNG", None), None, config))
+
+    async def test_read_drawing(self) -> None:
+        """ Test whether rejected drawings yield the exception
+        messages without contacting the API
+
+        User Story: As API user I want to learn immediately when
+        my file is unsupported, rather than after the upload.
+        """
+        client = W24TechreadClient("localhost", "localhost", "v1")
+
+        # enter the session state without connecting
+        client._request_semaphore = object()  # type: ignore
+
+        asks = [W24AskVariantMeasures()]
+        messages = [m async for m in client.read_drawing(b"GIF89a", asks)]
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(
+            messages[0].exceptions[0].exception_type,
+            W24TechreadExceptionType.DRAWING_FILE_FORMAT_UNSUPPORTED)
@@ -0,0 +1,54 @@
+import io
+
+import aiounittest
+from werk24.exceptions import UnsupportedMediaType
+from werk24.techread_source import SPOOL_MAX_MEMORY, check_source, open_source
+
+from .utils import CWD, get_drawing
+
+DRAWING_PATH = CWD / "assets" / "test_drawing.pdf"
+""" Path to the example drawing """
+
+
+class TestTechreadSource(aiounittest.AsyncTestCase):
+    """ Test case for the streaming upload sources
+    """
+
+    def test_string_is_rejected(self) -> None:
+        """ Test whether str sources are rejected
+
+        See Github Issue #13
+        """
+        with self.assertRaises(UnsupportedMediaType):
+            check_source("", "Drawing")
+
+    async def test_path_is_mapped(self) -> None:
+        """ Test whether a path is mapped into memory
+
+        User Story: As API user I want to upload large drawings from
+        disk without reading them into memory first.
+        """
+        async with open_source(DRAWING_PATH) as content:
+            self.assertIsInstance(content, memoryview)
+            self.assertEqual(bytes(content), get_drawing())
+
+    async def test_file_object_is_passed_through(self) -> None:
+        """ Test whether binary files are streamed directly
+        """
+        with open(DRAWING_PATH, "rb") as file_handle:
+            async with open_source(file_handle) as content:
+                self.assertIs(content, file_handle)
+
+    async def test_async_iterable_is_spooled(self) -> None:
+        """ Test whether async iterables of unknown size are spooled
+        to disk once they exceed the memory limit
+        """
+        chunk = b"0" * 1024
+
+        async def stream():
+            for _ in range(SPOOL_MAX_MEMORY // len(chunk) + 1):
+                yield chunk
+
+        async with open_source(stream()) as content:
+            self.assertNotIsInstance(content, io.BytesIO)
+            self.assertEqual(len(content.read()), SPOOL_MAX_MEMORY + 1024)
@@ -0,0 +1,74 @@
+import io
+
+import aiounittest
+from PIL import Image
+from pypdf import PdfReader, PdfWriter
+from werk24.techread_split import split_drawing
+
+from .utils import get_drawing
+
+
+class TestTechreadSplit(aiounittest.AsyncTestCase):
+    """ Test case for splitting multi-page drawings
+    """
+
+    def test_split_tiff(self) -> None:
+        """ Test whether multi-page TIFFs are split into their pages
+
+        User Story: As API user I want the pages of my drawing sets
+        to be read in parallel, so that large sets finish in the
+        time of the slowest page.
+        """
+        frames = [Image.new("1", (64, 32), index % 2) for index in range(3)]
+        buffer = io.BytesIO()
+        frames[0].save(
+            buffer,
+            "TIFF",
+            save_all=True,
+            append_images=frames[1:],
+            dpi=(300, 300))
+
+        pages = split_drawing(buffer.getvalue())
+        self.assertEqual(len(pages), 3)
+        for index, page in enumerate(pages):
+            image = Image.open(io.BytesIO(page))
+            self.assertEqual(getattr(image, "n_frames", 1), 1)
+            self.assertEqual(image.getpixel((0, 0)), 255 * (index % 2))
+
+    def test_split_pdf(self) -> None:
+        """ Test whether multi-page PDFs are split into their pages
+        """
+        writer = PdfWriter()
+        for _ in range(3):
+            writer.add_blank_page(100, 100)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+
+        pages = split_drawing(buffer.getvalue())
+        self.assertEqual(len(pages), 3)
+        for page in pages:
+            self.assertEqual(len(PdfReader(io.BytesIO(page)).pages), 1)
+
+    def test_single_page(self) -> None:
+        """ Test whether single-page and other drawings are left as they are
+        """
+        drawing = get_drawing()
+        self.assertEqual(split_drawing(drawing), [drawing])
+        self.assertIsNone(split_drawing(b"\x89PNG\r\n\x1a\n"))
+
+    def test_large_format(self) -> None:
+        """ Test whether TIFFs beyond Pillow's pixel limit
+        are submitted as a whole
+        """
+        # two blank A1 sheets at 600 dpi (about 280 megapixels each)
+        frames = [Image.new("1", (14043, 19866), 1) for _ in range(2)]
+        buffer = io.BytesIO()
+        frames[0].save(
+            buffer,
+            "TIFF",
+            compression="group4",
+            save_all=True,
+            append_images=frames[1:])
+
+        drawing = buffer.getvalue()
+        self.assertEqual(split_drawing(drawing), [drawing])
@@ -0,0 +1,111 @@
+import tempfile
+import time
+
+import aiounittest
+from werk24.auth_client import AuthClient
+from werk24.token_cache import W24TokenCache, get_token_expiry
+
+from .utils import make_jwt_token
+
+
+class TestTokenCache(aiounittest.AsyncTestCase):
+    """ Test case for the on-disk token cache
+    """
+
+    def test_token_expiry(self) -> None:
+        """ Test whether the exp claim is read from the token
+        """
+        self.assertEqual(get_token_expiry(make_jwt_token(1234)), 1234)
+        self.assertIsNone(get_token_expiry("invalid"))
+
+    def test_put_and_get(self) -> None:
+        """ Test whether a valid token is returned and an
+        expiring token is not
+        """
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = W24TokenCache(cache_dir, expiry_margin=60)
+            key = cache.make_key("eu-central-1", "client", "user")
+
+            self.assertIsNone(cache.get(key))
+
+            token = make_jwt_token(time.time() + 3600)
+            cache.put(key, token)
+            self.assertEqual(cache.get(key), token)
+
+            cache.put(key, make_jwt_token(time.time() + 30))
+            self.assertIsNone(cache.get(key))
+
+            cache.invalidate(key)
+            self.assertIsNone(cache.get(key))
+
+    async def test_login_uses_cache(self) -> None:
+        """ Test whether the AuthClient reuses the cached token
+
+        User Story: As API user I want short-lived processes to
+        reuse the token of previous processes, so that I do not
+        pay for the login on every call.
+        """
+        token = make_jwt_token(time.time() + 3600)
+        num_logins = 0
+
+        async def login_cognito() -> None:
+            nonlocal num_logins
+            num_logins += 1
+            auth_client.token = token
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for _ in range(3):
+                auth_client = AuthClient(
+                    "eu-central-1",
+                    "some id",
+                    "some user pool id",
+                    "some client id",
+                    "some client secret",
+                    token_cache=W24TokenCache(cache_dir))
+                auth_client.register("user", "password")
+                auth_client._login_cognito = login_cognito  # type: ignore
+                await auth_client.login()
+                self.assertEqual(auth_client.token, token)
+
+        self.assertEqual(num_logins, 1)
+
+    async def test_reject_token(self) -> None:
+        """ Test whether a token that the server rejected is
+        removed from the cache and replaced by a new login
+
+        User Story: As API user I want my processes to recover
+        when a cached token was revoked before its expiry.
+        """
+        tokens = [
+            make_jwt_token(time.time() + 3600),
+            make_jwt_token(time.time() + 7200)]
+        num_logins = 0
+
+        async def login_cognito() -> None:
+            nonlocal num_logins
+            auth_client.token = tokens[num_logins]
+            num_logins += 1
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            token_cache = W24TokenCache(cache_dir)
+            auth_client = AuthClient(
+                "eu-central-1",
+                "some id",
+                "some user pool id",
+                "some client id",
+                "some client secret",
+                token_cache=token_cache)
+            auth_client.register("user", "password")
+            auth_client._login_cognito = login_cognito  # type: ignore
+            await auth_client.login()
+
+            await auth_client.reject_token(tokens[0])
+            self.assertEqual(auth_client.token, tokens[1])
+            key = token_cache.make_key(
+                "eu-central-1", "some client id", "user")
+            self.assertEqual(token_cache.get(key), tokens[1])
+
+            # a token that was already replaced does not
+            # trigger another login
+            await auth_client.reject_token(tokens[0])
+            self.assertEqual(num_logins, 2)
@@ -1,5 +1,15 @@
+import asyncio
 import os
+import base64
+import json
+import uuid
 from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from werk24 import techread_client_wss
+from werk24.auth_client import AuthClient
+from werk24.exceptions import ServerException
+from werk24.techread_client import W24TechreadClient
 
 CWD = Path(os.path.dirname(__file__))
 
@@ -26,3 +36,168 @@ def get_model() -> bytes:
     path = CWD / "assets" / "test_model.stp"
     with open(path, 'rb') as file_handle:
         return file_handle.read()
+
+
+def make_jwt_token(expires_at: float) -> str:
+    """ Make an unsigned JWT token with the exp claim
+
+    Arguments:
+        expires_at {float} -- Expiry as seconds since the epoch
+
+    Returns:
+        str -- JWT token
+    """
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(
+            json.dumps(data).encode()).decode().rstrip("=")
+    return ".".join([
+        encode({"alg": "none"}),
+        encode({"exp": expires_at}),
+        "signature"])
+
+
+def make_auth_client() -> AuthClient:
+    """ Small helper function to make an AuthClient that
+    is logged in without talking to Cognito
+
+    Returns:
+        AuthClient -- AuthClient with the token "token"
+    """
+    auth_client = AuthClient(
+        "eu-central-1", "some id", "some pool", "some id", "secret")
+    auth_client.token = "token"
+    return auth_client
+
+
+class FakeSession:
+    """ Stand-in for the websocket connection that answers the
+    request with the given messages and then closes
+    """
+
+    def __init__(
+        self,
+        messages: Optional[List[Dict[str, Any]]] = None
+    ) -> None:
+        """ Create a new session
+
+        Arguments:
+            messages {Optional[List[Dict[str, Any]]]} -- Fields of
+                the messages that answer the READ command. The
+                request_id is added automatically
+        """
+        self.open = True
+        self._messages = messages or []
+        self._frames: "asyncio.Queue[Optional[str]]" = asyncio.Queue()
+        self._request_id = str(uuid.uuid4())
+
+    def _put(self, **fields: Any) -> None:
+        self._frames.put_nowait(
+            json.dumps({"request_id": self._request_id, **fields}))
+
+    async def send(self, command: str) -> None:
+        action = json.loads(command)["action"]
+        if action == "INITIALIZE":
+            presigned_post = {
+                "url": "https://upload.example.com", "fields": {}}
+            self._put(
+                message_type="PROGRESS",
+                message_subtype="INITIALIZATION_SUCCESS",
+                payload_dict={
+                    "drawing_presigned_post": presigned_post,
+                    "model_presigned_post": presigned_post})
+        elif action == "READ":
+            for message in self._messages:
+                self._put(**message)
+            self._frames.put_nowait(None)
+
+    async def __aiter__(self) -> AsyncIterator[str]:
+        while True:
+            frame = await self._frames.get()
+            if frame is None:
+                self.open = False
+                return
+            yield frame
+
+    async def close(self) -> None:
+        self.open = False
+
+
+class FakeClientHttps:
+    """ Stand-in for the TechreadClientHttps that delays
+    the downloads and records their outcome
+    """
+
+    def __init__(
+        self,
+        delays: Optional[Dict[str, float]] = None,
+        failing: Optional[str] = None
+    ) -> None:
+        """ Create a new client
+
+        Arguments:
+            delays {Optional[Dict[str, float]]} -- Delay of the
+                downloads by the last part of the payload url
+            failing {Optional[str]} -- Last part of the payload
+                url whose download fails
+        """
+        self.delays = delays or {}
+        self.failing = failing
+        self.downloaded: List[str] = []
+        self.cancelled: List[str] = []
+
+    async def download_payload(self, payload_url: str) -> bytes:
+        name = payload_url.rsplit("/", 1)[-1]
+        try:
+            await asyncio.sleep(self.delays.get(name, 0))
+        except asyncio.CancelledError:
+            self.cancelled.append(name)
+            raise
+
+        if name == self.failing:
+            raise ServerException(f"Request failed '{payload_url}'")
+
+        self.downloaded.append(name)
+        return name.encode()
+
+    async def upload_associated_file(self, presigned_post, content) -> None:
+        pass
+
+
+def make_client(
+    sessions: Optional[List[FakeSession]] = None,
+    client_https: Optional[FakeClientHttps] = None,
+    **kwargs: Any
+) -> W24TechreadClient:
+    """ Small helper function to make a client that talks
+    to the fake sessions one after the other
+
+    Arguments:
+        sessions {Optional[List[FakeSession]]} -- Websocket
+            connections that are opened one after the other
+        client_https {Optional[FakeClientHttps]} -- Stand-in
+            for the https client
+        **kwargs {Any} -- Arguments of the W24TechreadClient
+
+    Returns:
+        W24TechreadClient -- Client that skips the login
+    """
+    sessions = sessions if sessions is not None else []
+    client = W24TechreadClient(
+        "localhost", "localhost", "v1", preflight=None, **kwargs)
+    client._techread_client_https = (  # type: ignore
+        client_https or FakeClientHttps())
+
+    client_wss = client._techread_client_wss
+    auth_client = make_auth_client()
+    client_wss.register_auth_client(auth_client)
+
+    async def connect() -> None:
+        client_wss._techread_session_wss = sessions.pop(0)
+        client_wss._connected_token = auth_client.token
+        client_wss._router = techread_client_wss._Router(
+            client_wss._techread_session_wss)
+
+    client_wss._connect = connect  # type: ignore
+    client._request_semaphore = asyncio.Semaphore(1)
+    client._initialize_lock = asyncio.Lock()
+    return client
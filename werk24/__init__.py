@@ -1,3 +1,10 @@
 from ._version import __version__
 from .models.ask import *
 from .techread_client import Hook, W24TechreadClient
+from .techread_cache import (W24DirectoryCacheBackend, W24MemoryCacheBackend,
+                             W24ResultCache, W24SQLiteCacheBackend)
+from .techread_client_pool import W24TechreadClientPool
+from .techread_client_wss import W24ReceiveQueueMetrics
+from .token_cache import W24TokenCache
+from .techread_preflight import W24PreflightConfig
+from .techread_normalize import W24NormalizeConfig, W24NormalizeEncoding
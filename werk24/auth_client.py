@@ -1,13 +1,51 @@
 """ Module handling the authentication
+
+DESCRIPTION
+    By default, the login talks to the AWS Cognito User Pool
+    directly over aiohttp, so that it never blocks the event loop.
+    boto3 is only required if you explicitly ask for the legacy
+    login path (use_boto3=True), which then runs in the executor.
 """
+import asyncio
 import base64
 import hashlib
 import hmac
-from botocore.exceptions import ClientError
-from typing import Optional, Tuple
+import json
+import logging
+import time
+import weakref
+from typing import Any, Dict, Optional, Tuple
 
-import boto3
 from werk24.exceptions import UnauthorizedException
+from werk24.token_cache import (DEFAULT_EXPIRY_MARGIN, W24TokenCache,
+                                get_token_expiry)
+
+# make the logger
+logger = logging.getLogger(  # pylint: disable=invalid-name
+    'w24_auth_client')
+
+COGNITO_IDP_ENDPOINT = "https://cognito-idp.{region}.amazonaws.com/"
+""" Endpoint of the AWS Cognito User Pool API """
+
+COGNITO_TIMEOUT = 30.0
+""" Number of seconds after which we give up on AWS Cognito """
+
+DEFAULT_REFRESH_MARGIN = 600.0
+""" Number of seconds before the expiry of the token at which
+the background task obtains a new token """
+
+REFRESH_RETRY_INTERVAL = 30.0
+""" Number of seconds after which a failed refresh is retried """
+
+MIN_REFRESH_INTERVAL = 10.0
+""" Minimal number of seconds between two refreshes. Protects
+against a busy loop if the token lifetime is shorter than the
+refresh margin """
+
+_SHARED_AUTH_CLIENTS = weakref.WeakValueDictionary()  # type: ignore
+""" Process-wide registry of the AuthClients, keyed by
+(cognito_region, cognito_client_id, username). See
+AuthClient.make_shared() """
 
 
 class AuthClient:
@@ -28,7 +66,28 @@ class AuthClient:
             cognito_identity_pool_id: str,
             cognito_user_pool_id: str,
             cognito_client_id: str,
-            cognito_client_secret: str):
+            cognito_client_secret: str,
+            token_cache: Optional[W24TokenCache] = None,
+            use_boto3: bool = False):
+        """ Initialize a new AuthClient
+
+        Arguments:
+            cognito_region {str} -- Physical region
+            cognito_identity_pool_id {str} -- identity pool of W24
+            cognito_user_pool_id {str} -- user pool of W24
+            cognito_client_id {str} -- the client id of your application
+            cognito_client_secret {str} -- the client secrect of your
+                application
+
+        Keyword Arguments:
+            token_cache {Optional[W24TokenCache]} -- Cache in which the
+                token is shared with other processes. None to log in
+                on every login() call (default: {None})
+
+            use_boto3 {bool} -- Use the legacy login path via boto3
+                and the Cognito Identity Pool. Requires boto3 to be
+                installed (default: {False})
+        """
 
         # store the settings
         self._cognito_region = cognito_region
@@ -36,13 +95,82 @@ class AuthClient:
         self._cognito_user_pool_id = cognito_user_pool_id
         self._cognito_client_id = cognito_client_id
         self._cognito_client_secret = cognito_client_secret
+        self._token_cache = token_cache
+        self._use_boto3 = use_boto3
 
         # make empty references to the username and password
         self.username: Optional[str] = None
         self._password: Optional[str] = None
 
         # make an empty reference ot the jwt_token
-        self.token = None
+        self.token: Optional[str] = None
+
+        # The refresh token allows us to obtain a new jwt_token
+        # without sending the password again
+        self._refresh_token: Optional[str] = None
+
+        # Background task that refreshes the token before it
+        # expires. It is shared by all users of the AuthClient
+        # (see start_refresh())
+        self._refresh_task: Optional["asyncio.Future[None]"] = None
+        self._num_refresh_users = 0
+        self._refresh_margin = DEFAULT_REFRESH_MARGIN
+
+        # Login that is currently in flight. Concurrent callers
+        # of login() wait for it rather than logging in themselves
+        self._login_task: Optional["asyncio.Future[None]"] = None
+
+    @classmethod
+    def make_shared(
+        cls,
+        cognito_region: str,
+        cognito_identity_pool_id: str,
+        cognito_user_pool_id: str,
+        cognito_client_id: str,
+        cognito_client_secret: str,
+        username: str,
+        password: str,
+        **kwargs: Any
+    ) -> "AuthClient":
+        """ Get the AuthClient of the user from the process-wide
+        registry, or create and register a new one. All
+        W24TechreadClients of the same user thereby share one
+        token, one login and one background refresh.
+
+        NOTE: The settings passed in **kwargs are only applied
+        when the AuthClient is created. The password is updated
+        on every call.
+
+        Arguments:
+            cognito_region {str} -- Physical region
+            cognito_identity_pool_id {str} -- identity pool of W24
+            cognito_user_pool_id {str} -- user pool of W24
+            cognito_client_id {str} -- the client id of your application
+            cognito_client_secret {str} -- the client secrect of your
+                application
+            username {str} -- Username
+            password {str} -- Password
+
+            **kwargs -- Additional arguments that are passed to the
+                constructor; e.g., token_cache
+
+        Returns:
+            AuthClient -- The shared AuthClient
+        """
+        key = (cognito_region, cognito_client_id, username)
+        auth_client = _SHARED_AUTH_CLIENTS.get(key)
+        if auth_client is None:
+            auth_client = cls(
+                cognito_region,
+                cognito_identity_pool_id,
+                cognito_user_pool_id,
+                cognito_client_id,
+                cognito_client_secret,
+                **kwargs)
+            _SHARED_AUTH_CLIENTS[key] = auth_client
+
+        auth_client.register(username, password)
+        return auth_client
 
     def register(self, username: str, password: str) -> None:
         """ Store the username and password locally so
@@ -55,7 +183,7 @@ class AuthClient:
         self.username = username
         self._password = password
 
-    async def _get_generic_identity(self) -> Tuple[str, str]:
+    def _get_generic_identity(self) -> Tuple[str, str]:
         """ The AWS Cognito User Pools can only be accessed with
         credentials (even if they are generic). This function
         calls the AWS Cognito IDENTITY POOL to obtain the generic
@@ -69,6 +197,10 @@ class AuthClient:
             Tuple[str, str] -- Access Key, Secret Key Tuple
         """
 
+        # pylint: disable=import-outside-toplevel
+        import boto3
+        from botocore.exceptions import ClientError
+
         # make the identity client
         try:
             identity_client = boto3.client(
@@ -103,18 +235,27 @@ class AuthClient:
         # that's it
         return access_key, secret_key
 
-    async def _make_cognito_client(self) -> boto3.session.Session.client:
+    def _make_cognito_client(self) -> Any:
         """ Make the Cognito Client to communicate with
         AWS Cognito
 
         Returns:
             boto3.session.Session.client -- Boto3 Client
         """
+        # boto3 is optional, so we only import it when needed
+        # pylint: disable=import-outside-toplevel
+        try:
+            import boto3
+            from botocore.exceptions import ClientError
+        except ImportError:
+            raise ImportError(
+                "The boto3 login requires boto3. "
+                "Please run 'pip install werk24[boto3]'")
 
         try:
             # before we can aws cognito USER POOL client, we need
             # to obtain a generic identity from the IDENTIY POOL
-            access_key, secret_key = await self._get_generic_identity()
+            access_key, secret_key = self._get_generic_identity()
 
             # with this information, we can now generate the client
             return boto3.client(
@@ -152,7 +293,8 @@ class AuthClient:
     async def login(
         self
     ) -> None:
-        """ Login with AWS Cognito
+        """ Login with AWS Cognito. If a token cache is available,
+        the cached token is used as long as it is valid.
 
         Raises:
             UnauthorizedException: Raised when the user credentials
@@ -164,8 +306,233 @@ class AuthClient:
         if self.username is None or self._password is None:
             raise UnauthorizedException("No username / password provided")
 
-        # make the connection to aws
-        cognito_client = await self._make_cognito_client()
+        # nothing to do if another user of the AuthClient
+        # already logged in
+        if self._is_token_valid():
+            return
+
+        # join the login that is in flight (if any). The shield
+        # ensures that the login is completed for the other
+        # callers when one of them is cancelled. Tasks can not be
+        # shared across event loops, so a login that was started
+        # on another loop is not joined
+        loop = asyncio.get_event_loop()
+        if self._login_task is None \
+                or self._login_task.done() \
+                or self._login_task.get_loop() is not loop:
+            self._login_task = asyncio.ensure_future(
+                self._obtain_token(renew=False))
+        await asyncio.shield(self._login_task)
+
+    async def reject_token(self, token: Optional[str]) -> None:
+        """ Drop the token after the server did not accept it (e.g.,
+        because it was revoked before its expiry), remove it from
+        the token cache and log in again. If the token was already
+        replaced, we merely wait for the login that is in flight.
+
+        Arguments:
+            token {Optional[str]} -- Token that the server rejected
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+        """
+        if token is not None and token == self.token:
+            logger.info("The server rejected the token. Logging in again")
+            self.token = None
+
+            # Otherwise the next login would read the rejected token
+            # back from the cache. We do not hold the lock, so that
+            # concurrent callers see the invalidated cache right away
+            if self._token_cache is not None:
+                key = self._token_cache.make_key(
+                    self._cognito_region,
+                    self._cognito_client_id,
+                    self.username)  # type: ignore
+                if self._token_cache.get(key) == token:
+                    self._token_cache.invalidate(key)
+
+        await self.login()
+
+    def _is_token_valid(self) -> bool:
+        """ Check whether we have a token that does not
+        expire soon
+
+        Returns:
+            bool -- True if the token can be used
+        """
+        if self.token is None:
+            return False
+
+        expires_at = get_token_expiry(self.token)
+        return expires_at is not None \
+            and time.time() + DEFAULT_EXPIRY_MARGIN < expires_at
+
+    async def refresh(
+        self
+    ) -> None:
+        """ Obtain a new token before the current one expires.
+        We use the refresh token if we have one and fall back
+        to a full login otherwise.
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+        """
+        if self.username is None or self._password is None:
+            raise UnauthorizedException("No username / password provided")
+
+        await self._obtain_token(renew=True)
+
+    async def _obtain_token(
+        self,
+        renew: bool
+    ) -> None:
+        """ Obtain a token, either from the token cache or from
+        AWS Cognito.
+
+        Arguments:
+            renew {bool} -- If True, the current token is replaced
+                even if it is still valid
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+        """
+        if self._token_cache is None:
+            await self._request_token(renew)
+            return
+
+        # Hold the lock while logging in, so that concurrent
+        # processes wait for our token rather than logging in
+        # themselves
+        key = self._token_cache.make_key(
+            self._cognito_region,
+            self._cognito_client_id,
+            self.username)  # type: ignore
+        async with self._token_cache.lock(key):
+
+            # When renewing, another process might already have
+            # stored a newer token than ours
+            token = self._token_cache.get(key)
+            if token is not None and (not renew or token != self.token):
+                self.token = token
+                return
+
+            await self._request_token(renew)
+            self._token_cache.put(key, self.token)  # type: ignore
+
+    async def _request_token(
+        self,
+        renew: bool
+    ) -> None:
+        """ Request a new token from AWS Cognito
+
+        Arguments:
+            renew {bool} -- If True, we try the refresh token first
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+        """
+        if renew and self._refresh_token is not None and not self._use_boto3:
+            try:
+                await self._refresh_cognito()
+                return
+
+            # the refresh token might have been revoked or expired.
+            # In that case we simply log in again
+            except UnauthorizedException:
+                logger.info("Refresh token was rejected. Logging in again")
+                self._refresh_token = None
+
+        await self._login_cognito()
+
+    async def _refresh_cognito(
+        self
+    ) -> None:
+        """ Obtain a new token with the refresh token
+
+        Raises:
+            UnauthorizedException: Raised when Cognito did not
+                accept the refresh token
+        """
+        auth_data = {
+            'REFRESH_TOKEN': self._refresh_token,
+            'SECRET_HASH': self._make_cognito_secret_hash(
+                self.username)}  # type: ignore
+        resp = await self._initiate_auth('REFRESH_TOKEN_AUTH', auth_data)
+
+        # store the jwt token
+        try:
+            self.token = resp['AuthenticationResult']['IdToken']
+        except KeyError:
+            raise UnauthorizedException(
+                "Unable to obtain JWT Token from AWS Cognito.")
+
+    def start_refresh(self) -> None:
+        """ Start the background task that refreshes the token
+        before it expires. The task is shared: every call needs
+        to be matched by a call to stop_refresh().
+        """
+        self._num_refresh_users += 1
+        if self._refresh_task is None \
+                or self._refresh_task.done() \
+                or self._refresh_task.get_loop() \
+                is not asyncio.get_event_loop():
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+
+    async def stop_refresh(self) -> None:
+        """ Stop the background task once the last user
+        called stop_refresh()
+        """
+        self._num_refresh_users = max(0, self._num_refresh_users - 1)
+        if self._num_refresh_users > 0 or self._refresh_task is None:
+            return
+
+        self._refresh_task.cancel()
+        await asyncio.gather(self._refresh_task, return_exceptions=True)
+        self._refresh_task = None
+
+    async def _refresh_loop(self) -> None:
+        """ Refresh the token refresh_margin seconds before it
+        expires. Failed refreshes are retried until the task
+        is stopped.
+        """
+        while True:
+
+            # We can only schedule the refresh if the token
+            # tells us when it expires
+            expires_at = get_token_expiry(self.token) \
+                if self.token is not None else None
+            if expires_at is None:
+                return
+
+            delay = expires_at - self._refresh_margin - time.time()
+            await asyncio.sleep(max(delay, MIN_REFRESH_INTERVAL))
+
+            try:
+                await self.refresh()
+                logger.debug("Refreshed the authentication token")
+
+            # keep the task alive. Cognito might just be
+            # temporarily unavailable
+            except Exception:  # pylint: disable=broad-except
+                logger.warning(
+                    "Unable to refresh the authentication token. "
+                    "Retrying in %s seconds", REFRESH_RETRY_INTERVAL,
+                    exc_info=True)
+                await asyncio.sleep(REFRESH_RETRY_INTERVAL)
+
+    async def _login_cognito(
+        self
+    ) -> None:
+        """ Obtain a new token from AWS Cognito
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+        """
 
         # make the authentication data
         auth_data = {
@@ -174,22 +541,108 @@ class AuthClient:
             'SECRET_HASH': self._make_cognito_secret_hash(self.username)}
 
         # get the jwt token from AWS cognito
+        if self._use_boto3:
+            resp = await asyncio.get_event_loop().run_in_executor(
+                None, self._initiate_auth_boto3, auth_data)
+        else:
+            resp = await self._initiate_auth(
+                'USER_PASSWORD_AUTH', auth_data)
+
+        # store the jwt token and the refresh token
         try:
-            resp = cognito_client.initiate_auth(
-                AuthFlow='USER_PASSWORD_AUTH',
-                AuthParameters=auth_data,
-                ClientId=self._cognito_client_id)
+            self.token = resp['AuthenticationResult']['IdToken']
+        except KeyError:
+            raise UnauthorizedException(
+                "Unable to obtain JWT Token from AWS Cognito.")
+        self._refresh_token = resp['AuthenticationResult'] \
+            .get('RefreshToken')
+
+    async def _initiate_auth(
+        self,
+        auth_flow: str,
+        auth_parameters: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """ Call InitiateAuth on the AWS Cognito User Pool API.
+        The call does not need to be signed, so we can send it
+        with aiohttp and skip the Cognito Identity Pool.
+
+        Arguments:
+            auth_flow {str} -- Authentication flow; e.g.,
+                USER_PASSWORD_AUTH
+            auth_parameters {Dict[str, Any]} -- Parameters of the flow
+
+        Raises:
+            UnauthorizedException: Raised when Cognito is not reachable
+                or does not accept the credentials
+
+        Returns:
+            Dict[str, Any] -- Response of AWS Cognito
+        """
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        url = COGNITO_IDP_ENDPOINT.format(region=self._cognito_region)
+        headers = {
+            "Content-Type": "application/x-amz-json-1.1",
+            "X-Amz-Target": "AWSCognitoIdentityProviderService.InitiateAuth"}
+        body = {
+            "AuthFlow": auth_flow,
+            "AuthParameters": auth_parameters,
+            "ClientId": self._cognito_client_id}
+
+        try:
+            timeout = aiohttp.ClientTimeout(total=COGNITO_TIMEOUT)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.post(
+                        url,
+                        data=json.dumps(body),
+                        headers=headers) as response:
+                    status = response.status
+                    resp = await response.json(content_type=None)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            raise UnauthorizedException("Cognito IDP Client Error")
 
         # We will receive an error message directly from AWS Cognito
         # if anything goes wrong. The error message will be valuable,
         # as it allows the user to differentiate between disabled
-        # accounts and incorrect credentials
-        except cognito_client.exceptions.NotAuthorizedException:
-            raise UnauthorizedException()
+        # accounts and incorrect credentials. The error type might
+        # be prefixed with a namespace (e.g., 'com.amazon...#')
+        if status != 200:
+            error_type = str(resp.get("__type", "")).rsplit("#", 1)[-1]
+            error_message = resp.get("message") or resp.get("Message")
+            raise UnauthorizedException(
+                f"{error_type}: {error_message}" if error_type
+                else "Cognito IDP Client Error")
+
+        return resp
+
+    def _initiate_auth_boto3(
+        self,
+        auth_data: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """ Legacy login path via boto3. The call blocks, so it
+        needs to be run in the executor.
+
+        Arguments:
+            auth_data {Dict[str, Any]} -- Parameters of the
+                USER_PASSWORD_AUTH flow
+
+        Raises:
+            UnauthorizedException: Raised when the user credentials
+                were not accepted by Cognito
+
+        Returns:
+            Dict[str, Any] -- Response of AWS Cognito
+        """
+
+        # make the connection to aws
+        cognito_client = self._make_cognito_client()
 
-        # store the jwt token
         try:
-            self.token = resp['AuthenticationResult']['IdToken']
-        except KeyError:
-            raise UnauthorizedException(
-                "Unable to obtain JWT Token from AWS Cognito.")
+            return cognito_client.initiate_auth(
+                AuthFlow='USER_PASSWORD_AUTH',
+                AuthParameters=auth_data,
+                ClientId=self._cognito_client_id)
+
+        except cognito_client.exceptions.NotAuthorizedException:
+            raise UnauthorizedException()
@@ -4,17 +4,18 @@ import argparse
 import io
 import logging
 from collections import namedtuple
-from typing import Any, Dict, List
+from typing import List, Optional
 
 from devtools import debug
 from dotenv import load_dotenv
+from pydantic import BaseModel
 from werk24.cli import utils
 from werk24.exceptions import RequestTooLargeException
 from werk24.models.ask import (W24AskCanvasThumbnail, W24AskPageThumbnail,
                                W24AskSectionalThumbnail, W24AskSheetThumbnail,
                                W24AskVariantAngles, W24AskVariantCAD,
-                               W24AskVariantGDTs, W24AskVariantLeaders,
-                               W24AskVariantMeasures)
+                               W24AskVariantCADResponse, W24AskVariantGDTs,
+                               W24AskVariantLeaders, W24AskVariantMeasures)
 from werk24.models.techread import (W24TechreadMessageSubtypeError,
                                     W24TechreadMessageSubtypeProgress,
                                     W24TechreadMessageType)
@@ -56,40 +57,42 @@ hook_config = [
     HookConfig(
         'ask_variant_angles',
         W24AskVariantAngles,
-        lambda m: _print_payload("Ask Variant Angles", m.payload_dict)),
+        lambda m: _print_payload("Ask Variant Angles", m.payload)),
     HookConfig(
         'ask_variant_gdts',
         W24AskVariantGDTs,
-        lambda m: _print_payload("Ask Variant GDTs", m.payload_dict)),
+        lambda m: _print_payload("Ask Variant GDTs", m.payload)),
     HookConfig(
         'ask_variant_leaders',
         W24AskVariantLeaders,
-        lambda m: _print_payload("Ask Variant Leaders", m.payload_dict)),
+        lambda m: _print_payload("Ask Variant Leaders", m.payload)),
     HookConfig(
         'ask_variant_measures',
         W24AskVariantMeasures,
-        lambda m: _print_payload("Ask Variant Measures", m.payload_dict)),
+        lambda m: _print_payload("Ask Variant Measures", m.payload)),
     HookConfig(
         'ask_variant_cad',
         W24AskVariantCAD,
-        lambda m: _store_variant_cad(m.payload_dict, m.payload_bytes)),
+        lambda m: _store_variant_cad(m.payload, m.payload_bytes)),
 ]
 
 
 def _store_variant_cad(
-    payload_dict: Dict[str, Any],
+    payload: Optional[BaseModel],
     payload_bytes: bytes
 ) -> None:
     """ Store the CAD file the current directory
 
     Args:
-        payload_dict (Dict[str, Any]): Payload Dictionary
+        payload (Optional[BaseModel]): Typed payload
         payload_bytes (bytes): CAD that we received as response
     """
-    logger.info(f"Ask Variant CAD\n{payload_dict}")
+    logger.info(f"Ask Variant CAD\n{payload}")
+    if not isinstance(payload, W24AskVariantCADResponse):
+        return
 
     # make the filename
-    variant_id = payload_dict.get('variant_id')
+    variant_id = payload.variant_id
     filename = f"./w24_ask_variant_cad_{variant_id}.dxf"
 
     # and write the content
@@ -119,17 +122,17 @@ def _get_drawing(
 
 def _print_payload(
     log_text: str,
-    payload_dict: Dict[str, Any]
+    payload: Optional[BaseModel]
 ) -> None:
-    """ Display the payload dictionary in a format that
+    """ Display the typed payload in a format that
     is easy for humans to read
 
     Args:
         log_text (str): Headline info
-        payload_dict (Dict[str, Any]): Payload dictionary
+        payload (Optional[BaseModel]): Typed payload
     """
     print(log_text)
-    debug(payload_dict)
+    debug(payload)
 
 
 def _show_image(
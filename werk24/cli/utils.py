@@ -1,5 +1,6 @@
 import sys
 from werk24.techread_client import LicenseError, W24TechreadClient
+from werk24.token_cache import W24TokenCache
 
 def make_client() -> W24TechreadClient:
     """ Make the client. 
@@ -10,12 +11,15 @@ def make_client() -> W24TechreadClient:
     provide you with separate .env files for
     the development and production environments
 
+    The token is cached on disk, so that subsequent
+    calls do not need to log in again.
+
     Returns:
         W24TechreadClient: Client instance
     """
     
     try:
-        return W24TechreadClient.make_from_env()
+        return W24TechreadClient.make_from_env(token_cache=W24TokenCache())
 
     # If a license error occured, let the user know.
     # NOTE: This will not catch deactivated users.
@@ -1,5 +1,6 @@
 """ Module for all exceptions
 """
+from typing import List
 
 
 class TechreadException(Exception):
@@ -54,6 +55,18 @@ class UnsupportedMediaType(TechreadException):
     """
 
 
+class HookExecutionError(TechreadException):
+    """ Raised when hooks that were executed concurrently
+    failed. The exceptions of the individual hooks are
+    available in the errors attribute.
+    """
+
+    def __init__(self, errors: List[Exception]) -> None:
+        super().__init__(
+            f"{len(errors)} hook(s) failed. First error: {errors[0]!r}")
+        self.errors = errors
+
+
 class LicenseError(Exception):
     """ Error raised when the license information is
     incorrect
@@ -1,5 +1,6 @@
 import io
 import os
+from functools import lru_cache
 from typing import List, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
@@ -13,7 +14,16 @@ path_font = os.path.join(
     "assets",
     "fonts",
     "STIX2Text-Regular.otf")
-font = ImageFont.truetype(path_font, 30)
+
+
+@lru_cache(maxsize=None)
+def _get_font() -> ImageFont.FreeTypeFont:
+    """ Load the font on first use rather than on import
+
+    Returns:
+        ImageFont.FreeTypeFont: Font for the labels
+    """
+    return ImageFont.truetype(path_font, 30)
 
 
 def _load_image(image_bytes: bytes) -> Tuple[Image.Image, ImageDraw.ImageDraw]:
@@ -75,7 +85,7 @@ def illustrate_sectional_gdts(
             [x_center, y_center],
             blurb,
             fill=(0, 200, 0),
-            font=font)
+            font=_get_font())
 
     return img.tobytes("jpeg", "RGB")
 
@@ -113,6 +123,6 @@ def illustrate_sectional_measures(
             [x_center, y_center],
             cur_measure.label.blurb,
             fill=(0, 200, 0),
-            font=font)
+            font=_get_font())
 
     return img.tobytes("jpeg", "RGB")
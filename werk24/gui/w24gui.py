@@ -13,9 +13,9 @@ from werk24.gui.style import ft_headline
 from werk24.gui.worker import W24GuiWorker, W24GuiWorkerSignals
 from werk24.models.ask import (W24AskCanvasThumbnail, W24AskPageThumbnail,
                                W24AskSectionalThumbnail, W24AskSheetThumbnail,
-                               W24AskVariantGDTs, W24AskVariantMeasures)
-from werk24.models.measure import W24Measure
-from werk24.models.gdt import W24GDT
+                               W24AskVariantGDTs, W24AskVariantGDTsResponse,
+                               W24AskVariantMeasures,
+                               W24AskVariantMeasuresResponse)
 from werk24.gui.gdt_table import W24GuiGdtTable
 from werk24.models.techread import (W24TechreadMessage,
                                     W24TechreadMessageSubtypeError,
@@ -585,22 +585,16 @@ class W24Gui(QMainWindow):
         self.api_feed.add_headline("Variant Measures")
         self.api_feed.add_json(message.json())
 
-        # check whether we have an stored version of the sectional
-        if message.payload_dict is None:
+        # check whether we have a typed payload
+        payload = message.payload
+        if not isinstance(payload, W24AskVariantMeasuresResponse):
             return
 
-        sectional_id = message.payload_dict.get('sectional_id')
-        if sectional_id is None:
+        # stop the execution if the payload has no measures
+        measure_list = payload.measures
+        if not measure_list:
             return
-
-        # now get the measure list from the payload and stop
-        # the execution if the payload is None
-        measure_list_raw = message.payload_dict.get('measures')
-        if measure_list_raw is None or not measure_list_raw:
-            return
-
-        # if we have a payload, translate it into usable objects
-        measure_list = [W24Measure.parse_obj(m) for m in measure_list_raw]
+        sectional_id = str(payload.sectional_id)
 
         # if we really have sectional_bytes and measures, illustrate
         # the results
@@ -628,22 +622,17 @@ class W24Gui(QMainWindow):
         self.api_feed.add_headline("Variant GD&Ts")
         self.api_feed.add_json(message.json())
 
-        # check whether we have an stored version of the sectional
-        if message.payload_dict is None:
-            return
-
-        sectional_id = message.payload_dict.get('sectional_id')
-        if sectional_id is None:
+        # check whether we have a typed payload
+        payload = message.payload
+        if not isinstance(payload, W24AskVariantGDTsResponse):
             return
 
-        # now get the measure list from the payload and stop
-        # the execution if the payload is None
-        gdt_list_raw = message.payload_dict.get('gdts')
-        if gdt_list_raw is None or not gdt_list_raw:
+        # stop the execution if the payload has no gdts
+        gdt_list = payload.gdts
+        if not gdt_list:
             return
+        sectional_id = str(payload.sectional_id)
 
-        # if we have a payload, translate it into usable objects
-        gdt_list = [W24GDT.parse_obj(m) for m in gdt_list_raw]
         sectional_bytes = self.sectional_thumbnails.get(sectional_id)
         if sectional_bytes is not None:
             sectional_bytes_w_measures = event_illustrator.\
@@ -1,7 +1,7 @@
 """ Defintion of all W24Ask types that are understood by the Werk24 API.
 """
 from enum import Enum
-from typing import List, Optional, Union
+from typing import Dict, List, Optional, Type, Union
 
 from pydantic import UUID4, BaseModel
 
@@ -293,3 +293,16 @@ W24AskUnion = Union[
     W24AskVariantCAD,
 ]
 """ Union of all W24Asks to ensure proper deserialization """
+
+ASK_RESPONSE_TYPES: Dict[W24AskType, Type[BaseModel]] = {
+    W24AskType.VARIANT_ANGLES: W24AskVariantAnglesResponse,
+    W24AskType.VARIANT_CAD: W24AskVariantCADResponse,
+    W24AskType.VARIANT_GDTS: W24AskVariantGDTsResponse,
+    W24AskType.VARIANT_LEADERS: W24AskVariantLeadersResponse,
+    W24AskType.VARIANT_MEASURES: W24AskVariantMeasuresResponse,
+}
+""" Registry of the models into which the payload_dict of the
+ASK messages is parsed (see W24TechreadMessage.payload). Asks
+that only respond with payload_bytes (e.g., the thumbnails) are
+not listed.
+"""
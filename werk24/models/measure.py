@@ -6,7 +6,7 @@ Author: Jochen Mattes - Werk24
 """
 from typing import List, Optional, Tuple
 
-from pydantic import BaseModel, UUID4
+from pydantic import BaseModel, Field, UUID4
 
 from .measure_warning import W24MeasureWarning
 from .thread import W24Thread
@@ -49,7 +49,8 @@ class W24MeasureLabel(BaseModel):
     """ Length unit of the size
     """
 
-    size_tolerance: W24SizeTolerance = W24SizeToleranceGeneral()
+    size_tolerance: W24SizeTolerance = Field(
+        default_factory=W24SizeToleranceGeneral)
     """ Tolerance details.
     Default: General tolerances
 
@@ -2,12 +2,13 @@
 the W24 Techread API.
 """
 from enum import Enum
+from pathlib import Path
 from typing import Dict, List, Optional, Union
 
-from pydantic import UUID4, BaseModel, Field, HttpUrl, Json
+from pydantic import UUID4, BaseModel, Field, HttpUrl, Json, PrivateAttr
 from werk24._version import __version__
 
-from .ask import W24AskType, W24AskUnion
+from .ask import ASK_RESPONSE_TYPES, W24AskType, W24AskUnion
 
 
 class W24TechreadAction(str, Enum):
@@ -112,6 +113,11 @@ class W24TechreadExceptionType(str, Enum):
     """ The Model fiel size exceeded the limit
     """
 
+    TIMEOUT = "TIMEOUT"
+    """ The ask was not answered within the timeout that you
+    passed to read_drawing(). This exception is raised by the client.
+    """
+
 
 class W24TechreadExceptionLevel(str, Enum):
     """ Severity level for the Error
@@ -176,10 +182,60 @@ class W24TechreadMessage(BaseModel):
     payload_url.
     """
 
+    payload_path: Optional[Path] = None
+    """ Path of the file that contains the payload. This is
+    set instead of the payload_bytes when you ask the client
+    to stream the payloads to disk (see payload_dir).
+    """
+
     exceptions: List[W24TechreadException] = []
     """ List of errors that occured during the processing
     """
 
+    page_index: Optional[int] = None
+    """ Index of the page that the message refers to. This is
+    set by the client when you submit a multi-page drawing
+    with read_drawing_pages(); None otherwise.
+    """
+
+    _payload: Optional[BaseModel] = PrivateAttr(None)
+    _payload_source: Optional[Dict] = PrivateAttr(None)
+
+    @property
+    def payload(self) -> Optional[BaseModel]:
+        """ Typed payload of ASK messages (e.g.,
+        W24AskVariantMeasuresResponse).
+
+        The payload_dict is parsed into the model registered in
+        ASK_RESPONSE_TYPES when the property is accessed for the
+        first time. Later accesses (e.g., from other hooks that
+        receive the same message) return the same object.
+
+        Raises:
+            ValidationError -- Raised when the payload_dict does not
+                match the response model
+
+        Returns:
+            Optional[BaseModel] -- Typed payload; None if the message
+                is not an ASK, carries no payload_dict or the Ask has
+                no response model
+        """
+        if self.message_type != W24TechreadMessageType.ASK \
+                or self.payload_dict is None:
+            return None
+
+        # memoize per payload_dict, so that a copy with an updated
+        # payload_dict is not served the payload of the original
+        if self._payload_source is not self.payload_dict:
+            response_type = ASK_RESPONSE_TYPES.get(
+                self.message_subtype)  # type: ignore
+            if response_type is None:
+                return None
+            self._payload = response_type.parse_obj(self.payload_dict)
+            self._payload_source = self.payload_dict
+
+        return self._payload
+
 
 class W24TechreadRequest(BaseModel):
     """ Definition of a W24DrawingReadRequest containing
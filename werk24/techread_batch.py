@@ -0,0 +1,192 @@
+""" Batch-processing part of the Werk24 client
+
+DESCRIPTION
+    The module contains the engine that reads a whole batch of
+    drawings with a bounded number of concurrent requests.
+    Sources are only pulled from the input iterable when a slot
+    becomes available, and the results are yielded as they
+    arrive. A slow consumer blocks the requests (backpressure)
+    instead of accumulating the messages in memory.
+
+    When the request of a source fails, the exception is yielded
+    in place of a message and the remaining sources are read as
+    usual.
+
+EXAMPLE
+    async with W24TechreadClientPool.make_from_env(pool_size=8) as pool:
+        async for source_id, message in pool.read_drawings(paths, asks):
+            if isinstance(message, Exception):
+                print(source_id, "failed", message)
+            else:
+                print(source_id, message)
+"""
+import asyncio
+from typing import (Any, AsyncIterable, AsyncIterator, Callable, Iterable,
+                    List, Optional, Tuple, Union)
+
+from werk24.models.ask import W24Ask
+from werk24.models.techread import W24TechreadMessage
+from werk24.techread_source import W24DrawingSource
+
+W24BatchSource = Union[
+    W24DrawingSource,
+    Tuple[W24DrawingSource, Optional[W24DrawingSource]]]
+""" Item of a batch. Either a drawing or a (drawing, model) pair """
+
+W24BatchResult = Tuple[int, Union[W24TechreadMessage, Exception]]
+""" Result of a batch: (index of the source in the batch, message);
+the message is replaced by the exception if the request failed """
+
+_DONE = object()
+""" Sentinel that a worker puts into the result queue when it
+has run out of sources """
+
+
+async def read_drawings(
+    read_drawing: Callable[..., AsyncIterator[W24TechreadMessage]],
+    sources: Union[Iterable[W24BatchSource], AsyncIterable[W24BatchSource]],
+    asks: List[W24Ask],
+    max_concurrency: int
+) -> AsyncIterator[W24BatchResult]:
+    """ Read all the drawings in sources with at most
+    max_concurrency requests in flight.
+
+    Arguments:
+        read_drawing {Callable} -- Method that reads a single drawing;
+            e.g., W24TechreadClient.read_drawing
+
+        sources {Union[Iterable, AsyncIterable]} -- drawings to be read.
+            Each item can be any W24DrawingSource (e.g., bytes or a path)
+            or a (drawing, model) pair.
+
+        asks {List[W24Ask]} -- List of Asks that are requested for
+            every drawing
+
+        max_concurrency {int} -- Maximal number of requests in flight
+
+    Raises:
+        ValueError: Raised when max_concurrency is smaller than 1
+
+    Yields:
+        W24BatchResult -- (source_id, message) tuples where the
+            source_id is the index of the source in the batch. If
+            the request of a source fails, the exception is yielded
+            as its last message.
+    """
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency needs to be at least 1")
+
+    # The queue is bounded, so that the workers stop reading
+    # from the socket when the consumer is slower than the API
+    results: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max_concurrency)
+    iterator = _enumerate(sources)
+    iterator_lock = asyncio.Lock()
+
+    async def read_source(source_id: int, source: W24BatchSource) -> None:
+
+        # files are only opened by read_drawing, so we
+        # never hold the whole batch in memory
+        drawing, model = _split_source(source)
+
+        request = read_drawing(drawing, asks, model)
+        try:
+            async for message in request:
+                await results.put((source_id, message))
+
+        # CancelledError derives from Exception before Python 3.8
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        # a failing source must not abort the rest of the batch
+        except Exception as exception:  # pylint: disable=broad-except
+            await results.put((source_id, exception))
+
+        finally:
+            await request.aclose()
+
+    async def worker() -> None:
+        try:
+            while True:
+
+                # obtain the next source. The lock ensures that
+                # the async iterator is only advanced by one
+                # worker at a time
+                async with iterator_lock:
+                    try:
+                        source_id, source = await iterator.__anext__()
+                    except StopAsyncIteration:
+                        break
+
+                await read_source(source_id, source)
+
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        # hand the exception of the sources iterable over to the consumer
+        except Exception as exception:  # pylint: disable=broad-except
+            await results.put(exception)
+            return
+
+        await results.put(_DONE)
+
+    workers = [
+        asyncio.ensure_future(worker())
+        for _ in range(max_concurrency)]
+
+    try:
+        num_done = 0
+        while num_done < len(workers):
+            result = await results.get()
+            if result is _DONE:
+                num_done += 1
+            elif isinstance(result, Exception):
+                raise result
+            else:
+                yield result
+
+    # stop the remaining requests if the consumer left
+    # early or the sources iterable failed
+    finally:
+        for cur_worker in workers:
+            cur_worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await iterator.aclose()
+
+
+async def _enumerate(
+    sources: Union[Iterable[W24BatchSource], AsyncIterable[W24BatchSource]]
+) -> AsyncIterator[Tuple[int, W24BatchSource]]:
+    """ Enumerate the items of a sync or async iterable
+
+    Arguments:
+        sources {Union[Iterable, AsyncIterable]} -- sources
+
+    Yields:
+        Tuple[int, W24BatchSource] -- index and source
+    """
+    source_id = 0
+    if hasattr(sources, "__aiter__"):
+        async for source in sources:  # type: ignore
+            yield source_id, source
+            source_id += 1
+    else:
+        for source in sources:  # type: ignore
+            yield source_id, source
+            source_id += 1
+
+
+def _split_source(
+    source: W24BatchSource
+) -> Tuple[W24DrawingSource, Optional[W24DrawingSource]]:
+    """ Split the batch item into drawing and model
+
+    Arguments:
+        source {W24BatchSource} -- Item of the batch
+
+    Returns:
+        Tuple[W24DrawingSource, Optional[W24DrawingSource]] -- drawing
+            and model
+    """
+    if isinstance(source, tuple):
+        return source
+    return source, None
@@ -0,0 +1,494 @@
+""" Result-cache part of the Werk24 client
+
+DESCRIPTION
+    The module contains a content-addressed cache for the results
+    of read_drawing(). The key is the SHA-256 hash of the drawing,
+    the model and the canonical JSON of the asks. On a hit, the
+    client replays the stored messages (including their payloads)
+    without touching the network.
+
+    The entries are stored in a pluggable backend:
+    * W24MemoryCacheBackend -- in-process LRU
+    * W24SQLiteCacheBackend -- single SQLite file
+    * W24DirectoryCacheBackend -- one file per entry
+    All backends support a size limit and a time to live.
+
+EXAMPLE
+    cache = W24ResultCache(W24SQLiteCacheBackend("results.sqlite"))
+    client = W24TechreadClient.make_from_env(result_cache=cache)
+"""
+import abc
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from werk24.models.ask import W24Ask
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType,
+                                    W24TechreadRequest)
+from werk24.techread_source import W24DrawingSource, hash_source
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024  # 256 MB
+""" Default maximal size of all cache entries in bytes """
+
+
+class W24CacheBackend(abc.ABC):
+    """ Base class of the storage backends. Backends store
+    opaque byte strings and are responsible for the eviction.
+    """
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """ Get the entry from the backend
+
+        Arguments:
+            key {str} -- Key of the entry
+
+        Returns:
+            Optional[bytes] -- The entry; None if it does not exist
+                or has expired
+        """
+
+    @abc.abstractmethod
+    def put(self, key: str, value: bytes) -> None:
+        """ Store the entry and evict old entries if the
+        size limit is exceeded
+
+        Arguments:
+            key {str} -- Key of the entry
+            value {bytes} -- Entry
+        """
+
+    @abc.abstractmethod
+    def delete(self, key: str) -> None:
+        """ Remove the entry from the backend
+
+        Arguments:
+            key {str} -- Key of the entry
+        """
+
+
+class W24MemoryCacheBackend(W24CacheBackend):
+    """ In-process LRU cache
+    """
+
+    def __init__(
+            self,
+            max_size: int = DEFAULT_MAX_SIZE,
+            ttl: Optional[float] = None):
+        """ Initialize a new W24MemoryCacheBackend
+
+        Keyword Arguments:
+            max_size {int} -- Maximal size of all entries in bytes
+                (default: {DEFAULT_MAX_SIZE})
+
+            ttl {Optional[float]} -- Number of seconds after which an
+                entry expires; None for no expiry (default: {None})
+        """
+        self._max_size = max_size
+        self._ttl = ttl
+        self._size = 0
+
+        # key -> (created_at, value), ordered from the least
+        # to the most recently used entry
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        created_at, value = entry
+        if _is_expired(created_at, self._ttl):
+            self.delete(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: bytes) -> None:
+        self.delete(key)
+        self._entries[key] = (time.time(), value)
+        self._size += len(value)
+
+        # evict the least recently used entries
+        while self._size > self._max_size and self._entries:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._size -= len(evicted)
+
+    def delete(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+
+class W24SQLiteCacheBackend(W24CacheBackend):
+    """ Cache that stores all entries in a single SQLite file.
+    The file can be shared between processes.
+    """
+
+    def __init__(
+            self,
+            path: "os.PathLike[str]",
+            max_size: int = DEFAULT_MAX_SIZE,
+            ttl: Optional[float] = None):
+        """ Initialize a new W24SQLiteCacheBackend
+
+        Arguments:
+            path {os.PathLike} -- Path of the SQLite file
+
+        Keyword Arguments:
+            max_size {int} -- Maximal size of all entries in bytes
+                (default: {DEFAULT_MAX_SIZE})
+
+            ttl {Optional[float]} -- Number of seconds after which an
+                entry expires; None for no expiry (default: {None})
+        """
+        import sqlite3  # pylint: disable=import-outside-toplevel
+
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.fspath(path),
+            check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "accessed_at REAL NOT NULL)")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT value, created_at FROM results WHERE key = ?",
+                (key,)).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if _is_expired(created_at, self._ttl):
+                self._connection.execute(
+                    "DELETE FROM results WHERE key = ?", (key,))
+                return None
+
+            self._connection.execute(
+                "UPDATE results SET accessed_at = ? WHERE key = ?",
+                (time.time(), key))
+            return bytes(value)
+
+    def put(self, key: str, value: bytes) -> None:
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now))
+
+            # remove the expired entries
+            if self._ttl is not None:
+                self._connection.execute(
+                    "DELETE FROM results WHERE created_at < ?",
+                    (now - self._ttl,))
+
+            # evict the least recently used entries
+            total_size = self._connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+            rows = self._connection.execute(
+                "SELECT key, size FROM results ORDER BY accessed_at"
+            ).fetchall()
+            evicted = []
+            for cur_key, cur_size in rows:
+                if total_size <= self._max_size:
+                    break
+                evicted.append((cur_key,))
+                total_size -= cur_size
+            self._connection.executemany(
+                "DELETE FROM results WHERE key = ?", evicted)
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute(
+                "DELETE FROM results WHERE key = ?", (key,))
+
+    def close(self) -> None:
+        """ Close the connection to the SQLite file
+        """
+        self._connection.close()
+
+
+class W24DirectoryCacheBackend(W24CacheBackend):
+    """ Cache that stores every entry in its own file. The
+    modification time of the file serves as creation time,
+    so the oldest entries are evicted first.
+    """
+
+    def __init__(
+            self,
+            path: "os.PathLike[str]",
+            max_size: int = DEFAULT_MAX_SIZE,
+            ttl: Optional[float] = None):
+        """ Initialize a new W24DirectoryCacheBackend
+
+        Arguments:
+            path {os.PathLike} -- Directory of the entries
+
+        Keyword Arguments:
+            max_size {int} -- Maximal size of all entries in bytes
+                (default: {DEFAULT_MAX_SIZE})
+
+            ttl {Optional[float]} -- Number of seconds after which an
+                entry expires; None for no expiry (default: {None})
+        """
+        self._path = Path(path)
+        self._max_size = max_size
+        self._ttl = ttl
+        self._path.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._get_path(key)
+        try:
+            if _is_expired(path.stat().st_mtime, self._ttl):
+                self.delete(key)
+                return None
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, value: bytes) -> None:
+
+        # write to a temporary file first and replace the entry
+        # atomically, so that readers never see a partial file
+        path = self._get_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_bytes(value)
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """ Remove the expired entries and the oldest entries
+        until the size limit is met
+        """
+        entries = []
+        for cur_path in self._path.glob("*.w24cache"):
+            try:
+                stat = cur_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, cur_path))
+
+        entries.sort()
+        total_size = sum(size for _, size, _ in entries)
+        for created_at, size, cur_path in entries:
+            if total_size <= self._max_size \
+                    and not _is_expired(created_at, self._ttl):
+                continue
+            try:
+                os.remove(cur_path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def _get_path(self, key: str) -> Path:
+        """ Get the path of the entry
+
+        Arguments:
+            key {str} -- Key of the entry
+
+        Returns:
+            Path -- Path of the entry
+        """
+        return self._path / f"{key}.w24cache"
+
+
+class W24ResultCache:
+    """ Content-addressed cache of the messages returned
+    by read_drawing()
+    """
+
+    def __init__(self, backend: Optional[W24CacheBackend] = None):
+        """ Initialize a new W24ResultCache
+
+        Keyword Arguments:
+            backend {Optional[W24CacheBackend]} -- Storage backend.
+                Defaults to a W24MemoryCacheBackend
+        """
+        self._backend = backend if backend is not None \
+            else W24MemoryCacheBackend()
+
+    @staticmethod
+    def make_key(
+        drawing: W24DrawingSource,
+        model: Optional[W24DrawingSource],
+        asks: List[W24Ask],
+        development_key: Optional[str] = None
+    ) -> Optional[str]:
+        """ Make the content-addressed key of the request
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            model {Optional[W24DrawingSource]} -- 3d model
+            asks {List[W24Ask]} -- List of Asks that are requested
+
+        Keyword Arguments:
+            development_key {Optional[str]} -- development key of the
+                client. Requests to other architectures are cached
+                separately (default: {None})
+
+        Returns:
+            Optional[str] -- The key; None if the drawing or model
+                cannot be hashed without consuming them (e.g., async
+                iterables)
+        """
+        drawing_hash = hash_source(drawing)
+        model_hash = hash_source(model)
+        if drawing_hash is None or model_hash is None:
+            return None
+
+        # canonical representation of the asks, so that the
+        # key does not depend on the order of the fields
+        request = W24TechreadRequest(asks=asks)
+        asks_json = json.dumps(
+            json.loads(request.json(include={"asks"}))["asks"],
+            sort_keys=True,
+            separators=(",", ":"))
+
+        sha256 = hashlib.sha256()
+        for part in [drawing_hash, model_hash, asks_json, development_key]:
+            sha256.update((part or "").encode("UTF-8"))
+            sha256.update(b"\0")
+        return sha256.hexdigest()
+
+    def get(self, key: str) -> Optional[List[W24TechreadMessage]]:
+        """ Get the messages of the request
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+
+        Returns:
+            Optional[List[W24TechreadMessage]] -- The messages; None
+                on a cache miss
+        """
+        value = self._backend.get(key)
+        if value is None:
+            return None
+
+        try:
+            return [_decode_message(entry) for entry in json.loads(value)]
+
+        # entries of older client versions might no longer be
+        # readable. Treat them as a miss
+        except (ValueError, KeyError, TypeError):
+            self._backend.delete(key)
+            return None
+
+    def put(self, key: str, messages: List[W24TechreadMessage]) -> None:
+        """ Store the messages of a completed request. Requests
+        that cannot be replayed faithfully are not stored (see
+        is_cacheable())
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+            messages {List[W24TechreadMessage]} -- All messages
+                of the request
+        """
+        if not self.is_cacheable(messages):
+            return
+
+        value = json.dumps([_encode_message(m) for m in messages])
+        self._backend.put(key, value.encode("UTF-8"))
+
+    @staticmethod
+    def is_cacheable(messages: List[W24TechreadMessage]) -> bool:
+        """ Check whether the messages can be replayed. We do not
+        store requests that were rejected or failed, as the reason
+        might be temporary, nor requests whose payloads were not
+        downloaded into memory. Requests without COMPLETED message
+        are not stored either, as the connection might have been
+        closed before all asks were answered.
+
+        Arguments:
+            messages {List[W24TechreadMessage]} -- All messages
+                of the request
+
+        Returns:
+            bool -- True if the messages can be stored
+        """
+        for message in messages:
+            if message.exceptions \
+                    or message.message_type in {
+                        W24TechreadMessageType.ERROR,
+                        W24TechreadMessageType.REJECTION}:
+                return False
+
+            if message.payload_url is not None \
+                    and message.payload_bytes is None:
+                return False
+
+        return any(
+            message.message_type == W24TechreadMessageType.PROGRESS
+            and message.message_subtype
+            == W24TechreadMessageSubtypeProgress.COMPLETED
+            for message in messages)
+
+
+def _is_expired(created_at: float, ttl: Optional[float]) -> bool:
+    """ Check whether an entry has expired
+
+    Arguments:
+        created_at {float} -- Creation time of the entry
+        ttl {Optional[float]} -- Time to live in seconds
+
+    Returns:
+        bool -- True if the entry has expired
+    """
+    return ttl is not None and created_at + ttl < time.time()
+
+
+def _encode_message(message: W24TechreadMessage) -> Dict:
+    """ Turn the message into a JSON-serializable dict. The
+    payload is base64-encoded.
+
+    Arguments:
+        message {W24TechreadMessage} -- Message
+
+    Returns:
+        Dict -- Serializable representation
+    """
+    payload_bytes = message.payload_bytes
+    return {
+        "message": json.loads(message.json(
+            exclude={"payload_bytes", "payload_path"})),
+        "payload_bytes": base64.b64encode(payload_bytes).decode()
+        if payload_bytes is not None else None}
+
+
+def _decode_message(entry: Dict) -> W24TechreadMessage:
+    """ Inverse of _encode_message()
+
+    Arguments:
+        entry {Dict} -- Serializable representation
+
+    Returns:
+        W24TechreadMessage -- Message
+    """
+    message = W24TechreadMessage.parse_obj(entry["message"])
+    if entry["payload_bytes"] is not None:
+        message.payload_bytes = base64.b64decode(entry["payload_bytes"])
+    return message
@@ -20,29 +20,53 @@ EXAMPLE
         ]))
 """
 import asyncio
+import functools
+import io
 import logging
 import os
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from types import TracebackType
-from typing import AsyncIterator, Callable, Dict, List, Optional, Type
-
-import dotenv
-from pydantic import BaseModel
+from typing import (Any, AsyncIterable, AsyncIterator, Callable, Collection,
+                    Dict, Iterable, List, Optional, Set, Type, Union)
 
+from werk24 import techread_batch, techread_split
 from werk24.auth_client import AuthClient
 from werk24.exceptions import (BadRequestException, LicenseError,
-                               RequestTooLargeException, ServerException,
-                               UnsupportedMediaType)
-from werk24.models.ask import W24Ask
+                               RequestTooLargeException)
+from werk24.models.ask import W24Ask, W24AskType
 from werk24.models.techread import (W24TechreadAction, W24TechreadException,
                                     W24TechreadExceptionLevel,
                                     W24TechreadExceptionType,
                                     W24TechreadInitResponse,
                                     W24TechreadMessage,
-                                    W24TechreadMessageSubtype,
                                     W24TechreadMessageType, W24TechreadRequest)
-from werk24.techread_client_https import TechreadClientHttps
-from werk24.techread_client_wss import TechreadClientWss
+from werk24.techread_batch import W24BatchResult, W24BatchSource
+from werk24.techread_cache import W24ResultCache
+from werk24.techread_client_https import (DEFAULT_CONNECTOR_LIMIT,
+                                          DEFAULT_CONNECTOR_LIMIT_PER_HOST,
+                                          DEFAULT_DNS_CACHE_TTL,
+                                          DEFAULT_KEEPALIVE_TIMEOUT,
+                                          TechreadClientHttps)
+from werk24.techread_client_wss import (DEFAULT_IDLE_TIMEOUT,
+                                        DEFAULT_MAX_CONNECT_ATTEMPTS,
+                                        DEFAULT_PING_INTERVAL,
+                                        DEFAULT_PING_TIMEOUT,
+                                        DEFAULT_RECEIVE_HIGH_WATERMARK,
+                                        DEFAULT_RECEIVE_LOW_WATERMARK,
+                                        TechreadClientWss,
+                                        W24ReceiveQueueMetrics)
+from werk24.techread_deadline import (AskTimeout, apply_deadlines,
+                                      get_ask_deadlines, get_deadline)
+from werk24.techread_dedupe import InflightRequests
+from werk24.techread_hooks import Hook, HookIndex, HookRunner, call_hook
+from werk24.techread_normalize import W24NormalizeConfig, normalize_drawing
+from werk24.techread_preflight import (DEFAULT_PREFLIGHT_CONFIG,
+                                       W24PreflightConfig, preflight_check)
+from werk24.techread_source import (W24DrawingSource, check_source,
+                                    peek_source)
+from werk24.token_cache import W24TokenCache
 
 # make the logger
 logger = logging.getLogger(  # pylint: disable=invalid-name
@@ -80,20 +104,13 @@ DEFAULT_SERVER_HTTPS = "techread.w24.io"
 DEFAULT_SERVER_WSS = "techread-ws.w24.io"
 DEFAULT_VERSION = "v1"
 
+DEFAULT_MAX_CONCURRENT_DOWNLOADS = 4
+""" Default number of payloads that are downloaded in parallel
+while the client keeps listening on the websocket """
 
-class Hook(BaseModel):
-    """ Small Object to keep the callback requests.
-    You can either register a callback request to an
-    ask or a message_type.
-
-    If you register an ask, be sure to use a complete W24Ask
-    definition; not just the ask type.
-    """
-
-    message_type: Optional[W24TechreadMessageType]
-    message_subtype: Optional[W24TechreadMessageSubtype]
-    ask: Optional[W24Ask]
-    function: Callable
+DEFAULT_MAX_INFLIGHT_REQUESTS = 1
+""" Default number of requests that share the websocket. The
+server currently closes the connection after each request """
 
 
 class W24TechreadClient:
@@ -107,7 +124,25 @@ class W24TechreadClient:
             techread_server_https: str,
             techread_server_wss: str,
             techread_version: str,
-            development_key: str = None):
+            development_key: str = None,
+            connector_limit: int = DEFAULT_CONNECTOR_LIMIT,
+            connector_limit_per_host: int = DEFAULT_CONNECTOR_LIMIT_PER_HOST,
+            dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+            keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+            token_cache: Optional[W24TokenCache] = None,
+            result_cache: Optional[W24ResultCache] = None,
+            deduplicate_requests: bool = False,
+            preflight: Optional[W24PreflightConfig] = DEFAULT_PREFLIGHT_CONFIG,
+            normalize: Optional[W24NormalizeConfig] = None,
+            ping_interval: Optional[float] = DEFAULT_PING_INTERVAL,
+            ping_timeout: Optional[float] = DEFAULT_PING_TIMEOUT,
+            idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+            max_connect_attempts: int = DEFAULT_MAX_CONNECT_ATTEMPTS,
+            persistent_connection: bool = False,
+            max_inflight_requests: int = DEFAULT_MAX_INFLIGHT_REQUESTS,
+            receive_high_watermark: Optional[int] = (
+                DEFAULT_RECEIVE_HIGH_WATERMARK),
+            receive_low_watermark: int = DEFAULT_RECEIVE_LOW_WATERMARK):
         """ Initialize a new W24TechreadClient. If you wonder
         about any of the attributes, have a look at the .env
         file that we provided to you. They contain all the
@@ -128,22 +163,141 @@ class W24TechreadClient:
                 You can try guessing or bruteforcing this key;
                 we'll just charge you for every request you submit and
                 transfer the money to the holiday bonus account.
+
+            connector_limit {int} -- Maximal number of simultaneous
+                HTTPS connections (uploads and downloads). 0 for
+                unlimited.
+
+            connector_limit_per_host {int} -- Maximal number of
+                simultaneous HTTPS connections to the same host.
+                0 for unlimited.
+
+            dns_cache_ttl {int} -- Number of seconds for which
+                DNS lookups are cached
+
+            keepalive_timeout {float} -- Number of seconds for which
+                idle HTTPS connections are kept alive for reuse
+
+            token_cache {Optional[W24TokenCache]} -- On-disk cache that
+                shares the authentication token between processes.
+                None to log in whenever the session is entered.
+
+            result_cache {Optional[W24ResultCache]} -- Cache of the
+                results. If set, read_drawing() replays the messages
+                of previous requests for the same drawing, model and
+                asks without contacting the API.
+
+            deduplicate_requests {bool} -- If True, concurrent calls of
+                read_drawing() for the same drawing, model and asks
+                share one request. Later callers receive the messages
+                of the request that is already in flight.
+
+            preflight {Optional[W24PreflightConfig]} -- Local checks of
+                the size, file format and resolution that run before
+                the drawing is submitted. Rejected drawings yield the
+                same exception messages as the API, without contacting
+                it. None to submit all drawings unchecked.
+
+            normalize {Optional[W24NormalizeConfig]} -- If set, raster
+                drawings that exceed the upload limit are re-encoded
+                and downsampled in a process pool before they are
+                submitted. Requires Pillow.
+
+            ping_interval {Optional[float]} -- Number of seconds between
+                two websocket pings. None to disable the heartbeat.
+
+            ping_timeout {Optional[float]} -- Number of seconds after
+                which the websocket is considered dead if the pong
+                does not arrive
+
+            idle_timeout {Optional[float]} -- Number of seconds after
+                which an unused websocket is replaced before the
+                next request
+
+            max_connect_attempts {int} -- Number of attempts to open the
+                websocket. The attempts are spaced with exponential
+                backoff.
+
+            persistent_connection {bool} -- If True, the next websocket
+                connection is opened in the background as soon as a
+                request ends. Sequential requests (e.g., in a daemon)
+                then do not wait for the handshake.
+
+            max_inflight_requests {int} -- Number of requests that are
+                in flight on the websocket at the same time. The
+                messages are routed to the requests by their
+                request_id. Only increase this if the server keeps the
+                connection open after a request; otherwise use the
+                W24TechreadClientPool.
+
+            receive_high_watermark {Optional[int]} -- Number of received
+                messages that wait for their consumers before the client
+                stops reading from the websocket. None for no limit.
+
+            receive_low_watermark {int} -- Number of waiting messages at
+                which the client resumes reading from the websocket
         """
+        if max_inflight_requests < 1:
+            raise ValueError("max_inflight_requests needs to be at least 1")
 
         # save the development_key
         self._development_key = development_key
 
+        # save the token cache, which we pass to the
+        # authentication service on register()
+        self._token_cache = token_cache
+
+        # save the result cache
+        self._result_cache = result_cache
+
+        # save the configuration of the local checks
+        self._preflight = preflight
+
+        # save the configuration of the normalization
+        self._normalize = normalize
+
+        # process pool for the CPU-bound work on the drawings (e.g.,
+        # normalizing or splitting). Only started when needed
+        self._process_executor: Optional[ProcessPoolExecutor] = None
+
+        # keep track of the requests in flight if we
+        # deduplicate concurrent requests
+        self._inflight_requests = InflightRequests() \
+            if deduplicate_requests else None
+
         # Create an empty reference to the authentication
         # service (currently AWS Cognito)
         self._auth_client: Optional[AuthClient] = None
 
         # Initialize an instance of the HTTPS client
         self._techread_client_https = TechreadClientHttps(
-            techread_server_https, techread_version)
+            techread_server_https,
+            techread_version,
+            connector_limit=connector_limit,
+            connector_limit_per_host=connector_limit_per_host,
+            dns_cache_ttl=dns_cache_ttl,
+            keepalive_timeout=keepalive_timeout)
 
         # Initialize an instance of the WEBSCOKET client
         self._techread_client_wss = TechreadClientWss(
-            techread_server_wss, techread_version)
+            techread_server_wss,
+            techread_version,
+            ping_interval=ping_interval,
+            ping_timeout=ping_timeout,
+            idle_timeout=idle_timeout,
+            max_connect_attempts=max_connect_attempts,
+            receive_high_watermark=receive_high_watermark,
+            receive_low_watermark=receive_low_watermark)
+        self._persistent_connection = persistent_connection
+
+        # Semaphore that limits the number of requests that are
+        # using the websocket at a time, and lock that ensures that
+        # only one request is being initialized at a time (the READ
+        # command does not carry the request_id). We create them when
+        # entering the session to bind them to the correct event loop
+        self._max_inflight_requests = max_inflight_requests
+        self._request_semaphore: Optional[asyncio.Semaphore] = None
+        self._initialize_lock: Optional[asyncio.Lock] = None
 
     async def __aenter__(
             self
@@ -168,11 +322,28 @@ class W24TechreadClient:
                 "No connection to the authentication service was " +
                 "established. Please call register()")
 
-        # enter the https session
-        await self._techread_client_https.__aenter__()
+        # keep the token fresh for as long as we are in
+        # the session
+        self._auth_client.start_refresh()  # type: ignore
+
+        try:
+            # enter the https session
+            await self._techread_client_https.__aenter__()
+
+            # enter the wss session
+            await self._techread_client_wss.__aenter__()
 
-        # enter the wss session
-        await self._techread_client_wss.__aenter__()
+        # __aexit__ will not be called, so we need to close
+        # the https session and stop the refresh ourselves
+        except BaseException:
+            await self._techread_client_https.__aexit__(None, None, None)
+            await self._auth_client.stop_refresh()  # type: ignore
+            raise
+
+        # allow requests to be submitted
+        self._request_semaphore = asyncio.Semaphore(
+            self._max_inflight_requests)
+        self._initialize_lock = asyncio.Lock()
 
         # return the "entered" version of self
         return self
@@ -195,6 +366,17 @@ class W24TechreadClient:
         await self._techread_client_wss.__aexit__(
             exc_type, exc_value, traceback)
 
+        # stop refreshing the token
+        if self._auth_client is not None:
+            await self._auth_client.stop_refresh()
+
+        # stop the workers of the process pool. Joining them
+        # blocks, so we do that in the default executor
+        if self._process_executor is not None:
+            await asyncio.get_event_loop().run_in_executor(
+                None, self._process_executor.shutdown)
+            self._process_executor = None
+
     def register(
             self,
             cognito_region: str,
@@ -218,17 +400,19 @@ class W24TechreadClient:
             username {str} -- the username with which you want to register
             password {str} -- the password with which you want to register
         """
-        # create an client instance to connect
-        # to the authentication service
-        self._auth_client = AuthClient(
+        # obtain the client instance that connects to the
+        # authentication service. All W24TechreadClients of
+        # the same user share the instance, so that they
+        # share the token and do not log in individually
+        self._auth_client = AuthClient.make_shared(
             cognito_region,
             cognito_identity_pool_id,
             cognito_user_pool_id,
             cognito_client_id,
-            cognito_client_secret)
-
-        # register username and password
-        self._auth_client.register(username, password)
+            cognito_client_secret,
+            username,
+            password,
+            token_cache=self._token_cache)
 
         # tell the techread clients about it
         self._techread_client_https.register_auth_client(self._auth_client)
@@ -246,23 +430,66 @@ class W24TechreadClient:
         except ValueError:
             return None
 
+    @property
+    def is_connected(self) -> bool:
+        """ Check whether both the HTTPS session and the
+        websocket connection are open. The server closes the
+        websocket after each request, so a client that was used
+        for read_drawing() needs to reconnect() before the next
+        request.
+
+        Returns:
+            bool: True if the client can submit a new request
+        """
+        return self._techread_client_https.is_open \
+            and self._techread_client_wss.is_open
+
+    @property
+    def receive_metrics(self) -> W24ReceiveQueueMetrics:
+        """ Metrics of the received messages that wait for their
+        consumers (e.g., your hooks). A growing paused_seconds
+        indicates that the consumers are the bottleneck.
+
+        Returns:
+            W24ReceiveQueueMetrics: Snapshot of the metrics
+        """
+        return self._techread_client_wss.receive_metrics
+
+    async def reconnect(self) -> None:
+        """ Re-establish the websocket connection and, if
+        required, the HTTPS session without logging in again.
+        """
+        await self._techread_client_wss.reconnect()
+        if not self._techread_client_https.is_open:
+            await self._techread_client_https.reconnect()
+
     async def read_drawing(
         self,
-        drawing: bytes,
+        drawing: W24DrawingSource,
         asks: List[W24Ask],
-        model: bytes = None
+        model: Optional[W24DrawingSource] = None,
+        payload_dir: Optional["os.PathLike[str]"] = None,
+        max_concurrent_downloads: int = DEFAULT_MAX_CONCURRENT_DOWNLOADS,
+        preserve_order: bool = True,
+        download_payloads: Union[bool, Collection[W24AskType]] = True,
+        timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
+        ask_timeout: Optional[AskTimeout] = None
     ) -> AsyncIterator[W24TechreadMessage]:
         """ Send a Technical Drawing to the W24 API to have it automatically
         interpreted and read. The API will return
 
         Arguments:
-            drawing {bytes} -- binary representation of a technical drawing.
+            drawing {W24DrawingSource} -- technical drawing as bytes,
+                memoryview, path (os.PathLike), binary file object or
+                async iterable of bytes. Files are streamed into the
+                upload rather than read into memory.
                 Please refer to the API - documentation to learn which mime
                 types are currently supported
 
         Keyword Arguments:
-            model {bytes} -- binary represetation of the 3d model (typically
-                step)
+            model {Optional[W24DrawingSource]} -- 3d model (typically
+                step); same types as the drawing.
                 Please refer to the API - documentation to learn whcih mime
                 types are currently sypported(default: {None})
 
@@ -271,6 +498,47 @@ class W24TechreadClient:
                 from the W24Ask object. Refer to the API documentation for
                 a full list of supported W24AskTypes
 
+            payload_dir {Optional[os.PathLike]} -- If set, the payloads
+                (e.g., thumbnails and CAD files) are streamed into files in
+                this directory and referenced by message.payload_path
+                instead of being held in message.payload_bytes
+                (default: {None})
+
+            max_concurrent_downloads {int} -- Payloads are downloaded
+                in the background as soon as the message arrives. This
+                limits the number of parallel downloads.
+                (default: {DEFAULT_MAX_CONCURRENT_DOWNLOADS})
+
+            preserve_order {bool} -- If True, the messages are yielded
+                in the order in which they arrived. If False, messages
+                are yielded as soon as their payload is available, so
+                that messages without payload are not held back by
+                a large download (default: {True})
+
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                Controls which payloads are downloaded automatically.
+                True downloads all payloads, False none of them. If you
+                pass a collection of W24AskTypes, only the payloads of
+                these asks are downloaded. The remaining messages keep
+                their payload_url and can be downloaded later with
+                fetch_payload() (default: {True})
+
+            timeout {Optional[float]} -- Number of seconds after which
+                the request is cancelled. The asks that were not
+                answered yet receive an exception message of the type
+                TIMEOUT (default: {None})
+
+            deadline {Optional[float]} -- Same as the timeout, but as
+                point in time in terms of time.monotonic(); e.g., to
+                pass on the deadline of your own request
+                (default: {None})
+
+            ask_timeout {Optional[AskTimeout]} -- Number of seconds after
+                which an ask that was not answered receives an exception
+                message of the type TIMEOUT, while the request continues
+                for the other asks. Either one value for all asks or a
+                mapping from the W24AskType (default: {None})
+
         Yields:
             W24TechreadMessage -- Response object obtained from the API
                 that indicates the state of your request. Be sure to pass this
@@ -282,20 +550,23 @@ class W24TechreadClient:
                 limit lies at 6 MB (including overhead).
 
             UnsupportedMediaType -- Exception is raised when the drawing or
-                model is submitted in any data type other than bytes.
+                model is submitted in an unsupported data type (e.g., str).
         """
 
-        # quickly check whether the input type is bytes. If it is string,
+        # the time limits start with the call
+        deadline = get_deadline(timeout, deadline)
+        ask_deadlines = get_ask_deadlines(asks, ask_timeout)
+
+        # quickly check whether the input type is supported. If it is string,
         # the presigned-AWS post interestingly returns a 403 error_code
         # without additional information. We want to inform the caller
         # that they submitted the wrong data type.
         # See Github Issue #13
-        if not isinstance(drawing, bytes):
-            raise UnsupportedMediaType("Drawing bytes requires 'bytes' type")
+        check_source(drawing, "Drawing")
 
-        # the same is true for the model bytes
-        if model is not None and not isinstance(model, bytes):
-            raise UnsupportedMediaType("Model bytes requires 'bytes' type")
+        # the same is true for the model
+        if model is not None:
+            check_source(model, "Model")
 
         # give us some debug information
         logger.info("API method read_drawing() called")
@@ -305,88 +576,706 @@ class W24TechreadClient:
             logger.info("Using development key %s***",
                         self._development_key[:8])
 
+        # make sure that the session was started
+        if self._request_semaphore is None:
+            raise RuntimeError(
+                "You need to enter the session before reading a drawing")
+
+        # shrink oversized drawings rather than having them rejected
+        if self._normalize is not None:
+            drawing = await self._normalize_drawing(drawing, self._normalize)
+
+        # reject the drawing right away if the API would reject it.
+        # This saves us the round trip and the upload
+        if self._preflight is not None:
+            exception_type = preflight_check(drawing, model, self._preflight)
+            if exception_type is not None:
+                logger.info("Drawing rejected by preflight: %s",
+                            exception_type.value)
+                async for message in self._trigger_asks_exception(
+                        asks, exception_type):
+                    yield message
+                return
+
+        # replay the result if we read the same drawing before
+        request_key = await self._make_request_key(
+            drawing, asks, model, payload_dir, download_payloads)
+        if request_key is not None and self._result_cache is not None:
+            cached_messages = self._result_cache.get(request_key)
+            if cached_messages is not None:
+                logger.info("Replaying the cached result")
+                for message in cached_messages:
+                    yield message
+                return
+
+        def make_request() -> AsyncIterator[W24TechreadMessage]:
+            return self._read_drawing_locked(
+                drawing,
+                asks,
+                model,
+                payload_dir,
+                max_concurrent_downloads,
+                preserve_order,
+                download_payloads,
+                request_key)
+
+        # attach to the identical request if one is in flight
+        if request_key is not None and self._inflight_requests is not None:
+            request = self._inflight_requests.join(request_key, make_request)
+        else:
+            request = make_request()
+
+        # give up the request or the individual asks when they take
+        # too long. Cancelling the request releases the websocket
+        if deadline is not None or ask_deadlines:
+            request = apply_deadlines(
+                request,
+                asks,
+                deadline,
+                ask_deadlines,
+                functools.partial(
+                    self._trigger_asks_exception,
+                    exception=W24TechreadExceptionType.TIMEOUT))
+
+        try:
+            async for message in request:
+                yield message
+        finally:
+            await request.aclose()  # type: ignore
+
+    async def _read_drawing_locked(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource],
+        payload_dir: Optional["os.PathLike[str]"],
+        max_concurrent_downloads: int,
+        preserve_order: bool,
+        download_payloads: Union[bool, Collection[W24AskType]],
+        request_key: Optional[str]
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Wait for the websocket, send the request and store
+        the result in the cache when the request completed.
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            asks {List[W24Ask]} -- List of Asks that are requested
+            model {Optional[W24DrawingSource]} -- 3d model
+            payload_dir {Optional[os.PathLike]} -- see read_drawing()
+            max_concurrent_downloads {int} -- see read_drawing()
+            preserve_order {bool} -- see read_drawing()
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                see read_drawing()
+            request_key {Optional[str]} -- Key of the request obtained
+                from _make_request_key()
+
+        Yields:
+            W24TechreadMessage -- Messages of the request
+        """
+        # The websocket can only serve max_inflight_requests at a
+        # time. Further calls on the same client are therefore
+        # queued. Use the W24TechreadClientPool if you want to
+        # read several drawings in parallel.
+        async with self._request_semaphore:  # type: ignore
+            request = self._read_drawing(
+                drawing,
+                asks,
+                model,
+                payload_dir,
+                max_concurrent_downloads,
+                preserve_order,
+                download_payloads)
+            keep_messages = request_key is not None \
+                and self._result_cache is not None
+            messages: List[W24TechreadMessage] = []
+            try:
+                async for message in request:
+                    if keep_messages:
+                        messages.append(message)
+                    yield message
+            finally:
+                await request.aclose()
+
+                # the server closed the connection, so we prepare
+                # the one for the next request right away
+                if self._persistent_connection:
+                    self._techread_client_wss.reconnect_in_background()
+
+        # we only get here if the request completed
+        if keep_messages:
+            self._result_cache.put(request_key, messages)  # type: ignore
+
+    async def _normalize_drawing(
+        self,
+        drawing: W24DrawingSource,
+        config: W24NormalizeConfig
+    ) -> W24DrawingSource:
+        """ Shrink the drawing in the process pool if it exceeds
+        the limit of the configuration
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            config {W24NormalizeConfig} -- Configuration
+
+        Returns:
+            W24DrawingSource -- The normalized drawing; or the original
+                drawing if it fits or cannot be normalized
+        """
+        # async iterables cannot be inspected without consuming them
+        source_info = peek_source(drawing, 0)
+        if source_info is None or source_info[0] <= config.max_size:
+            return drawing
+
+        normalized = await self._run_in_process_pool(
+            normalize_drawing,
+            self._get_picklable_source(drawing),
+            config)
+        if normalized is None:
+            logger.warning("Drawing of %d bytes could not be normalized",
+                           source_info[0])
+            return drawing
+
+        logger.info("Normalized the drawing from %d to %d bytes",
+                    source_info[0], len(normalized))
+        return normalized
+
+    async def split_drawing(
+        self,
+        drawing: W24DrawingSource
+    ) -> List[W24DrawingSource]:
+        """ Split a multi-page PDF or TIFF into single-page
+        drawings. The work is done in a process pool.
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+
+        Raises:
+            ImportError: Raised when pypdf or Pillow is required,
+                but not installed
+
+        Returns:
+            List[W24DrawingSource] -- The pages of the drawing; or the
+                original drawing if it cannot be split
+        """
+        # async iterables cannot be inspected without consuming them
+        if peek_source(drawing, 0) is None:
+            return [drawing]
+
+        pages = await self._run_in_process_pool(
+            techread_split.split_drawing,
+            self._get_picklable_source(drawing))
+        if pages is None:
+            return [drawing]
+
+        logger.info("Split the drawing into %d pages", len(pages))
+        return pages
+
+    async def _run_in_process_pool(
+        self,
+        function: Callable[..., Any],
+        *args: Any
+    ) -> Any:
+        """ Run the CPU-bound function in the process pool, so
+        that it neither blocks the event loop nor holds the GIL
+
+        Arguments:
+            function {Callable} -- Picklable function
+            *args -- Picklable arguments
+
+        Returns:
+            Any -- Return value of the function
+        """
+        if self._process_executor is None:
+            self._process_executor = ProcessPoolExecutor()
+
+        return await asyncio.get_event_loop().run_in_executor(
+            self._process_executor,
+            function,
+            *args)
+
+    @staticmethod
+    def _get_picklable_source(
+        drawing: W24DrawingSource
+    ) -> Union[bytes, "os.PathLike[str]"]:
+        """ Get the drawing in a form that can be passed to the
+        process pool. Paths are passed as they are, so that we do
+        not copy the file into the worker process.
+
+        Arguments:
+            drawing {W24DrawingSource} -- Drawing that is neither an
+                async iterable nor a file object that cannot be rewound
+
+        Returns:
+            Union[bytes, os.PathLike] -- Content or path of the drawing
+        """
+        if isinstance(drawing, os.PathLike):
+            return drawing
+
+        # read the file object and rewind it, so that the upload
+        # starts at the same position
+        if isinstance(drawing, io.IOBase):
+            position = drawing.tell()
+            content = drawing.read()
+            drawing.seek(position)
+            return content
+
+        return bytes(drawing)  # type: ignore
+
+    async def _make_request_key(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource],
+        payload_dir: Optional["os.PathLike[str]"],
+        download_payloads: Union[bool, Collection[W24AskType]]
+    ) -> Optional[str]:
+        """ Make the key of the request for the result cache and
+        the deduplication. Requests whose payloads are not held in
+        memory are neither cached nor shared, as we could not replay
+        them faithfully.
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            asks {List[W24Ask]} -- List of Asks that are requested
+            model {Optional[W24DrawingSource]} -- 3d model
+            payload_dir {Optional[os.PathLike]} -- see read_drawing()
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                see read_drawing()
+
+        Returns:
+            Optional[str] -- Key of the request; None if the request
+                shall neither be cached nor shared
+        """
+        if self._result_cache is None and self._inflight_requests is None:
+            return None
+
+        if payload_dir is not None or download_payloads is not True:
+            return None
+
+        # hashing large files takes a while, so we do not
+        # block the event loop
+        return await asyncio.get_event_loop().run_in_executor(
+            None,
+            W24ResultCache.make_key,
+            drawing,
+            model,
+            asks,
+            self._development_key)
+
+    async def _read_drawing(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource],
+        payload_dir: Optional["os.PathLike[str]"],
+        max_concurrent_downloads: int,
+        preserve_order: bool,
+        download_payloads: Union[bool, Collection[W24AskType]]
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Submit the request on the websocket, upload the
+        associated files and listen for the responses.
+        See read_drawing() for details.
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            asks {List[W24Ask]} -- List of Asks that are requested
+            model {Optional[W24DrawingSource]} -- 3d model
+            payload_dir {Optional[os.PathLike]} -- directory for the
+                payloads; None to keep them in memory
+            max_concurrent_downloads {int} -- limit of parallel downloads
+            preserve_order {bool} -- keep the order of the messages
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                payloads that are downloaded automatically
+
+        Yields:
+            W24TechreadMessage -- Response object obtained from the API
+        """
+
         # make the request object
         request = W24TechreadRequest(
             asks=asks,
             development_key=self._development_key)
 
-        # send the initialization request to the server.
-        # This achieves two things:
-        # 1. The server has a couple of 100ms to
-        #    reserves some resources for you, and
-        # 2. The server will create a new request_id
-        #    that you will need when uploading the
-        #    associated files
-        await self._techread_client_wss.send_command(
-            W24TechreadAction.INITIALIZE.value,
-            request.json())
-
-        # Wait for the response (i.e,. the request id)
-        response = await self._techread_client_wss.recv_message()
-        logger.info("Received request_id %s", response.request_id)
-
-        # interpret the payload
-        init_response = W24TechreadInitResponse.parse_obj(
-            response.payload_dict)
-
-        # upload drawing and model. We can do that in parallel.
-        # If your user uploads them separately, you could also
-        # upload them separately to Werk24.
-        try:
-            await asyncio.gather(
-                self._techread_client_https.upload_associated_file(
-                    init_response.drawing_presigned_post,
-                    drawing),
-                self._techread_client_https.upload_associated_file(
-                    init_response.model_presigned_post,
-                    model))
-
-        # explicitly reraise the exception if the payload is too
-        # large
-        except (BadRequestException, RequestTooLargeException) as exception:
-            async for message in self._trigger_asks_exception(asks, exception):
+        # The READ command does not carry the request_id, so
+        # the requests on the websocket are initialized one
+        # after the other
+        upload_exception: Optional[Exception] = None
+        async with self._initialize_lock:  # type: ignore
+
+            # the server closes the websocket after each request.
+            # Reopen it if this is not the first request of the session,
+            # if it was dropped or if the token was refreshed
+            await self._techread_client_wss.ensure_connection()
+
+            # send the initialization request to the server.
+            # This achieves two things:
+            # 1. The server has a couple of 100ms to
+            #    reserves some resources for you, and
+            # 2. The server will create a new request_id
+            #    that you will need when uploading the
+            #    associated files
+            # All further messages of the request are routed to us
+            response = await self._techread_client_wss.initialize_request(
+                request.json())
+            logger.info("Received request_id %s", response.request_id)
+
+            try:
+                # interpret the payload
+                init_response = W24TechreadInitResponse.parse_obj(
+                    response.payload_dict)
+
+                # upload drawing and model. We can do that in parallel.
+                # If your user uploads them separately, you could also
+                # upload them separately to Werk24.
+                await asyncio.gather(
+                    self._techread_client_https.upload_associated_file(
+                        init_response.drawing_presigned_post,
+                        drawing),
+                    self._techread_client_https.upload_associated_file(
+                        init_response.model_presigned_post,
+                        model))
+
+                # Tell Werk24 that all the files have been uploaded
+                # correctly and the reading process can be started.
+                #
+                # NOTE: you will only be able to start the reading
+                # process from the websocket connection that
+                # initiated the request. If you want to run a
+                # stateless-system that separates the initialization
+                # from the upload and read stages, you'll need to
+                # find a way of handing over the tcp connection :)
+                # PS: The AWS API Gatway for websockets might help you
+                # here.
+                await self._techread_client_wss.send_command(
+                    W24TechreadAction.READ.value,
+                    "{}")
+                logger.info("Techread request submitted")
+
+            # explicitly reraise the exception if the payload is too
+            # large. We yield the messages after releasing the lock
+            except (BadRequestException,
+                    RequestTooLargeException) as exception:
+                self._techread_client_wss.release_request(response.request_id)
+                upload_exception = exception
+
+            except BaseException:
+                self._techread_client_wss.release_request(response.request_id)
+                raise
+
+        if upload_exception is not None:
+            async for message in self._trigger_asks_exception(
+                    asks, upload_exception):
                 yield message
             return
 
-        # Tell Werk24 that all the files have been uploaded
-        # correctly and the reading process can be started.
-        #
-        # NOTE: you will only be able to start the reading
-        # process from the websocket connection that
-        # initiated the request. If you want to run a
-        # stateless-system that separates the initialization
-        # from the upload and read stages, you'll need to
-        # find a way of handing over the tcp connection :)
-        # PS: The AWS API Gatway for websockets might help you
-        # here.
-        await self._techread_client_wss.send_command(
-            W24TechreadAction.READ.value,
-            "{}")
-        logger.info("Techread request submitted")
-
         # Wait for incoming messages from the server.
         # They will tell you when the individual
         # asks become available. The socket returns
         # strings of jsonified W24TechreadMessage objects.
         #
-        # The loop will stop when the websocket is
-        # closed
-        async for message in self._techread_client_wss.listen():
+        # The loop will stop when the request is completed
+        # or the websocket is closed. The payloads are
+        # downloaded in the background, so that we keep
+        # consuming the socket while large files are
+        # transferred.
+        messages = self._prefetch_payloads(
+            self._techread_client_wss.listen_request(response.request_id),
+            payload_dir,
+            max_concurrent_downloads,
+            preserve_order,
+            download_payloads)
+        try:
+            async for message in messages:
 
-            # check whether we need to download something
-            if message.payload_url is not None:
-                message.payload_bytes = await self._techread_client_https \
-                    .download_payload(message.payload_url)
+                # return the message to the caller for immediate
+                # consumption
+                yield message
+        finally:
+            await messages.aclose()
 
-            # return the message to the caller for immediate
-            # consumption
-            yield message
+    async def _prefetch_payloads(
+        self,
+        messages: AsyncIterator[W24TechreadMessage],
+        payload_dir: Optional["os.PathLike[str]"],
+        max_concurrent_downloads: int,
+        preserve_order: bool,
+        download_payloads: Union[bool, Collection[W24AskType]]
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Start the payload downloads as soon as the messages
+        arrive and yield the messages once their payload is
+        available. Messages without payload (or whose payload
+        was not requested) pass through immediately.
+
+        Arguments:
+            messages {AsyncIterator[W24TechreadMessage]} -- messages
+                from the websocket
+            payload_dir {Optional[os.PathLike]} -- directory for the
+                payloads; None to keep them in memory
+            max_concurrent_downloads {int} -- limit of parallel downloads
+            preserve_order {bool} -- keep the order of the messages
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                payloads that are downloaded automatically
+
+        Yields:
+            W24TechreadMessage -- message with downloaded payload
+        """
+        if max_concurrent_downloads < 1:
+            raise ValueError("max_concurrent_downloads needs to be at least 1")
+
+        semaphore = asyncio.Semaphore(max_concurrent_downloads)
+
+        # Queue of futures that resolve to the messages. In ordered
+        # mode, the futures are queued in the order of arrival. In
+        # unordered mode, they are queued when they are done
+        output: "asyncio.Queue[Any]" = asyncio.Queue()
+        downloads: Set["asyncio.Future[W24TechreadMessage]"] = set()
+
+        async def download(
+            message: W24TechreadMessage
+        ) -> W24TechreadMessage:
+            async with semaphore:
+                await self._download_payload(message, payload_dir)
+            return message
+
+        def enqueue(future: "asyncio.Future[W24TechreadMessage]") -> None:
+            if preserve_order or future.done():
+                output.put_nowait(future)
+            else:
+                future.add_done_callback(output.put_nowait)
+
+        async def receive() -> None:
+            try:
+                async for message in messages:
+                    if not self._is_payload_requested(
+                            message, download_payloads):
+                        future = asyncio.get_event_loop().create_future()
+                        future.set_result(message)
+                    else:
+                        future = asyncio.ensure_future(download(message))
+                        downloads.add(future)
+                        future.add_done_callback(downloads.discard)
+                    enqueue(future)
+
+                # wait for the outstanding downloads
+                # before we close the stream
+                if downloads:
+                    await asyncio.wait(set(downloads))
+
+            # CancelledError derives from Exception before Python 3.8
+            except asyncio.CancelledError:  # pylint: disable=try-except-raise
+                raise
+
+            # hand the exception over to the consumer
+            except Exception as exception:  # pylint: disable=broad-except
+                future = asyncio.get_event_loop().create_future()
+                future.set_exception(exception)
+                output.put_nowait(future)
+
+            output.put_nowait(None)
+
+        receiver = asyncio.ensure_future(receive())
+        try:
+            while True:
+                future = await output.get()
+                if future is None:
+                    break
+                yield await future
+
+        # stop the receiver and the downloads if the consumer left
+        # early or a download failed
+        finally:
+            receiver.cancel()
+            for cur_download in list(downloads):
+                cur_download.cancel()
+            await asyncio.gather(
+                receiver, *downloads, return_exceptions=True)
+
+    def read_drawings(
+        self,
+        sources: Union[Iterable[W24BatchSource],
+                       AsyncIterable[W24BatchSource]],
+        asks: List[W24Ask],
+        max_concurrency: int = 1
+    ) -> AsyncIterator[W24BatchResult]:
+        """ Read a whole batch of drawings and yield the messages
+        as they arrive. The sources are consumed lazily, so
+        you can pass a generator over a large directory without
+        loading all drawings into memory.
+
+        NOTE: a single client processes one drawing at a time.
+        Use the W24TechreadClientPool if you want the requests
+        to run in parallel.
+
+        Arguments:
+            sources {Union[Iterable, AsyncIterable]} -- drawings to be
+                read. Each item can be bytes, a path, or a
+                (drawing, model) pair.
+
+            asks {List[W24Ask]} -- List of Asks that are requested for
+                every drawing
+
+        Keyword Arguments:
+            max_concurrency {int} -- Maximal number of requests in
+                flight (default: {1})
+
+        Yields:
+            W24BatchResult -- (source_id, message) tuples where the
+                source_id is the index of the source in the batch.
+                If the request of a source fails, the exception is
+                yielded in place of a message and the other sources
+                continue.
+        """
+        return techread_batch.read_drawings(
+            self.read_drawing,
+            sources,
+            asks,
+            max_concurrency)
+
+    async def read_drawing_pages(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource] = None,
+        max_concurrency: int = 1,
+        **kwargs: Any
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Split a multi-page PDF or TIFF into its pages, submit
+        each page as a request of its own and merge the messages.
+        Each message carries the index of its page in page_index.
+
+        NOTE: a single client processes one page at a time. Use
+        the W24TechreadClientPool if you want the pages to be
+        read in parallel.
+
+        Arguments:
+            drawing {W24DrawingSource} -- Multi-page technical drawing
+
+            asks {List[W24Ask]} -- List of Asks that are requested for
+                every page
+
+        Keyword Arguments:
+            model {Optional[W24DrawingSource]} -- 3d model that is
+                submitted with every page (default: {None})
+
+            max_concurrency {int} -- Maximal number of pages in
+                flight (default: {1})
+
+            **kwargs -- Additional arguments that are passed to
+                read_drawing(); e.g., payload_dir
+
+        Yields:
+            W24TechreadMessage -- Response objects of all pages
+        """
+        pages = await self.split_drawing(drawing)
+        messages = techread_split.read_pages(
+            functools.partial(self.read_drawing, **kwargs),
+            pages,
+            asks,
+            model,
+            max_concurrency)
+        try:
+            async for message in messages:
+                yield message
+        finally:
+            await messages.aclose()  # type: ignore
+
+    @staticmethod
+    def _is_payload_requested(
+        message: W24TechreadMessage,
+        download_payloads: Union[bool, Collection[W24AskType]]
+    ) -> bool:
+        """ Check whether the payload of the message shall be
+        downloaded automatically
+
+        Arguments:
+            message {W24TechreadMessage} -- Message from the API
+            download_payloads {Union[bool, Collection[W24AskType]]} --
+                see read_drawing()
+
+        Returns:
+            bool -- True if the message has a payload that
+                shall be downloaded
+        """
+        if message.payload_url is None:
+            return False
+
+        if isinstance(download_payloads, bool):
+            return download_payloads
+
+        return message.message_type == W24TechreadMessageType.ASK \
+            and message.message_subtype in download_payloads
+
+    async def fetch_payload(
+        self,
+        message: W24TechreadMessage,
+        payload_dir: Optional["os.PathLike[str]"] = None
+    ) -> W24TechreadMessage:
+        """ Download the payload of a message that was not
+        downloaded automatically (see download_payloads in
+        read_drawing()). The call does not block the websocket,
+        so you can fetch payloads while the next drawing is
+        being read.
+
+        NOTE: the payload_url is only valid for a limited
+        amount of time. Fetch the payload soon after you
+        received the message.
+
+        Arguments:
+            message {W24TechreadMessage} -- Message with payload_url
+
+        Keyword Arguments:
+            payload_dir {Optional[os.PathLike]} -- If set, the payload
+                is streamed into a file in this directory and the path
+                is stored in message.payload_path (default: {None})
+
+        Raises:
+            ValueError: Raised when the message does not carry
+                a payload_url
+
+        Returns:
+            W24TechreadMessage -- The same message with payload_bytes
+                or payload_path set
+        """
+        if message.payload_url is None:
+            raise ValueError("The message does not carry a payload")
+
+        # nothing to do if the payload is already available
+        if message.payload_bytes is None and message.payload_path is None:
+            await self._download_payload(message, payload_dir)
+
+        return message
+
+    async def _download_payload(
+        self,
+        message: W24TechreadMessage,
+        payload_dir: Optional["os.PathLike[str]"]
+    ) -> None:
+        """ Download the payload of the message either into
+        message.payload_bytes or into a file in payload_dir
+
+        Arguments:
+            message {W24TechreadMessage} -- Message with payload_url
+            payload_dir {Optional[os.PathLike]} -- directory for the
+                payload; None to keep it in memory
+        """
+        if payload_dir is None:
+            message.payload_bytes = await self._techread_client_https \
+                .download_payload(message.payload_url)
+            return
+
+        # stream the payload to disk under a unique name
+        payload_path = Path(payload_dir) / \
+            f"{message.request_id}_{uuid.uuid4().hex}"
+        await self._techread_client_https.download_payload_to(
+            message.payload_url,
+            payload_path)
+        message.payload_path = payload_path
 
     @staticmethod
     async def _trigger_asks_exception(
         asks: List[W24Ask],
-        exception: RequestTooLargeException
-    ) -> None:
+        exception: Union[Exception, W24TechreadExceptionType]
+    ) -> AsyncIterator[W24TechreadMessage]:
         """ Trigger exceptions for all the submitted asks.
         This helps us to mock consistent exception handling
         behavior even when the files are rejected before they
@@ -394,27 +1283,34 @@ class W24TechreadClient:
 
         Args:
             asks (List[W24Ask]): List of all submited asks
-            exception (RequestTooLargeException): Exception
-                that shall be pushed
+            exception (Union[Exception, W24TechreadExceptionType]):
+                Local exception that is translated with the
+                EXCEPTION_MAP, or the exception type that shall be
+                pushed
 
         Yields:
             W24TechreadMessage: Exception message
         """
 
+        # the preflight checks tell us the type directly
+        if isinstance(exception, W24TechreadExceptionType):
+            exception_type = exception
+
         # get the exception type from the MAP
-        try:
-            exception_type = EXCEPTION_MAP[type(exception)]
+        else:
+            try:
+                exception_type = EXCEPTION_MAP[type(exception)]
 
-        # if we see an exception that we were not supposed
-        # to handle, there must have been a developer passing
-        # a new exception type. Let's tell her by rasing
-        # a runtime error
-        except KeyError:
-            raise RuntimeError(
-                f"Unknown exception type passed: {type(exception)}")
+            # if we see an exception that we were not supposed
+            # to handle, there must have been a developer passing
+            # a new exception type. Let's tell her by rasing
+            # a runtime error
+            except KeyError:
+                raise RuntimeError(
+                    f"Unknown exception type passed: {type(exception)}")
 
         # translate the exception into an official exception
-        exception = W24TechreadException(
+        techread_exception = W24TechreadException(
             exception_level=W24TechreadExceptionLevel.ERROR,
             exception_type=exception_type)
 
@@ -424,7 +1320,7 @@ class W24TechreadClient:
                 request_id=uuid.uuid4(),
                 message_type=W24TechreadMessageType.ASK,
                 message_subtype=cur_ask.ask_type,
-                exceptions=[exception])
+                exceptions=[techread_exception])
 
     @ staticmethod
     def _get_license_environs(
@@ -451,6 +1347,7 @@ class W24TechreadClient:
         # First priority: look for the local license path
         if license_path is not None:
             if os.path.exists(license_path):
+                import dotenv  # pylint: disable=import-outside-toplevel
                 environs_raw = {
                     k: v
                     for k, v in dotenv.dotenv_values(license_path).items()
@@ -476,7 +1373,8 @@ class W24TechreadClient:
         auth_region: Optional[str] = None,
         server_https: Optional[str] = None,
         server_wss: Optional[str] = None,
-        version: Optional[str] = None
+        version: Optional[str] = None,
+        **kwargs: Any
     ) -> "W24TechreadClient":
         """ Small helper function that creates a new
         W24TechreadClient from the enviorment info.
@@ -500,6 +1398,10 @@ class W24TechreadClient:
                 Takes priority over environ W24TECHREAD_VERSION and
                 DEfAULT_VERSION
 
+            **kwargs -- Additional arguments that are passed to the
+                constructor of the W24TechreadClient; e.g.,
+                connector_limit_per_host
+
         Raises:
             FileNotFoundError -- Raised when you pass a path to a license file
                 that does not exist
@@ -533,7 +1435,8 @@ class W24TechreadClient:
         try:
 
             # create a reference to the client
-            client = W24TechreadClient(server_https, server_wss, version)
+            client = W24TechreadClient(
+                server_https, server_wss, version, **kwargs)
 
             # register the credentials. This will in effect
             # only set the variabels in the authorizer. It will
@@ -562,7 +1465,8 @@ class W24TechreadClient:
     async def read_drawing_with_hooks(
         self,
         drawing_bytes: bytes,
-        hooks: List[Hook]
+        hooks: List[Hook],
+        max_concurrent_hooks: Optional[int] = None
     ) -> None:
         """ Send the drawing to the API (can be PDF or image)
         and register a number of callbacks that are triggered
@@ -572,9 +1476,19 @@ class W24TechreadClient:
             drawing_bytes {bytes} -- Technical Drawing as Image or PDF
             hooks {List[Hook]} -- List of Callback you want to obtain
 
+        Keyword Arguments:
+            max_concurrent_hooks {Optional[int]} -- Maximal number of
+                hooks that are executed concurrently in the background.
+                Synchronous hooks are run in the default thread pool.
+                None awaits each hook before the next message is
+                consumed (default: {None})
+
         Raises:
             ServerException -- Raised when the server returns an ERROR
                 message
+
+            HookExecutionError -- Raised when concurrently executed
+                hooks failed; after all other hooks finished
         """
 
         # filter the callback requests to only contain
@@ -584,109 +1498,51 @@ class W24TechreadClient:
             for cur_ask in hooks
             if cur_ask.ask is not None]
 
+        # compile the hooks once, rather than searching
+        # through them for every message
+        hook_index = HookIndex(hooks)
+        runner = HookRunner(max_concurrent_hooks) \
+            if max_concurrent_hooks is not None else None
+
         try:
             # send out the request and make a generator
             # that triggers when the result of an ask
             # becomes available
             async for message in self.read_drawing(drawing_bytes, asks_list):
-                await self._call_hooks_for_message(message, hooks)
+                await self._call_hooks_for_message(message, hook_index, runner)
 
-        # explicitly reraise server exceptions
-        except ServerException:  # pylint: disable=try-except-raise
+        # do not leave hooks running in the background
+        except BaseException:
+            if runner is not None:
+                await runner.cancel()
             raise
 
-    async def _call_hooks_for_message(
-            self,
-            message: W24TechreadMessage,
-            hooks: List[Hook]
-    ) -> None:
-        """ Find the correct hook for the read reseponse and
-        call the corresponding hook.
-
-        Arguments:
-            message {W24TechreadMessage} -- Messsage returned from the
-                read_drawing method
-
-            hooks {List[Hook]} -- List of hooks from which we need to
-                pick the suited one
-
-        Raises:
-            ServerException: raised when the server returns an ERROR
-                message
-        """
-
-        # get the hook function that corresponds to the message
-        hook_function = self._get_hook_function_for_message(message, hooks)
-
-        # if no hook is registered, ignore
-        if hook_function is None:
-            return
-
-        # if the hook_function is not callable, we want to warn the user,
-        # rather than throwing an exception
-        if not callable(hook_function):
-            logger.warning(
-                "You registered a non-callable trigger of type '%s' with "
-                "the message_type '%s'. Please make sure that you are using "
-                "a Callable (e.g, def or lambda)",
-                type(hook_function),
-                message.message_type)
-            return
-
-        # if everything went well, we call the trigger with
-        # the message as payload. Be sure to call the
-        # function asymmetrically if supported
-        if asyncio.iscoroutinefunction(hook_function):
-            await hook_function(message)
-        else:
-            hook_function(message)
+        # wait for the hooks that are still running
+        if runner is not None:
+            await runner.join()
 
     @staticmethod
-    def _get_hook_function_for_message(
+    async def _call_hooks_for_message(
             message: W24TechreadMessage,
-            hooks: List[Hook]
-    ) -> Optional[Callable]:
-        """ Get the hook function that corresponds to the message
-        type.
+            hook_index: HookIndex,
+            runner: Optional[HookRunner] = None
+    ) -> None:
+        """ Call the hooks that subscribed to the message
 
         Arguments:
             message {W24TechreadMessage} -- Messsage returned from the
                 read_drawing method
 
-            hooks {List[Hook]} -- List of hooks from which we need to
-                pick the suited one
+            hook_index {HookIndex} -- Index of the hooks that were
+                registered for the request
 
-        Returns:
-            Optional[Callable] -- Hook function that should be called
+        Keyword Arguments:
+            runner {Optional[HookRunner]} -- Runner that executes the
+                hooks in the background; None to await each hook
+                (default: {None})
         """
-
-        # because we allow the user to define the ask in the hook,
-        # we need to make some extra effort when filtering
-        if message.message_type == W24TechreadMessageType.ASK:
-            def hook_filter(hook: Hook) -> bool:
-                return hook.ask is not None \
-                    and message.message_subtype.value \
-                    == hook.ask.ask_type.value
-
-        # if the message is of any other type, we just need to
-        # compare the the message_type and message_subtype
-        else:
-            def hook_filter(hook: Hook) -> bool:
-                return hook.message_type is not None \
-                    and hook.message_subtype is not None \
-                    and message.message_type == hook.message_type \
-                    and message.message_subtype == hook.message_subtype
-
-        # return the first positive case
-        for cur_hook in filter(hook_filter, hooks):
-            return cur_hook.function
-
-        # if we are still here, we have an unknown message type, which
-        # probobly is being caused by an API update. We want to ensure
-        # that the user is being informed, but we do not want to break
-        # the existing functionality -> warning
-        logger.warning(
-            "Ignoring message of type %s:%s - no hook registered",  # noqa
-            message.message_type,
-            message.message_subtype)
-        return None
+        for hook in hook_index.get_hooks(message):
+            if runner is not None:
+                await runner.submit(hook, message)
+            else:
+                await call_hook(hook.function, message)
@@ -1,11 +1,15 @@
 """ HTTPS-part of the Werk24 client
 """
 import base64
+import inspect
+import io
+import os
+from contextlib import contextmanager
 from types import TracebackType
-from typing import Optional, Type
+from typing import (TYPE_CHECKING, Any, Awaitable, BinaryIO, Callable,
+                    Iterator, Optional, Type, Union)
 from urllib.parse import urlparse
 
-import aiohttp
 from pydantic import HttpUrl
 
 from werk24.exceptions import (BadRequestException, RequestTooLargeException,
@@ -13,9 +17,119 @@ from werk24.exceptions import (BadRequestException, RequestTooLargeException,
                                UnauthorizedException,
                                UnsupportedMediaType)
 from werk24.models.techread import W24PresignedPost
+from werk24.techread_source import W24DrawingSource, open_source
 
 from .auth_client import AuthClient
 
+# aiohttp is only imported when the session is opened,
+# which keeps `import werk24` light
+if TYPE_CHECKING:
+    import aiohttp
+
+DEFAULT_CONNECTOR_LIMIT = 100
+""" Default maximal number of simultaneous connections """
+
+DEFAULT_CONNECTOR_LIMIT_PER_HOST = 0
+""" Default maximal number of simultaneous connections per host.
+0 stands for unlimited """
+
+DEFAULT_DNS_CACHE_TTL = 300
+""" Default number of seconds for which DNS lookups are cached """
+
+DEFAULT_KEEPALIVE_TIMEOUT = 30.0
+""" Default number of seconds for which idle connections are kept """
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024  # 64 KB
+""" Size of the chunks in which payloads are downloaded """
+
+
+W24PayloadSink = Union[
+    "os.PathLike[str]",
+    BinaryIO,
+    Callable[[bytes], Union[None, Awaitable[None]]]]
+""" Destination for streamed payload downloads """
+
+
+class _Base64StreamDecoder:
+    """ Incremental base64 decoder. Base64 encodes 3 bytes
+    as 4 characters, so we can decode every chunk up to the
+    last complete group of 4 characters and keep the rest
+    for the next chunk.
+    """
+
+    def __init__(self) -> None:
+        self._remainder = b""
+
+    def decode(self, chunk: bytes) -> bytes:
+        """ Decode the next chunk of base64 text
+
+        Arguments:
+            chunk {bytes} -- base64 text
+
+        Returns:
+            bytes -- decoded bytes (can be empty)
+        """
+
+        # ignore line breaks and other whitespace
+        # the same way base64.b64decode does
+        data = self._remainder + b"".join(chunk.split())
+        cut = len(data) - len(data) % 4
+        self._remainder = data[cut:]
+        return base64.b64decode(data[:cut])
+
+    def flush(self) -> bytes:
+        """ Decode the remainder at the end of the stream
+
+        Returns:
+            bytes -- decoded bytes (can be empty)
+        """
+        data, self._remainder = self._remainder, b""
+        return base64.b64decode(data)
+
+
+@contextmanager
+def _open_sink(
+    sink: W24PayloadSink
+) -> Iterator[Callable[[bytes], Awaitable[None]]]:
+    """ Turn the sink into an async write function
+
+    Arguments:
+        sink {W24PayloadSink} -- path, binary file object or callback
+
+    Yields:
+        Callable[[bytes], Awaitable[None]] -- write function
+    """
+
+    def make_write(
+        function: Callable[[bytes], Any]
+    ) -> Callable[[bytes], Awaitable[None]]:
+        async def write(chunk: bytes) -> None:
+            result = function(chunk)
+            if inspect.isawaitable(result):
+                await result
+        return write
+
+    if isinstance(sink, os.PathLike):
+
+        # write to a temporary sibling and only replace the target
+        # when the download succeeded, so that a failed download
+        # never leaves a truncated payload behind
+        tmp_path = f"{os.fspath(sink)}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "wb") as file_handle:
+                yield make_write(file_handle.write)
+            os.replace(tmp_path, sink)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    elif hasattr(sink, "write"):
+        yield make_write(sink.write)  # type: ignore
+
+    else:
+        yield make_write(sink)  # type: ignore
+
 
 class TechreadClientHttps:
 
@@ -25,18 +139,51 @@ class TechreadClientHttps:
 
     MAX_REQUEST_PAYLOAD = 6 * 1024 * 1024  # 6MB
 
-    def __init__(self, techread_server_https: str, techread_version: str):
+    def __init__(
+            self,
+            techread_server_https: str,
+            techread_version: str,
+            connector_limit: int = DEFAULT_CONNECTOR_LIMIT,
+            connector_limit_per_host: int = DEFAULT_CONNECTOR_LIMIT_PER_HOST,
+            dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+            keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT):
         """ Intialize a new session with the https server
 
         Arguments:
             techread_server_https {str} -- Domain of the Techread https server
             techread_version {str} -- Techread Version
+
+        Keyword Arguments:
+            connector_limit {int} -- Maximal number of simultaneous
+                connections. 0 for unlimited.
+
+            connector_limit_per_host {int} -- Maximal number of
+                simultaneous connections to the same host. 0 for
+                unlimited.
+
+            dns_cache_ttl {int} -- Number of seconds for which
+                DNS lookups are cached
+
+            keepalive_timeout {float} -- Number of seconds for which
+                idle connections are kept alive for reuse
         """
         self._techread_server = techread_server_https
         self._techread_version = techread_version
-        self._techread_session_https: Optional[aiohttp.ClientSession] = None
+        self._techread_session_https: Optional["aiohttp.ClientSession"] = None
         self._auth_client: Optional[AuthClient] = None
 
+        # The presigned posts are sent to a different host and must
+        # not carry the authentication token. We keep a separate
+        # session for them, but share the connection pool between
+        # both sessions so that the TCP / TLS connections and the
+        # DNS lookups are reused across requests
+        self._upload_session: Optional["aiohttp.ClientSession"] = None
+        self._connector: Optional["aiohttp.TCPConnector"] = None
+        self._connector_limit = connector_limit
+        self._connector_limit_per_host = connector_limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+
     async def __aenter__(
             self
     ) -> 'TechreadClientHttps':
@@ -58,10 +205,45 @@ class TechreadClientHttps:
                 "You need to call register_auth_client() before you can start"
                 + " the session")
 
-        headers = {"Authorization": f"Bearer {self._auth_client.token}"}
-        self._techread_session_https = aiohttp.ClientSession(headers=headers)
+        self._open_session()
         return self
 
+    def _open_session(self) -> None:
+        """ Open the session for the API requests and the session
+        for the uploads. Both use the same connection pool.
+
+        NOTE: The token is not stored in the session headers,
+        but added to every request. This way, requests pick up
+        the token as soon as the AuthClient refreshed it.
+        """
+        import aiohttp  # pylint: disable=import-outside-toplevel
+
+        if self._connector is None or self._connector.closed:
+            self._connector = aiohttp.TCPConnector(
+                limit=self._connector_limit,
+                limit_per_host=self._connector_limit_per_host,
+                ttl_dns_cache=self._dns_cache_ttl,
+                keepalive_timeout=self._keepalive_timeout)
+
+        self._techread_session_https = aiohttp.ClientSession(
+            connector=self._connector,
+            connector_owner=False)
+        self._upload_session = aiohttp.ClientSession(
+            connector=self._connector,
+            connector_owner=False)
+
+    async def _close_session(self) -> None:
+        """ Close both sessions and the connection pool
+        """
+        if self._techread_session_https is not None:
+            await self._techread_session_https.close()
+
+        if self._upload_session is not None:
+            await self._upload_session.close()
+
+        if self._connector is not None:
+            await self._connector.close()
+
     async def __aexit__(
             self,
             exc_type: Optional[Type[BaseException]],
@@ -71,8 +253,35 @@ class TechreadClientHttps:
 
         """ Close the session
         """
-        if self._techread_session_https is not None:
-            await self._techread_session_https.close()
+        await self._close_session()
+
+    @property
+    def is_open(self) -> bool:
+        """ Check whether the https session is open
+
+        Returns:
+            bool: True if the session is open
+        """
+        return self._techread_session_https is not None \
+            and not self._techread_session_https.closed
+
+    async def reconnect(self) -> None:
+        """ Close the current session (if any) and open a new one
+
+        Raises:
+            RuntimeError  -- Raise when the developer reconnects
+                without having called register_auth_client()
+        """
+
+        # make sure that we have an AuthClient
+        if self._auth_client is None:
+            raise RuntimeError(
+                "You need to call register_auth_client() before you can"
+                + " reconnect")
+
+        # close the old session and open a new one
+        await self._close_session()
+        self._open_session()
 
     def register_auth_client(self, auth_client: AuthClient) -> None:
         """Register the reference to the authentication service
@@ -86,7 +295,7 @@ class TechreadClientHttps:
     async def upload_associated_file(
         self,
         presigned_post: W24PresignedPost,
-        content: Optional[bytes]
+        content: Optional[W24DrawingSource]
     ) -> None:
         """ Upload an associated file to the API.
         This can either be a technical drawing or a
@@ -103,7 +312,9 @@ class TechreadClientHttps:
             filetype {str} -- filetype that we want to upload.
                 currently supported: drawing, model
 
-            content {bytes} -- content of the file as bytes
+            content {Optional[W24DrawingSource]} -- content of the file
+                as bytes, path, binary file object or async iterable.
+                Files are streamed into the request body.
 
         Raises:
 
@@ -136,17 +347,26 @@ class TechreadClientHttps:
         if content is None:
             return
 
-        # generate the form data by merging the presigned
-        # fields with the file
-        form = aiohttp.FormData()
-        for key, value in presigned_post.fields_.items():
-            form.add_field(key, value)
-        form.add_field('file', content)
+        # ensure that the session was started
+        if self._upload_session is None:
+            raise RuntimeError(
+                "You executed a command without opening a session")
 
-        # create a new fresh session that does not
-        # carry the authentication token
-        async with aiohttp.ClientSession() as sess:
-            async with await sess.post(presigned_post.url, data=form) as resp:
+        async with open_source(content) as file_content:
+
+            # generate the form data by merging the presigned
+            # fields with the file
+            import aiohttp  # pylint: disable=import-outside-toplevel
+            form = aiohttp.FormData()
+            for key, value in presigned_post.fields_.items():
+                form.add_field(key, value)
+            form.add_field('file', file_content, filename='file')
+
+            # use the session that does not carry the
+            # authentication token
+            async with self._upload_session.post(
+                    presigned_post.url,
+                    data=form) as resp:
 
                 # check the status code of the response and
                 # raise the appropriate exception
@@ -219,6 +439,42 @@ class TechreadClientHttps:
             bytes -- Payload
         """
 
+        # stream the payload into a buffer. This avoids holding
+        # the base64 text and the decoded bytes at the same time
+        buffer = io.BytesIO()
+        await self.download_payload_to(payload_url, buffer)
+        return buffer.getvalue()
+
+    async def download_payload_to(
+            self,
+            payload_url: HttpUrl,
+            sink: W24PayloadSink
+    ) -> int:
+        """ Stream the payload from the server into the sink.
+        The response is read in chunks and base64-decoded
+        incrementally, so the payload is never held in memory
+        as a whole.
+
+        Arguments:
+            payload_url {HttpUrl} -- Url of the payload
+
+            sink {W24PayloadSink} -- Destination of the decoded payload.
+                Either a path (os.PathLike), a binary file object or a
+                (async) callback that receives the decoded chunks.
+                Paths are only written when the download succeeded.
+
+        Raises:
+            RuntimeError: Raised when the payload_url does not point
+                to the server we talked to in the first place. See
+                download_payload() for details.
+
+            See download_payload() for the exceptions raised
+            depending on the status code.
+
+        Returns:
+            int -- Number of decoded bytes written to the sink
+        """
+
         # Parse the payload_url and enure that you are downloading
         # the data from the server you talked to in the first place.
         # This works as a defence mechanism against token theft.
@@ -239,13 +495,32 @@ class TechreadClientHttps:
                 ResourceNotFoundException):
             raise
 
-        # otherwise return the response text
-        return base64.b64decode(await response.text())
+        # decode the response chunk by chunk and hand the
+        # result to the sink
+        decoder = _Base64StreamDecoder()
+        num_bytes = 0
+        try:
+            with _open_sink(sink) as write:
+                async for chunk in response.content.iter_chunked(
+                        DOWNLOAD_CHUNK_SIZE):
+                    decoded = decoder.decode(chunk)
+                    if decoded:
+                        await write(decoded)
+                        num_bytes += len(decoded)
+
+                decoded = decoder.flush()
+                if decoded:
+                    await write(decoded)
+                    num_bytes += len(decoded)
+        finally:
+            response.release()
+
+        return num_bytes
 
     async def _get(
             self,
             url: str
-    ) -> aiohttp.ClientResponse:
+    ) -> "aiohttp.ClientResponse":
         """ Send a GET request request and return the
         response object. The method automatically
         injects the authentication token into the
@@ -288,15 +563,21 @@ class TechreadClientHttps:
             raise RuntimeError(
                 "You executed a command without opening a session")
 
-        # send the request
-        response = await self._techread_session_https.get(url)
+        # send the request with the current token
+        headers = {"Authorization": f"Bearer {self._auth_client.token}"}
+        response = await self._techread_session_https.get(
+            url,
+            headers=headers)
 
         # check the status code of the response and
-        # raise the appropriate exception
+        # raise the appropriate exception. Nobody reads the
+        # body of a failed request, so we release the
+        # connection right away
         try:
             self._raise_for_status(url, response.status)
-        except (UnauthorizedException, ServerException) as exception:
-            raise exception
+        except Exception:
+            response.release()
+            raise
 
         # if the call was successful, return
         return response
@@ -0,0 +1,474 @@
+""" W24TechreadClientPool Module
+
+DESCRIPTION
+    The module contains a pool of W24TechreadClients that allows
+    you to read several drawings concurrently. Every client in the
+    pool holds its own authenticated websocket connection and HTTPS
+    session. read_drawing() borrows a free client for the duration
+    of the request and returns it to the pool afterwards.
+
+EXAMPLE
+    pool = W24TechreadClientPool.make_from_env(pool_size=8)
+    async with pool as session:
+        async for message in session.read_drawing(drawing_bytes, asks):
+            print(message)
+"""
+import asyncio
+import functools
+import logging
+import os
+from contextlib import asynccontextmanager
+from types import TracebackType
+from typing import (Any, AsyncIterable, AsyncIterator, Callable, Iterable,
+                    List, Optional, Set, Type, Union)
+
+from werk24 import techread_batch, techread_split
+from werk24.models.ask import W24Ask
+from werk24.models.techread import W24TechreadMessage
+from werk24.techread_batch import W24BatchResult, W24BatchSource
+from werk24.techread_cache import W24ResultCache
+from werk24.techread_client import Hook, W24TechreadClient
+from werk24.techread_dedupe import InflightRequests
+from werk24.techread_source import W24DrawingSource
+
+# make the logger
+logger = logging.getLogger(  # pylint: disable=invalid-name
+    'w24_techread_client_pool')
+
+DEFAULT_POOL_SIZE = 4
+""" Default number of clients in the pool """
+
+
+class W24TechreadClientPool:
+    """ Pool of W24TechreadClients with checkout / checkin
+    semantics. The throughput scales with the number of
+    clients in the pool, as each client can process one
+    drawing at a time.
+    """
+
+    def __init__(
+            self,
+            client_factory: Callable[[], W24TechreadClient],
+            pool_size: int = DEFAULT_POOL_SIZE,
+            deduplicate_requests: bool = False):
+        """ Initialize a new W24TechreadClientPool.
+
+        Arguments:
+            client_factory {Callable[[], W24TechreadClient]} -- function
+                that returns a new registered (but not yet entered)
+                W24TechreadClient. Called pool_size times.
+
+            pool_size {int} -- Number of clients (i.e., websocket and
+                HTTPS session pairs) in the pool
+
+            deduplicate_requests {bool} -- If True, concurrent calls of
+                read_drawing() for the same drawing, model and asks
+                share one request and occupy only one client
+        """
+
+        # make sure that the pool makes sense
+        if pool_size < 1:
+            raise ValueError("The pool_size needs to be at least 1")
+
+        self._client_factory = client_factory
+        self._pool_size = pool_size
+
+        # all clients of the pool
+        self._clients: List[W24TechreadClient] = []
+
+        # queue of clients that are currently not in use.
+        # We create the queue when entering the pool, to
+        # ensure that it is bound to the correct event loop
+        self._idle: Optional["asyncio.Queue[W24TechreadClient]"] = None
+
+        # clients whose last request did not terminate cleanly.
+        # Their websocket might still carry messages of the old
+        # request, so they are reconnected before being reused
+        self._dirty: Set[W24TechreadClient] = set()
+
+        # keep track of the requests in flight if we
+        # deduplicate concurrent requests
+        self._inflight_requests = InflightRequests() \
+            if deduplicate_requests else None
+
+    async def __aenter__(
+            self
+    ) -> 'W24TechreadClientPool':
+        """ Create and enter all the clients of the pool
+        concurrently
+
+        Returns:
+            W24TechreadClientPool -- Version of self with
+                active clients
+        """
+        self._clients = [
+            self._client_factory()
+            for _ in range(self._pool_size)]
+
+        # enter the clients in parallel. If any of them fails,
+        # we close the ones that succeeded and reraise
+        results = await asyncio.gather(
+            *[cur_client.__aenter__() for cur_client in self._clients],
+            return_exceptions=True)
+        exceptions = [r for r in results if isinstance(r, BaseException)]
+        if exceptions:
+
+            # only exit the clients that were entered. Exiting the
+            # others would release resources they never acquired
+            # (e.g., the refresh task of the shared AuthClient)
+            self._clients = [
+                cur_client
+                for cur_client, result in zip(self._clients, results)
+                if not isinstance(result, BaseException)]
+            await self.__aexit__(None, None, None)
+            raise exceptions[0]
+
+        # make all clients available
+        self._idle = asyncio.Queue()
+        for cur_client in self._clients:
+            self._idle.put_nowait(cur_client)
+
+        return self
+
+    async def __aexit__(
+            self,
+            exc_type: Optional[Type[BaseException]],
+            exc_value: Optional[BaseException],
+            traceback: Optional[TracebackType]
+    ) -> None:
+        """ Close all the clients of the pool
+        """
+        await asyncio.gather(
+            *[cur_client.__aexit__(exc_type, exc_value, traceback)
+              for cur_client in self._clients],
+            return_exceptions=True)
+        self._clients = []
+        self._idle = None
+        self._dirty = set()
+
+    @classmethod
+    def make_from_env(
+        cls,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        deduplicate_requests: bool = False,
+        **kwargs: Any
+    ) -> "W24TechreadClientPool":
+        """ Small helper function that creates a new
+        W24TechreadClientPool from the environment info.
+
+        Arguments:
+            pool_size {int} -- Number of clients in the pool
+
+            deduplicate_requests {bool} -- Share concurrent identical
+                requests (see __init__())
+
+            **kwargs -- Arguments that are passed to
+                W24TechreadClient.make_from_env()
+
+        Returns:
+            W24TechreadClientPool -- The pool
+        """
+
+        # create one client right away to raise the LicenseError
+        # here rather than when entering the pool
+        W24TechreadClient.make_from_env(**kwargs)
+
+        return cls(
+            lambda: W24TechreadClient.make_from_env(**kwargs),
+            pool_size,
+            deduplicate_requests)
+
+    @property
+    def pool_size(self) -> int:
+        """ Number of clients in the pool
+
+        Returns:
+            int: Number of clients
+        """
+        return self._pool_size
+
+    @property
+    def num_idle(self) -> int:
+        """ Number of clients that are currently not in use
+
+        Returns:
+            int: Number of idle clients
+        """
+        return self._idle.qsize() if self._idle is not None else 0
+
+    @asynccontextmanager
+    async def checkout(self) -> AsyncIterator[W24TechreadClient]:
+        """ Borrow a client from the pool. The call waits until
+        a client becomes available. Before the client is handed
+        out, we check its health and reconnect if required.
+        The client is returned to the pool when the context
+        is left.
+
+        Raises:
+            RuntimeError: Raised when the pool was not entered
+
+        Yields:
+            W24TechreadClient: connected client
+        """
+        if self._idle is None:
+            raise RuntimeError(
+                "You need to enter the pool before checking out a client")
+
+        client = await self._idle.get()
+        try:
+            await self._ensure_healthy(client)
+            yield client
+
+        # if the request did not terminate cleanly (including the
+        # caller leaving the iteration early), the state of the
+        # websocket is undefined
+        except BaseException:
+            self._dirty.add(client)
+            raise
+
+        finally:
+            self._checkin(client)
+
+    def _checkin(self, client: W24TechreadClient) -> None:
+        """ Return the client to the pool
+
+        Arguments:
+            client {W24TechreadClient} -- Client that was
+                obtained by checkout()
+        """
+        # the pool might have been closed in the meantime
+        if self._idle is not None:
+            self._idle.put_nowait(client)
+
+    async def _ensure_healthy(self, client: W24TechreadClient) -> None:
+        """ Reconnect the client if its connections were closed
+        or if its last request did not terminate cleanly.
+
+        Arguments:
+            client {W24TechreadClient} -- Client to be checked
+        """
+        if client in self._dirty or not client.is_connected:
+            logger.debug("Reconnecting pooled client")
+            await client.reconnect()
+            self._dirty.discard(client)
+
+    async def read_drawing(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Borrow a client from the pool and send the drawing
+        to the W24 API. See W24TechreadClient.read_drawing()
+        for details.
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing as bytes,
+                path, binary file object or async iterable of bytes
+
+            asks {List[W24Ask]} -- List of Asks that are requested from
+                the API.
+
+        Keyword Arguments:
+            model {Optional[W24DrawingSource]} -- 3d model
+
+            **kwargs -- Additional arguments that are passed to
+                W24TechreadClient.read_drawing(); e.g., payload_dir
+                or download_payloads
+
+        Yields:
+            W24TechreadMessage -- Response object obtained from the API
+        """
+        def make_request() -> AsyncIterator[W24TechreadMessage]:
+            return self._read_drawing(drawing, asks, model, **kwargs)
+
+        # attach to the identical request if one is in flight.
+        # Payloads that are not held in memory cannot be shared.
+        if self._inflight_requests is not None \
+                and kwargs.get("payload_dir") is None \
+                and kwargs.get("download_payloads", True) is True:
+            request_key = await asyncio.get_event_loop().run_in_executor(
+                None, W24ResultCache.make_key, drawing, model, asks)
+        else:
+            request_key = None
+
+        if request_key is not None:
+            request = self._inflight_requests.join(  # type: ignore
+                request_key, make_request)
+        else:
+            request = make_request()
+
+        try:
+            async for message in request:
+                yield message
+        finally:
+            await request.aclose()  # type: ignore
+
+    async def _read_drawing(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource],
+        **kwargs: Any
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Borrow a client and send the request
+
+        Arguments:
+            drawing {W24DrawingSource} -- technical drawing
+            asks {List[W24Ask]} -- List of Asks that are requested
+            model {Optional[W24DrawingSource]} -- 3d model
+            **kwargs -- see read_drawing()
+
+        Yields:
+            W24TechreadMessage -- Response object obtained from the API
+        """
+        async with self.checkout() as client:
+            request = client.read_drawing(drawing, asks, model, **kwargs)
+            try:
+                async for message in request:
+                    yield message
+            finally:
+                await request.aclose()
+
+    async def read_drawing_pages(
+        self,
+        drawing: W24DrawingSource,
+        asks: List[W24Ask],
+        model: Optional[W24DrawingSource] = None,
+        max_concurrency: Optional[int] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Split a multi-page PDF or TIFF into its pages and read
+        them in parallel over the clients of the pool. See
+        W24TechreadClient.read_drawing_pages() for details.
+
+        Arguments:
+            drawing {W24DrawingSource} -- Multi-page technical drawing
+
+            asks {List[W24Ask]} -- List of Asks that are requested for
+                every page
+
+        Keyword Arguments:
+            model {Optional[W24DrawingSource]} -- 3d model that is
+                submitted with every page (default: {None})
+
+            max_concurrency {Optional[int]} -- Maximal number of pages
+                in flight. Defaults to the pool_size
+
+            **kwargs -- Additional arguments that are passed to
+                W24TechreadClient.read_drawing()
+
+        Raises:
+            RuntimeError: Raised when the pool was not entered
+
+        Yields:
+            W24TechreadMessage -- Response objects of all pages
+        """
+        if not self._clients:
+            raise RuntimeError(
+                "You need to enter the pool before reading a drawing")
+
+        # splitting does not use the connections, so we do
+        # not need to wait for an idle client
+        pages = await self._clients[0].split_drawing(drawing)
+        messages = techread_split.read_pages(
+            functools.partial(self.read_drawing, **kwargs),
+            pages,
+            asks,
+            model,
+            max_concurrency or self._pool_size)
+        try:
+            async for message in messages:
+                yield message
+        finally:
+            await messages.aclose()  # type: ignore
+
+    async def fetch_payload(
+        self,
+        message: W24TechreadMessage,
+        payload_dir: Optional["os.PathLike[str]"] = None
+    ) -> W24TechreadMessage:
+        """ Download the payload of a message that was not
+        downloaded automatically. See
+        W24TechreadClient.fetch_payload() for details.
+
+        NOTE: the download only uses the HTTPS session, so we
+        do not need to wait for an idle client.
+
+        Arguments:
+            message {W24TechreadMessage} -- Message with payload_url
+
+        Keyword Arguments:
+            payload_dir {Optional[os.PathLike]} -- directory for the
+                payload; None to keep it in memory (default: {None})
+
+        Raises:
+            RuntimeError: Raised when the pool was not entered
+
+        Returns:
+            W24TechreadMessage -- The same message with payload_bytes
+                or payload_path set
+        """
+        if not self._clients:
+            raise RuntimeError(
+                "You need to enter the pool before fetching a payload")
+
+        return await self._clients[0].fetch_payload(message, payload_dir)
+
+    def read_drawings(
+        self,
+        sources: Union[Iterable[W24BatchSource],
+                       AsyncIterable[W24BatchSource]],
+        asks: List[W24Ask],
+        max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[W24BatchResult]:
+        """ Read a whole batch of drawings over the clients of the
+        pool and yield the messages as they arrive. See
+        W24TechreadClient.read_drawings() for details.
+
+        Arguments:
+            sources {Union[Iterable, AsyncIterable]} -- drawings to be
+                read. Each item can be bytes, a path, or a
+                (drawing, model) pair.
+
+            asks {List[W24Ask]} -- List of Asks that are requested for
+                every drawing
+
+        Keyword Arguments:
+            max_concurrency {Optional[int]} -- Maximal number of requests
+                in flight. Defaults to the pool_size
+
+        Yields:
+            W24BatchResult -- (source_id, message) tuples where the
+                source_id is the index of the source in the batch;
+                the message is the exception if the request failed
+        """
+        return techread_batch.read_drawings(
+            self.read_drawing,
+            sources,
+            asks,
+            max_concurrency or self._pool_size)
+
+    async def read_drawing_with_hooks(
+        self,
+        drawing_bytes: bytes,
+        hooks: List[Hook],
+        max_concurrent_hooks: Optional[int] = None
+    ) -> None:
+        """ Borrow a client from the pool and read the drawing
+        with hooks. See W24TechreadClient.read_drawing_with_hooks()
+        for details.
+
+        Arguments:
+            drawing_bytes {bytes} -- Technical Drawing as Image or PDF
+            hooks {List[Hook]} -- List of Callback you want to obtain
+
+        Keyword Arguments:
+            max_concurrent_hooks {Optional[int]} -- Maximal number of
+                hooks that are executed concurrently in the background;
+                None awaits each hook (default: {None})
+        """
+        async with self.checkout() as client:
+            await client.read_drawing_with_hooks(
+                drawing_bytes, hooks, max_concurrent_hooks)
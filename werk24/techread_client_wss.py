@@ -1,28 +1,383 @@
 """ Websocket-part of the Werk24 client
+
+DESCRIPTION
+    The module keeps the websocket connection with the server.
+    The connection is monitored with ping/pong heartbeats and
+    re-established with exponential backoff when it was dropped,
+    went idle for too long or was opened with an outdated token.
+
+    A router task reads all messages from the connection and
+    dispatches them by their request_id to the queues of the
+    requests, so that several requests can share a connection.
+    Messages of unknown requests (e.g., the response to
+    INITIALIZE) are put into the unrouted queue.
+
+    The number of messages that wait in the queues is bounded.
+    When it reaches the high watermark, the router stops reading
+    from the connection until the consumers brought it down to
+    the low watermark. Further frames then wait in the (bounded)
+    buffer of the websockets library and eventually in the TCP
+    window of the server. The receive_metrics show whether the
+    consumers are the bottleneck.
+
+    Every frame is decoded exactly once. orjson is used when it is
+    installed (`pip install werk24[fast]`); the standard library
+    json module otherwise. Only the envelope of the message
+    (request_id, type, subtype, payload_url and exceptions) is
+    validated. The payload_dict is handed over as decoded, and
+    its typed validation is left to the consumer that needs it.
 """
-import json
+import asyncio
+import logging
+import random
+import time
 from types import TracebackType
-from typing import Optional, Type, AsyncGenerator
+from typing import (TYPE_CHECKING, Any, AsyncGenerator, Dict, Optional, Set,
+                    Type, Union)
 
-import websockets
-from pydantic import ValidationError
-from websockets.client import WebSocketClientProtocol
+from pydantic import BaseModel, ValidationError
 from werk24.exceptions import ServerException, UnauthorizedException
-from werk24.models.techread import W24TechreadCommand, W24TechreadMessage
+from werk24.models.techread import (W24TechreadAction, W24TechreadCommand,
+                                    W24TechreadMessage,
+                                    W24TechreadMessageSubtypeProgress,
+                                    W24TechreadMessageType)
 
 from .auth_client import AuthClient
 
+# prefer the faster decoder when it is available
+try:
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+# websockets is only imported when the connection is opened,
+# which keeps `import werk24` light
+if TYPE_CHECKING:
+    from websockets.client import WebSocketClientProtocol
+
+# make the logger
+logger = logging.getLogger(  # pylint: disable=invalid-name
+    'w24_techread_client_wss')
+
+DEFAULT_PING_INTERVAL = 20.0
+""" Number of seconds between two pings. None to disable the heartbeat """
+
+DEFAULT_PING_TIMEOUT = 20.0
+""" Number of seconds after which the connection is considered dead
+if the pong does not arrive """
+
+DEFAULT_IDLE_TIMEOUT = 540.0
+""" Number of seconds after which an unused connection is replaced
+before the next request. The API Gateway closes connections that
+were idle for 10 minutes """
+
+DEFAULT_MAX_CONNECT_ATTEMPTS = 5
+""" Number of attempts to open the connection before we give up """
+
+CONNECT_BACKOFF_BASE = 0.5
+""" Delay before the second attempt. It doubles with every attempt """
+
+CONNECT_BACKOFF_MAX = 30.0
+""" Maximal delay between two attempts """
+
+DEFAULT_RECEIVE_HIGH_WATERMARK = 256
+""" Number of received messages that wait for their consumers
+before the router stops reading from the connection """
+
+DEFAULT_RECEIVE_LOW_WATERMARK = 64
+""" Number of waiting messages at which the router resumes reading """
+
+_END_OF_STREAM = None
+""" Put into the queues when the connection was closed """
+
+_RouterItem = Union[W24TechreadMessage, Exception, None]
+""" Message, exception or _END_OF_STREAM """
+
+
+class _ConnectionClosedWhileWaiting(ServerException):
+    """ Raised when the connection was closed before the
+    expected message arrived
+    """
+
+
+class W24ReceiveQueueMetrics(BaseModel):
+    """ Metrics of the messages that were received on the
+    websocket and wait for their consumers
+    """
+
+    depth: int = 0
+    """ Number of messages that are currently waiting """
+
+    max_depth: int = 0
+    """ Maximal number of messages that were waiting at a time """
+
+    num_received: int = 0
+    """ Number of messages that were received """
+
+    num_pauses: int = 0
+    """ Number of times that the high watermark was reached and
+    the router stopped reading from the connection """
+
+    paused_seconds: float = 0.0
+    """ Total time during which the router stopped reading. If
+    this grows, the consumers are the bottleneck """
+
+
+class _Router:
+    """ Reads all messages of one connection and routes them
+    by their request_id to the queues of the requests
+    """
+
+    def __init__(
+        self,
+        session: "WebSocketClientProtocol",
+        metrics: Optional[W24ReceiveQueueMetrics] = None,
+        high_watermark: Optional[int] = None,
+        low_watermark: int = 0
+    ):
+        """ Start reading the messages of the connection
+
+        Arguments:
+            session {WebSocketClientProtocol} -- Open connection
+
+        Keyword Arguments:
+            metrics {Optional[W24ReceiveQueueMetrics]} -- Metrics that
+                are updated in place; e.g., to aggregate them over
+                several connections (default: {None})
+
+            high_watermark {Optional[int]} -- Number of waiting messages
+                at which the router stops reading; None for no limit
+                (default: {None})
+
+            low_watermark {int} -- Number of waiting messages at which
+                the router resumes reading (default: {0})
+        """
+        self.routes: Dict[str, "asyncio.Queue[_RouterItem]"] = {}
+        self.unrouted: "asyncio.Queue[_RouterItem]" = asyncio.Queue()
+        self.last_activity = time.monotonic()
+        self.is_closed = False
+
+        self.metrics = metrics or W24ReceiveQueueMetrics()
+        self._high_watermark = high_watermark
+        self._low_watermark = low_watermark
+
+        # set whenever a consumer takes a message from a queue
+        self._consumed = asyncio.Event()
+
+        # messages of requests that are finished or that we
+        # abandoned are discarded
+        self.discarded: Set[str] = set()
+
+        # if we abandoned a request, the server is still working
+        # on it. The connection is therefore not reused for
+        # further requests
+        self.has_abandoned_requests = False
+
+        self._task = asyncio.ensure_future(self._run(session))
+
+    async def _run(self, session: "WebSocketClientProtocol") -> None:
+        """ Route the messages until the connection is closed
+
+        Arguments:
+            session {WebSocketClientProtocol} -- Open connection
+        """
+        import websockets  # pylint: disable=import-outside-toplevel
+
+        try:
+            async for message_raw in session:
+                self.last_activity = time.monotonic()
+                message = await TechreadClientWss._process_message(
+                    str(message_raw))
+
+                request_id = str(message.request_id)
+                if request_id in self.discarded:
+                    continue
+                self.routes.get(request_id, self.unrouted).put_nowait(message)
+
+                # update the metrics and stop reading if the
+                # consumers cannot keep up
+                depth = self.depth
+                self.metrics.num_received += 1
+                self.metrics.max_depth = max(self.metrics.max_depth, depth)
+                if self._high_watermark is not None \
+                        and depth >= self._high_watermark:
+                    await self._wait_for_consumers()
+
+        # the connection was closed without a proper close
+        # frame; e.g., when the pong did not arrive in time
+        except websockets.exceptions.ConnectionClosed as exception:
+            self._broadcast(exception)
+
+        # the server responded with something that we do not
+        # understand. We do not know whom to tell, so we tell
+        # everybody
+        except Exception as exception:  # pylint: disable=broad-except
+            self._broadcast(exception)
+
+        finally:
+            self.is_closed = True
+            self._broadcast(_END_OF_STREAM)
+
+    @property
+    def depth(self) -> int:
+        """ Number of items that wait in the queues
+        """
+        return self.unrouted.qsize() + sum(
+            queue.qsize() for queue in self.routes.values())
+
+    async def _wait_for_consumers(self) -> None:
+        """ Wait until the consumers brought the number of waiting
+        messages down to the low watermark
+        """
+        self.metrics.num_pauses += 1
+        start = time.monotonic()
+        logger.debug("Receive queue is full. Pausing the connection")
+
+        while self.depth > self._low_watermark:
+            self._consumed.clear()
+            await self._consumed.wait()
+
+        self.metrics.paused_seconds += time.monotonic() - start
+
+    def notify_consumed(self) -> None:
+        """ Tell the router that messages were taken from the queues
+        """
+        self._consumed.set()
+
+    async def get(
+        self,
+        queue: "asyncio.Queue[_RouterItem]"
+    ) -> _RouterItem:
+        """ Take the next item from one of the queues of the router
+
+        Arguments:
+            queue {asyncio.Queue[_RouterItem]} -- Queue of the request
+                or the unrouted queue
+
+        Returns:
+            _RouterItem -- Message, exception or _END_OF_STREAM
+        """
+        item = await queue.get()
+        self.notify_consumed()
+        return item
+
+    def _broadcast(self, item: _RouterItem) -> None:
+        """ Put the item into all queues
+
+        Arguments:
+            item {_RouterItem} -- Exception or _END_OF_STREAM
+        """
+        for queue in list(self.routes.values()) + [self.unrouted]:
+            queue.put_nowait(item)
+
+    def add_route(self, request_id: str) -> "asyncio.Queue[_RouterItem]":
+        """ Register the queue of the request
+
+        Arguments:
+            request_id {str} -- Request id assigned by the server
+
+        Returns:
+            asyncio.Queue[_RouterItem] -- Queue of the request
+        """
+        queue: "asyncio.Queue[_RouterItem]" = asyncio.Queue()
+        if self.is_closed:
+            queue.put_nowait(_END_OF_STREAM)
+        self.routes[request_id] = queue
+        return queue
+
+    async def close(self) -> None:
+        """ Stop routing
+        """
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
 
 class TechreadClientWss:
     """ TechreadClient subpart that handles the websocket
     communication with the server.
     """
 
-    def __init__(self, techread_server_wss: str, techread_version: str):
+    def __init__(
+            self,
+            techread_server_wss: str,
+            techread_version: str,
+            ping_interval: Optional[float] = DEFAULT_PING_INTERVAL,
+            ping_timeout: Optional[float] = DEFAULT_PING_TIMEOUT,
+            idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+            max_connect_attempts: int = DEFAULT_MAX_CONNECT_ATTEMPTS,
+            receive_high_watermark: Optional[int] = (
+                DEFAULT_RECEIVE_HIGH_WATERMARK),
+            receive_low_watermark: int = DEFAULT_RECEIVE_LOW_WATERMARK):
+        """ Initialize a new websocket client
+
+        Arguments:
+            techread_server_wss {str} -- domain name of the server
+            techread_version {str} -- version of the API
+
+        Keyword Arguments:
+            ping_interval {Optional[float]} -- Number of seconds between
+                two pings; None to disable the heartbeat
+                (default: {DEFAULT_PING_INTERVAL})
+
+            ping_timeout {Optional[float]} -- Number of seconds to wait
+                for the pong before the connection is considered dead
+                (default: {DEFAULT_PING_TIMEOUT})
+
+            idle_timeout {Optional[float]} -- Number of seconds after
+                which an unused connection is replaced before the next
+                request; None to keep it (default: {DEFAULT_IDLE_TIMEOUT})
+
+            max_connect_attempts {int} -- Number of attempts to open the
+                connection (default: {DEFAULT_MAX_CONNECT_ATTEMPTS})
+
+            receive_high_watermark {Optional[int]} -- Number of received
+                messages that wait for their consumers before we stop
+                reading from the connection; None for no limit. NOTE:
+                pongs are not read either while we pause. A pause that
+                exceeds the ping_timeout closes the connection.
+                (default: {DEFAULT_RECEIVE_HIGH_WATERMARK})
+
+            receive_low_watermark {int} -- Number of waiting messages at
+                which we resume reading
+                (default: {DEFAULT_RECEIVE_LOW_WATERMARK})
+
+        Raises:
+            ValueError -- Raised when the low watermark is not below
+                the high watermark
+        """
+        if receive_high_watermark is not None \
+                and not 0 <= receive_low_watermark < receive_high_watermark:
+            raise ValueError(
+                "receive_low_watermark needs to be at least 0 and below "
+                "receive_high_watermark")
+
         self._auth_client: Optional[AuthClient] = None
         self._techread_server_wss = techread_server_wss
         self._techread_version = techread_version
-        self._techread_session_wss: Optional[WebSocketClientProtocol] = None
+        self._techread_session_wss: Optional["WebSocketClientProtocol"] = None
+        self._ping_interval = ping_interval
+        self._ping_timeout = ping_timeout
+        self._idle_timeout = idle_timeout
+        self._max_connect_attempts = max_connect_attempts
+        self._receive_high_watermark = receive_high_watermark
+        self._receive_low_watermark = receive_low_watermark
+
+        # metrics of the receive queues of all connections
+        self._receive_metrics = W24ReceiveQueueMetrics()
+
+        # time of the last message that we sent or received
+        self._last_activity = time.monotonic()
+
+        # connection that is opened in the background
+        self._connect_task: Optional["asyncio.Future[None]"] = None
+
+        # router of the current connection
+        self._router: Optional[_Router] = None
+
+        # token that was used for the handshake of the current
+        # connection. The server only checks the token during the
+        # handshake, so a refreshed token requires a new connection
+        self._connected_token: Optional[str] = None
 
     async def __aenter__(
             self
@@ -43,21 +398,90 @@ class TechreadClientWss:
                 "You need to call register_auth_client() before you can start"
                 + " the session")
 
+        # open the connection
+        await self._connect_with_backoff()
+
+        # return ourselfves
+        return self
+
+    async def _connect(self) -> None:
+        """ Open the websocket connection with the current
+        token of the AuthClient
+        """
+
+        import websockets  # pylint: disable=import-outside-toplevel
+
         # make the endpoint
         endpoint = "wss://{}/{}".format(
             self._techread_server_wss,
             self._techread_version)
 
         # make the ehaders
-        headers = [("Authorization", f"Bearer {self._auth_client.token}")]
+        token = self._auth_client.token
+        headers = [("Authorization", f"Bearer {token}")]
 
         # now make the session
         self._techread_session_wss = await websockets.connect(
             endpoint,
-            extra_headers=headers)
+            extra_headers=headers,
+            ping_interval=self._ping_interval,
+            ping_timeout=self._ping_timeout)
+        self._connected_token = token
+        self._last_activity = time.monotonic()
+        self._router = _Router(
+            self._techread_session_wss,
+            self._receive_metrics,
+            self._receive_high_watermark,
+            self._receive_low_watermark)
+
+    async def _connect_with_backoff(self) -> None:
+        """ Open the websocket connection. Failed attempts are
+        retried with exponential backoff, so that a short outage
+        of the network or the server does not fail the request.
 
-        # return ourselfves
-        return self
+        Raises:
+            OSError: Raised when the server could not be reached
+                in any of the attempts
+        """
+        import websockets  # pylint: disable=import-outside-toplevel
+
+        token_rejected = False
+        attempt = 0
+        while True:
+            token = self._auth_client.token
+            try:
+                await self._connect()
+                return
+
+            except (OSError,
+                    asyncio.TimeoutError,
+                    websockets.exceptions.InvalidHandshake) as exception:
+                status_code = getattr(exception, "status_code", 500)
+
+                # the server did not accept the token. Log in again
+                # once; if the new token is rejected as well, the
+                # credentials themselves are the problem
+                if status_code in (401, 403) and not token_rejected:
+                    token_rejected = True
+                    await self._auth_client.reject_token(token)
+                    continue
+
+                # client errors (e.g., invalid credentials) will not be
+                # fixed by trying again
+                attempt += 1
+                if status_code < 500 \
+                        or attempt == self._max_connect_attempts:
+                    raise
+
+                # add some jitter, so that the clients of a pool do
+                # not hit the server at the same time
+                delay = min(
+                    CONNECT_BACKOFF_BASE * 2 ** (attempt - 1),
+                    CONNECT_BACKOFF_MAX) * random.uniform(0.5, 1.0)
+                logger.warning(
+                    "Connecting the websocket failed (%s). "
+                    "Retrying in %.1f seconds", exception, delay)
+                await asyncio.sleep(delay)
 
     async def __aexit__(
             self,
@@ -68,9 +492,169 @@ class TechreadClientWss:
 
         """ Close the session
         """
+        if self._connect_task is not None:
+            self._connect_task.cancel()
+            await asyncio.gather(self._connect_task, return_exceptions=True)
+            self._connect_task = None
+
+        await self._close_session()
+
+    async def _close_session(self) -> None:
+        """ Close the current connection and its router
+        """
         if self._techread_session_wss is not None:
             await self._techread_session_wss.close()
 
+        if self._router is not None:
+            await self._router.close()
+
+    @property
+    def is_open(self) -> bool:
+        """ Check whether the websocket connection is open and
+        can be used to submit a new request. The connection is
+        unusable once the router stopped reading from it (e.g.,
+        after a message that we could not interpret), even if
+        the socket itself is still open.
+
+        Returns:
+            bool: True if the connection is open
+        """
+        return self._techread_session_wss is not None \
+            and self._techread_session_wss.open \
+            and (self._router is None or not self._router.is_closed)
+
+    @property
+    def is_token_current(self) -> bool:
+        """ Check whether the connection was established with
+        the current token of the AuthClient
+
+        Returns:
+            bool: False if the token was refreshed since the
+                connection was established
+        """
+        return self._auth_client is not None \
+            and self._connected_token == self._auth_client.token
+
+    @property
+    def is_idle(self) -> bool:
+        """ Check whether the connection was unused for longer
+        than the idle timeout
+
+        Returns:
+            bool: True if the connection should be replaced
+        """
+        last_activity = self._last_activity
+        if self._router is not None:
+            last_activity = max(last_activity, self._router.last_activity)
+        return self._idle_timeout is not None \
+            and time.monotonic() - last_activity > self._idle_timeout
+
+    @property
+    def has_abandoned_requests(self) -> bool:
+        """ Check whether a request on the connection was abandoned
+        before the server finished it. The server might still send
+        its messages and close the connection when it is done.
+
+        Returns:
+            bool: True if the connection should be replaced
+        """
+        return self._router is not None \
+            and self._router.has_abandoned_requests
+
+    @property
+    def num_inflight(self) -> int:
+        """ Number of requests that are listening on the connection
+
+        Returns:
+            int: Number of requests in flight
+        """
+        return len(self._router.routes) if self._router is not None else 0
+
+    @property
+    def receive_metrics(self) -> W24ReceiveQueueMetrics:
+        """ Metrics of the received messages that wait for their
+        consumers. The counters cover all connections of the client;
+        the depth refers to the current connection.
+
+        Returns:
+            W24ReceiveQueueMetrics: Snapshot of the metrics
+        """
+        depth = self._router.depth if self._router is not None else 0
+        return self._receive_metrics.copy(update={"depth": depth})
+
+    async def ensure_connection(self) -> None:
+        """ Make sure that the connection can be used for a new
+        request. We reconnect if the connection was closed (e.g., by
+        the server after the last request or by a missing pong), went
+        idle or was opened with an outdated token.
+        """
+        # wait for the connection that is opened in the background
+        if self._connect_task is not None:
+            connect_task, self._connect_task = self._connect_task, None
+            try:
+                await connect_task
+            except Exception as exception:  # pylint: disable=broad-except
+                logger.warning(
+                    "Connecting in the background failed: %s", exception)
+
+        # never pull the connection from under the requests in flight
+        if self.is_open and self.num_inflight > 0:
+            return
+
+        if self.is_open \
+                and self.is_token_current \
+                and not self.is_idle \
+                and not self.has_abandoned_requests:
+            return
+
+        await self.reconnect()
+
+    def reconnect_in_background(self) -> None:
+        """ Start opening a new connection in the background,
+        so that the next request does not need to wait for the
+        handshake. Call ensure_connection() before using it.
+        """
+        if self.is_open and self.num_inflight > 0:
+            return
+
+        if self._connect_task is None or self._connect_task.done():
+            self._connect_task = asyncio.ensure_future(self._reconnect())
+
+    async def reconnect(self) -> None:
+        """ Close the current websocket connection (if any) and
+        open a new one. The server closes the connection after
+        each request, so this needs to be called before the
+        connection can be reused.
+
+        Raises:
+            RuntimeError  -- Raise when the developer reconnects
+                without having called register_auth_client()
+        """
+
+        # make sure that we have an AuthClient
+        if self._auth_client is None:
+            raise RuntimeError(
+                "You need to call register_auth_client() before you can"
+                + " reconnect")
+
+        # the connection that is opened in the background
+        # is superseded
+        if self._connect_task is not None:
+            self._connect_task.cancel()
+            await asyncio.gather(self._connect_task, return_exceptions=True)
+            self._connect_task = None
+
+        await self._reconnect()
+
+    async def _reconnect(self) -> None:
+        """ Replace the current connection with a new one
+        """
+        # close the old connection
+        await self._close_session()
+
+        # and open a new one
+        await self._connect_with_backoff()
+
     def register_auth_client(self, auth_client: AuthClient) -> None:
         """Register the reference to the authentication service
 
@@ -83,7 +667,8 @@ class TechreadClientWss:
     async def send_command(
             self,
             action: str,
-            message: str = "{}"
+            message: str = "{}",
+            reconnect_if_closed: bool = False
     ) -> None:
         """ Send a command to the websocket.
 
@@ -99,11 +684,16 @@ class TechreadClientWss:
             message {str} -- Auxilliary data that you wnat to send along
                 with the message. To keep it easily expandable, we use
                 a json encoded string.
+            reconnect_if_closed {bool} -- If True, we reconnect and
+                send the command again if the connection turns out to
+                be closed. Only use this for the first command of a
+                request.
 
         Raises:
             RuntimeError  -- Raise when the developer tries to send a command
                 without entering the profile
         """
+        import websockets  # pylint: disable=import-outside-toplevel
 
         # make sure that we have an AuthClient
         if self._techread_session_wss is None:
@@ -113,34 +703,46 @@ class TechreadClientWss:
         # make the command
         command = W24TechreadCommand(action=action, message=message)
 
-        # send the the command
-        await self._techread_session_wss.send(command.json())
+        # send the the command. The connection might have been
+        # dropped without us noticing (e.g., between two pings)
+        try:
+            await self._techread_session_wss.send(command.json())
+        except websockets.exceptions.ConnectionClosed:
+            if not reconnect_if_closed:
+                raise
+            logger.info("Connection was closed. Reconnecting")
+            await self.reconnect()
+            await self._techread_session_wss.send(command.json())
+        self._last_activity = time.monotonic()
 
     async def recv_message(self) -> W24TechreadMessage:
-        """ Receive a message from the websocket and interpret
-        the result as W24TechreadMessage
+        """ Receive the next message that does not belong to
+        a registered request (e.g., the response to INITIALIZE)
 
         Raises:
             RuntimeError  -- Raise when the developer tries to send a command
                 without entering the profile
 
+            ServerException: Raised when the connection was closed
+                before a message arrived
+
         Returns:
             W24TechreadMessage -- interpreted message
         """
 
         # make sure that we have an AuthClient
-        if self._techread_session_wss is None:
+        if self._router is None:
             raise RuntimeError(
                 "You need to call enter the profile before receiving command")
 
-        # wait for the websocket to say something
-        message_raw = str(await self._techread_session_wss.recv())
-
-        # process the message
-        message = await self._process_message(message_raw)
-
-        # and finally return
-        return message
+        # wait for the router to hand us something
+        item = await self._router.get(self._router.unrouted)
+        if item is _END_OF_STREAM:
+            raise _ConnectionClosedWhileWaiting(
+                "Connection closed while waiting for message")
+        if isinstance(item, Exception):
+            raise item
+        return item  # type: ignore
 
     @staticmethod
     async def _process_message(message_raw: str) -> W24TechreadMessage:
@@ -163,35 +765,71 @@ class TechreadClientWss:
             W24TeachreadMessage -- interpreted message
         """
 
-        # interpret and return
+        # decode the frame once; both the message and the
+        # gateway response are read from the same dict
         try:
-            message = W24TechreadMessage.parse_raw(message_raw)
+            response = json_loads(message_raw)
+        except ValueError:
+            response = None
 
-        # if that failes, we are probably receiving a
-        # message from the gateway directly
-        except ValidationError:
+        # interpret and return
+        if isinstance(response, dict):
+            try:
+                return TechreadClientWss._parse_message(response)
+
+            # if that failes, we are probably receiving a
+            # message from the gateway directly
+            except ValidationError:
+                pass
 
             # The Gateway responds with the format
             # {"message": str, "connectionId":str, "requestId":str}
-            # Obtain the message
-            response = json.loads(message_raw)
-            message = response.get('message')
-
             # raise a specific exception if the
             # requested action was forbidden
-            if message == 'Forbidden':
+            if response.get('message') == 'Forbidden':
                 raise UnauthorizedException("Requested Action forbidden")
 
-            # otherwise fail with an UnknownException
-            raise ServerException(
-                f"Unexpected server response '{message_raw}'.")
+        # otherwise fail with an UnknownException
+        raise ServerException(
+            f"Unexpected server response '{message_raw}'.")
 
+    @staticmethod
+    def _parse_message(response: Dict[str, Any]) -> W24TechreadMessage:
+        """ Turn the decoded response into a W24TechreadMessage.
+
+        Only the envelope is validated. Validating the payload_dict
+        as Dict would merely copy the (potentially large) dict that
+        the json decoder has just produced; its typed validation is
+        done by the consumer (e.g., W24AskVariantMeasuresResponse).
+
+        Arguments:
+            response {Dict[str, Any]} -- Decoded message
+
+        Raises:
+            ValidationError -- Raised when the envelope is invalid
+
+        Returns:
+            W24TechreadMessage -- Interpreted message
+        """
+        payload_dict = response.get("payload_dict")
+
+        # leave the unusual cases to the full validation
+        if payload_dict is not None and not isinstance(payload_dict, dict):
+            return W24TechreadMessage.parse_obj(response)
+
+        envelope = {
+            key: value
+            for key, value in response.items()
+            if key != "payload_dict"
+        }
+        message = W24TechreadMessage.parse_obj(envelope)
+        message.payload_dict = payload_dict
         return message
 
     async def listen(self) -> AsyncGenerator:
         """ Simple generator that waits for
-        messages on the websocket, interprets
-        them and yields them
+        messages that do not belong to a registered request
+        and yields them until the connection is closed
 
         Yields:
             W24TechreadMessage -- interpreted message from the socket
@@ -202,12 +840,166 @@ class TechreadClientWss:
         """
 
         # make sure that we have an AuthClient
-        if self._techread_session_wss is None:
+        if self._router is None:
             raise RuntimeError(
                 "You need to call enter the profile before listening")
 
         # wait for incoming messages
-        async for message_raw in self._techread_session_wss:
+        router = self._router
+        async for message in self._iterate_queue(router, router.unrouted):
+            yield message
+
+    async def initialize_request(self, message: str) -> W24TechreadMessage:
+        """ Send the INITIALIZE command, wait for the response and
+        route all further messages of the request into a queue of
+        its own (see listen_request()).
+
+        NOTE: the server closes the connection shortly after a
+        request is completed. If it does so while we are waiting
+        for the response, we reconnect and try again.
+        If the gateway rejects the token, we log in again and
+        retry on a new connection.
+
+        Arguments:
+            message {str} -- json-encoded W24TechreadRequest
 
-            # process the message and return them to the caller
-            yield await self._process_message(str(message_raw))
+        Returns:
+            W24TechreadMessage -- Response of the server, which
+                carries the request_id
+        """
+        try:
+            for attempt in range(2):
+                await self.send_command(
+                    W24TechreadAction.INITIALIZE.value,
+                    message,
+                    reconnect_if_closed=True)
+                try:
+                    response = await self.recv_message()
+                    break
+                except _ConnectionClosedWhileWaiting:
+                    if attempt > 0:
+                        raise
+                    logger.info("Connection was closed. Reconnecting")
+                    await self.reconnect()
+
+                # the gateway did not accept the token of the
+                # connection; e.g., because it was revoked
+                except UnauthorizedException:
+                    if attempt > 0:
+                        raise
+                    await self._auth_client.reject_token(
+                        self._connected_token)
+                    await self.reconnect()
+
+        # if we are cancelled (e.g., by a timeout), the response might
+        # still arrive and would be taken for the response to the next
+        # INITIALIZE. The connection is therefore replaced.
+        except asyncio.CancelledError:
+            if self._router is not None:
+                self._router.has_abandoned_requests = True
+            raise
+
+        self.register_request(response.request_id)
+        return response
+
+    def register_request(self, request_id: Any) -> None:
+        """ Route the messages of the request into a queue of
+        its own. Call this before the server might send them;
+        i.e., before the READ command.
+
+        Arguments:
+            request_id {Any} -- Request id assigned by the server
+        """
+        if self._router is None:
+            raise RuntimeError(
+                "You need to call enter the profile before registering")
+        self._router.add_route(str(request_id))
+
+    async def listen_request(self, request_id: Any) -> AsyncGenerator:
+        """ Yield the messages of the registered request until
+        the request is completed or the connection is closed
+
+        Arguments:
+            request_id {Any} -- Request id passed to register_request()
+
+        Yields:
+            W24TechreadMessage -- interpreted message from the socket
+        """
+        router = self._router
+        if router is None or str(request_id) not in router.routes:
+            raise RuntimeError("The request was not registered")
+
+        queue = router.routes[str(request_id)]
+        try:
+            async for message in self._iterate_queue(router, queue):
+                yield message
+                if self._is_final_message(message):
+                    break
+
+            # the request is finished; either by the final message
+            # or by the server closing the connection
+            router.routes.pop(str(request_id), None)
+            router.discarded.add(str(request_id))
+        finally:
+            self.release_request(request_id, router)
+
+    def release_request(
+        self,
+        request_id: Any,
+        router: Optional[_Router] = None
+    ) -> None:
+        """ Stop routing the messages of the request. If the request
+        was not finished, its remaining messages are discarded.
+
+        Arguments:
+            request_id {Any} -- Request id passed to register_request()
+
+        Keyword Arguments:
+            router {Optional[_Router]} -- Router of the connection on
+                which the request was registered (default: current)
+        """
+        router = router or self._router
+        if router is not None and \
+                router.routes.pop(str(request_id), None) is not None:
+            router.discarded.add(str(request_id))
+            router.has_abandoned_requests = True
+
+            # the remaining messages of the request are dropped
+            router.notify_consumed()
+
+    @staticmethod
+    async def _iterate_queue(
+        router: _Router,
+        queue: "asyncio.Queue[_RouterItem]"
+    ) -> AsyncGenerator:
+        """ Yield the messages of the queue until the end of the stream
+
+        Arguments:
+            router {_Router} -- Router that owns the queue
+            queue {asyncio.Queue[_RouterItem]} -- Queue of the router
+
+        Yields:
+            W24TechreadMessage -- interpreted message from the socket
+        """
+        while True:
+            item = await router.get(queue)
+            if item is _END_OF_STREAM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    @staticmethod
+    def _is_final_message(message: W24TechreadMessage) -> bool:
+        """ Check whether the server is done with the request
+
+        Arguments:
+            message {W24TechreadMessage} -- Message of the request
+
+        Returns:
+            bool: True for the COMPLETED and REJECTION messages
+        """
+        return message.message_type == W24TechreadMessageType.REJECTION \
+            or (message.message_type == W24TechreadMessageType.PROGRESS
+                and message.message_subtype
+                == W24TechreadMessageSubtypeProgress.COMPLETED)
@@ -0,0 +1,211 @@
+""" Deadline-part of the Werk24 client
+
+DESCRIPTION
+    The module limits the time that the caller waits for a request.
+    Two limits are supported:
+    1. a deadline for the whole request. When it passes, the
+       request is cancelled and the asks that were not answered
+       yet receive a TIMEOUT exception message.
+    2. deadlines for individual asks. When one passes, the ask
+       receives a TIMEOUT exception message, while the request
+       continues for the remaining asks.
+
+    The request is consumed in a background task, so that the
+    deadlines of the asks can fire without interrupting it.
+    Cancelling the task unwinds the request, which releases its
+    slot on the websocket and marks the connection for replacement
+    (the server is still working on the request).
+
+EXAMPLE
+    async for message in client.read_drawing(
+            drawing_bytes,
+            asks,
+            timeout=60,
+            ask_timeout={W24AskType.PAGE_THUMBNAIL: 10}):
+        ...
+"""
+import asyncio
+import logging
+import time
+from typing import (AsyncIterator, Callable, Dict, List, Mapping, Optional,
+                    Set, Union)
+
+from werk24.models.ask import W24Ask, W24AskType
+from werk24.models.techread import W24TechreadMessage, W24TechreadMessageType
+
+# make the logger
+logger = logging.getLogger(  # pylint: disable=invalid-name
+    'w24_techread_deadline')
+
+AskTimeout = Union[float, Mapping[W24AskType, float]]
+""" Timeout of all asks, or timeouts by ask type """
+
+_END_OF_REQUEST = None
+""" Put into the queue when the request ended """
+
+
+def get_deadline(
+    timeout: Optional[float],
+    deadline: Optional[float]
+) -> Optional[float]:
+    """ Combine the relative timeout and the absolute deadline
+
+    Arguments:
+        timeout {Optional[float]} -- Number of seconds from now
+        deadline {Optional[float]} -- Point in time of time.monotonic()
+
+    Returns:
+        Optional[float] -- The earlier of the two in terms of
+            time.monotonic(); None if neither is set
+    """
+    deadlines = [
+        cur_deadline
+        for cur_deadline in (
+            time.monotonic() + timeout if timeout is not None else None,
+            deadline)
+        if cur_deadline is not None]
+    return min(deadlines) if deadlines else None
+
+
+def get_ask_deadlines(
+    asks: List[W24Ask],
+    ask_timeout: Optional[AskTimeout]
+) -> Dict[W24AskType, float]:
+    """ Get the deadlines of the individual asks
+
+    Arguments:
+        asks {List[W24Ask]} -- Asks of the request
+        ask_timeout {Optional[AskTimeout]} -- Number of seconds from
+            now; either for all asks or by ask type
+
+    Returns:
+        Dict[W24AskType, float] -- Deadlines in terms of
+            time.monotonic(); asks without timeout are not listed
+    """
+    if ask_timeout is None:
+        return {}
+
+    now = time.monotonic()
+    if not isinstance(ask_timeout, Mapping):
+        return {ask.ask_type: now + ask_timeout for ask in asks}
+
+    return {
+        ask.ask_type: now + ask_timeout[ask.ask_type]
+        for ask in asks
+        if ask.ask_type in ask_timeout}
+
+
+async def apply_deadlines(
+    request: AsyncIterator[W24TechreadMessage],
+    asks: List[W24Ask],
+    deadline: Optional[float],
+    ask_deadlines: Dict[W24AskType, float],
+    make_timeout_messages: Callable[
+        [List[W24Ask]], AsyncIterator[W24TechreadMessage]]
+) -> AsyncIterator[W24TechreadMessage]:
+    """ Yield the messages of the request until the deadline passes
+
+    Arguments:
+        request {AsyncIterator[W24TechreadMessage]} -- Messages of
+            the request
+
+        asks {List[W24Ask]} -- Asks of the request
+
+        deadline {Optional[float]} -- Deadline of the request in terms
+            of time.monotonic(); None for no limit
+
+        ask_deadlines {Dict[W24AskType, float]} -- Deadlines of the
+            individual asks (see get_ask_deadlines())
+
+        make_timeout_messages {Callable} -- Function that makes the
+            exception messages of the asks that timed out
+
+    Yields:
+        W24TechreadMessage -- Messages of the request and the TIMEOUT
+            exception messages of the asks that were not answered in time
+    """
+    # asks that were neither answered nor timed out. The TRAIN
+    # ask does not trigger a response
+    pending = [ask for ask in asks if ask.ask_type != W24AskType.TRAIN]
+
+    # the caller already received the exception message of these
+    # asks, so late responses are dropped
+    timed_out: Set[str] = set()
+
+    # consume the request in the background. The queue only holds
+    # one message, so that the backpressure reaches the request
+    queue: "asyncio.Queue[Union[W24TechreadMessage, Exception, None]]" = \
+        asyncio.Queue(maxsize=1)
+
+    async def consume() -> None:
+        try:
+            async for message in request:
+                await queue.put(message)
+            await queue.put(_END_OF_REQUEST)
+
+        # CancelledError derives from Exception before Python 3.8
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        except Exception as exception:  # pylint: disable=broad-except
+            await queue.put(exception)
+
+    consumer = asyncio.ensure_future(consume())
+    try:
+        while True:
+
+            # give up the asks whose deadline passed
+            now = time.monotonic()
+            expired = [
+                ask for ask in pending
+                if ask.ask_type in ask_deadlines
+                and ask_deadlines[ask.ask_type] <= now]
+            if expired:
+                pending = [ask for ask in pending if ask not in expired]
+                timed_out.update(ask.ask_type.value for ask in expired)
+                logger.warning(
+                    "Asks timed out: %s",
+                    ", ".join(ask.ask_type.value for ask in expired))
+                async for message in make_timeout_messages(expired):
+                    yield message
+
+            # give up the whole request; the finally block cancels it
+            if deadline is not None and deadline <= now:
+                logger.warning("Request timed out. Cancelling it")
+                async for message in make_timeout_messages(pending):
+                    yield message
+                return
+
+            # wait for the next message, but not beyond the next deadline
+            deadlines = [
+                ask_deadlines[ask.ask_type]
+                for ask in pending
+                if ask.ask_type in ask_deadlines]
+            if deadline is not None:
+                deadlines.append(deadline)
+            try:
+                item = await asyncio.wait_for(
+                    queue.get(),
+                    max(0.0, min(deadlines) - time.monotonic())
+                    if deadlines else None)
+            except asyncio.TimeoutError:
+                continue
+
+            if item is _END_OF_REQUEST:
+                return
+            if isinstance(item, Exception):
+                raise item
+
+            # answered asks cannot time out anymore
+            if item.message_type == W24TechreadMessageType.ASK:
+                subtype = item.message_subtype.value
+                if subtype in timed_out:
+                    continue
+                pending = [
+                    ask for ask in pending if ask.ask_type.value != subtype]
+            yield item
+
+    finally:
+        consumer.cancel()
+        await asyncio.gather(consumer, return_exceptions=True)
+        await request.aclose()  # type: ignore
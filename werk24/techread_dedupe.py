@@ -0,0 +1,158 @@
+""" Deduplication part of the Werk24 client
+
+DESCRIPTION
+    The module allows several callers to share one request.
+    When a drawing is submitted while an identical request (same
+    drawing, model and asks) is still in flight, the second caller
+    attaches to the message stream of the first request rather than
+    submitting the drawing again. The messages are kept in a replay
+    buffer, so that late subscribers receive all messages from the
+    beginning.
+
+    The shared request runs in a background task. It is only
+    cancelled when all subscribers have left.
+"""
+import asyncio
+from typing import AsyncIterator, Callable, Dict, List, Optional
+
+from werk24.models.techread import W24TechreadMessage
+
+
+class _SharedRequest:
+    """ Request whose messages are replayed to all subscribers
+    """
+
+    def __init__(self, request: AsyncIterator[W24TechreadMessage]):
+        """ Start consuming the request in the background
+
+        Arguments:
+            request {AsyncIterator[W24TechreadMessage]} -- request
+                whose messages are shared
+        """
+        self._messages: List[W24TechreadMessage] = []
+        self._exception: Optional[Exception] = None
+        self._num_subscribers = 0
+
+        # set when the last subscriber left. The task might take a
+        # while to unwind, so new callers must not attach anymore
+        self.is_cancelling = False
+
+        # future that is resolved (and replaced) whenever a new
+        # message arrives or the request ends
+        loop = asyncio.get_event_loop()
+        self._update: "asyncio.Future[None]" = loop.create_future()
+
+        self.task = asyncio.ensure_future(self._run(request))
+
+    async def _run(self, request: AsyncIterator[W24TechreadMessage]) -> None:
+        """ Consume the request and notify the subscribers
+
+        Arguments:
+            request {AsyncIterator[W24TechreadMessage]} -- request
+                whose messages are shared
+        """
+        try:
+            async for message in request:
+                self._messages.append(message)
+                self._notify()
+
+        except asyncio.CancelledError:
+            raise
+
+        # hand the exception over to the subscribers
+        except Exception as exception:  # pylint: disable=broad-except
+            self._exception = exception
+
+        finally:
+            await request.aclose()  # type: ignore
+            self._notify()
+
+    def _notify(self) -> None:
+        """ Wake up the subscribers that wait for news
+        """
+        self._update.set_result(None)
+        self._update = asyncio.get_event_loop().create_future()
+
+    def subscribe(self) -> AsyncIterator[W24TechreadMessage]:
+        """ Attach to the request
+
+        Returns:
+            AsyncIterator[W24TechreadMessage] -- all messages of the
+                request, starting with the first one
+        """
+        self._num_subscribers += 1
+        return self._replay()
+
+    async def _replay(self) -> AsyncIterator[W24TechreadMessage]:
+        """ Yield the buffered messages and wait for new ones
+
+        Yields:
+            W24TechreadMessage -- messages of the request
+        """
+        try:
+            index = 0
+            while True:
+                if index < len(self._messages):
+                    yield self._messages[index]
+                    index += 1
+                    continue
+
+                if self.task.done():
+                    if self._exception is not None:
+                        raise self._exception
+
+                    # do not pass a truncated request off as complete
+                    if self.task.cancelled():
+                        raise asyncio.CancelledError()
+                    return
+
+                # asyncio.wait does not cancel the future when
+                # we are cancelled, so the others keep waiting
+                await asyncio.wait([self._update])
+
+        # stop the request if nobody is interested anymore
+        finally:
+            self._num_subscribers -= 1
+            if self._num_subscribers == 0 and not self.task.done():
+                self.is_cancelling = True
+                self.task.cancel()
+
+
+class InflightRequests:
+    """ Registry of the requests that are currently in flight
+    """
+
+    def __init__(self) -> None:
+        self._requests: Dict[str, _SharedRequest] = {}
+
+    def join(
+        self,
+        key: str,
+        request_factory: Callable[[], AsyncIterator[W24TechreadMessage]]
+    ) -> AsyncIterator[W24TechreadMessage]:
+        """ Attach to the request with the same key, or start a
+        new request if there is none in flight.
+
+        Arguments:
+            key {str} -- Content-addressed key of the request (see
+                W24ResultCache.make_key())
+            request_factory {Callable} -- Function that starts the
+                request; only called if no request is in flight
+
+        Returns:
+            AsyncIterator[W24TechreadMessage] -- all messages of the
+                request, starting with the first one
+        """
+        shared = self._requests.get(key)
+        if shared is None or shared.task.done() or shared.is_cancelling:
+            shared = _SharedRequest(request_factory())
+            self._requests[key] = shared
+
+            # forget the request once it completed, so that later
+            # calls submit a fresh request (or hit the cache)
+            def forget(_: "asyncio.Future[None]") -> None:
+                if self._requests.get(key) is shared:
+                    del self._requests[key]
+            shared.task.add_done_callback(forget)
+
+        return shared.subscribe()
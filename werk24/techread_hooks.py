@@ -0,0 +1,278 @@
+""" Hook-part of the Werk24 client
+
+DESCRIPTION
+    The module dispatches the messages of a request to the hooks
+    that the caller registered. The hooks are compiled into an
+    index once per request, so that finding the hooks of a
+    message is a single dictionary lookup rather than a scan
+    over all hooks.
+
+    Several hooks can subscribe to the same message. They are
+    called in the order in which they were registered.
+
+    By default, each hook is awaited before the next message is
+    consumed. If you set max_concurrent_hooks, the HookRunner
+    executes the hooks as background tasks instead (synchronous
+    hooks in the default thread pool), so that one slow hook
+    does not hold up the following messages. Once the maximal
+    number of hooks is running, the consumption of messages waits
+    for a free slot. Hooks that set `ordered` are still called
+    one message after the other.
+
+EXAMPLE
+    await client.read_drawing_with_hooks(drawing_bytes, [
+        Hook(ask=W24AskVariantMeasures(), function=store_measures),
+        Hook(ask=W24AskVariantMeasures(), function=print_measures),
+        Hook(
+            message_type=W24TechreadMessageType.PROGRESS,
+            message_subtype=W24TechreadMessageSubtypeProgress.COMPLETED,
+            function=lambda message: print("done"))],
+        max_concurrent_hooks=8)
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import (Any, Callable, DefaultDict, Dict, List, Optional, Set,
+                    Tuple)
+
+from pydantic import BaseModel
+
+from werk24.exceptions import HookExecutionError
+from werk24.models.ask import W24Ask
+from werk24.models.techread import (W24TechreadMessage,
+                                    W24TechreadMessageSubtype,
+                                    W24TechreadMessageType)
+
+# make the logger
+logger = logging.getLogger(  # pylint: disable=invalid-name
+    'w24_techread_hooks')
+
+HookKey = Tuple[str, str]
+""" Key of the index: values of the message_type and message_subtype """
+
+
+class Hook(BaseModel):
+    """ Small Object to keep the callback requests.
+    You can either register a callback request to an
+    ask or a message_type.
+
+    If you register an ask, be sure to use a complete W24Ask
+    definition; not just the ask type.
+    """
+
+    message_type: Optional[W24TechreadMessageType]
+    message_subtype: Optional[W24TechreadMessageSubtype]
+    ask: Optional[W24Ask]
+    function: Callable
+
+    ordered: bool = False
+    """ When the hooks are executed concurrently, wait for the
+    previous call of this hook to finish before calling it with
+    the next message """
+
+
+class HookIndex:
+    """ Index of the hooks by the message_type
+    and message_subtype that they subscribed to
+    """
+
+    def __init__(self, hooks: List[Hook]) -> None:
+        """ Compile the hooks into the index
+
+        Arguments:
+            hooks {List[Hook]} -- Hooks in the order of their
+                registration
+        """
+        self._index: DefaultDict[HookKey, List[Hook]] = defaultdict(list)
+        for hook in hooks:
+            for key in self._get_hook_keys(hook):
+                self._index[key].append(hook)
+
+        # keys of the messages that we already warned about
+        self._unmatched: Set[HookKey] = set()
+
+    @staticmethod
+    def _get_hook_keys(hook: Hook) -> Set[HookKey]:
+        """ Get the keys under which the hook is registered
+
+        Arguments:
+            hook {Hook} -- Hook
+
+        Returns:
+            Set[HookKey] -- Keys of the hook; a set, so that a hook
+                that defines both the ask and the message_type is
+                only called once
+        """
+        keys = set()
+
+        # hooks that subscribed to an ask receive the ASK messages
+        # whose subtype is the ask_type
+        if hook.ask is not None:
+            keys.add((W24TechreadMessageType.ASK.value,
+                      hook.ask.ask_type.value))
+
+        if hook.message_type is not None \
+                and hook.message_subtype is not None:
+            keys.add((hook.message_type.value, hook.message_subtype.value))
+
+        return keys
+
+    def get_hooks(self, message: W24TechreadMessage) -> List[Hook]:
+        """ Get the hooks that subscribed to the message
+
+        Arguments:
+            message {W24TechreadMessage} -- Messsage returned from the
+                read_drawing method
+
+        Returns:
+            List[Hook] -- Hooks in the order of their registration;
+                empty if no hook subscribed
+        """
+        key = (message.message_type.value, message.message_subtype.value)
+        hooks = self._index.get(key)
+        if hooks:
+            return hooks
+
+        # if we are still here, we have an unknown message type, which
+        # probobly is being caused by an API update. We want to ensure
+        # that the user is being informed, but we do not want to break
+        # the existing functionality -> warning. Once per type suffices.
+        if key not in self._unmatched:
+            self._unmatched.add(key)
+            logger.warning(
+                "Ignoring messages of type %s:%s - no hook registered",
+                *key)
+        return []
+
+
+async def call_hook(
+    function: Callable[[W24TechreadMessage], Any],
+    message: W24TechreadMessage,
+    in_executor: bool = False
+) -> None:
+    """ Call the hook function with the message
+
+    Arguments:
+        function {Callable} -- Hook function; either a coroutine
+            function or a regular function
+        message {W24TechreadMessage} -- Message
+
+    Keyword Arguments:
+        in_executor {bool} -- Whether regular functions are called
+            in the default thread pool rather than inline
+            (default: {False})
+    """
+    # be sure to call the function asymmetrically if supported
+    if asyncio.iscoroutinefunction(function):
+        await function(message)
+    elif in_executor:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, function, message)
+    else:
+        function(message)
+
+
+class HookRunner:
+    """ Executes the hooks of a request concurrently
+
+    NOTE: make one runner per request and create it from
+    within the event loop.
+    """
+
+    def __init__(self, max_concurrent_hooks: int) -> None:
+        """ Create the runner
+
+        Arguments:
+            max_concurrent_hooks {int} -- Maximal number of hook
+                calls that are running at the same time
+
+        Raises:
+            ValueError -- Raised when max_concurrent_hooks is
+                smaller than 1
+        """
+        if max_concurrent_hooks < 1:
+            raise ValueError("max_concurrent_hooks must be at least 1")
+
+        self._semaphore = asyncio.Semaphore(max_concurrent_hooks)
+        self._tasks: Set[asyncio.Future] = set()
+
+        # last call of each ordered hook, by the id of the hook
+        self._last_calls: Dict[int, asyncio.Future] = {}
+
+        self.errors: List[Exception] = []
+        """ Exceptions raised by the hooks """
+
+    async def submit(self, hook: Hook, message: W24TechreadMessage) -> None:
+        """ Start the hook in the background. Waits until one
+        of the running hooks finished if the maximal number of
+        concurrent hooks is reached.
+
+        Arguments:
+            hook {Hook} -- Hook that subscribed to the message
+            message {W24TechreadMessage} -- Message
+        """
+        await self._semaphore.acquire()
+
+        predecessor = self._last_calls.get(id(hook)) if hook.ordered else None
+        task = asyncio.ensure_future(
+            self._run(hook.function, message, predecessor))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        if hook.ordered:
+            self._last_calls[id(hook)] = task
+
+    async def _run(
+        self,
+        function: Callable[[W24TechreadMessage], Any],
+        message: W24TechreadMessage,
+        predecessor: Optional[asyncio.Future]
+    ) -> None:
+        """ Call the hook and collect its exception
+
+        Arguments:
+            function {Callable} -- Hook function
+            message {W24TechreadMessage} -- Message
+            predecessor {Optional[asyncio.Future]} -- Previous call
+                of the same hook that needs to finish first
+        """
+        try:
+            # asyncio.wait does not raise the exception of the
+            # predecessor; that one is already collected
+            if predecessor is not None:
+                await asyncio.wait([predecessor])
+            await call_hook(function, message, in_executor=True)
+
+        # CancelledError derives from Exception before Python 3.8
+        except asyncio.CancelledError:  # pylint: disable=try-except-raise
+            raise
+
+        except Exception as exception:  # pylint: disable=broad-except
+            self.errors.append(exception)
+
+        finally:
+            self._semaphore.release()
+
+    async def join(self) -> None:
+        """ Wait for all hooks to finish
+
+        Raises:
+            HookExecutionError -- Raised when at least one hook
+                raised an exception
+        """
+        while self._tasks:
+            await asyncio.wait(set(self._tasks))
+
+        if self.errors:
+            raise HookExecutionError(self.errors)
+
+    async def cancel(self) -> None:
+        """ Cancel the hooks that are still running.
+
+        NOTE: synchronous hooks that already run in the thread
+        pool cannot be interrupted; they finish in the background.
+        """
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.wait(set(self._tasks))
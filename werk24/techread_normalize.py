@@ -0,0 +1,224 @@
+""" Normalization-part of the Werk24 client
+
+DESCRIPTION
+    The module shrinks raster drawings that exceed the upload limit.
+    Scanned drawings are frequently stored as colour images with
+    600 dpi, which quickly adds up to tens of megabytes. Technical
+    drawings are line art, so they can be re-encoded as bilevel
+    CCITT Group 4 TIFFs (or optimized PNGs) and downsampled without
+    losing the information that the API needs.
+
+    The normalization tries the following steps and stops as soon
+    as the drawing fits into the limit:
+    1. re-encode at the original resolution
+    2. downsample in steps of DOWNSAMPLE_FACTOR, but never below
+       the configured minimal resolution
+
+    The work is CPU-bound and therefore done in a process pool.
+    Pillow is an optional dependency; install it with
+    `pip install werk24[normalize]`.
+
+EXAMPLE
+    client = W24TechreadClient.make_from_env(
+        normalize=W24NormalizeConfig(min_dpi=200))
+"""
+import io
+import os
+from enum import Enum
+from typing import TYPE_CHECKING, Iterator, List, Optional, Union
+
+from pydantic import BaseModel
+
+from werk24.techread_client_https import TechreadClientHttps
+
+if TYPE_CHECKING:  # pragma: no cover
+    from PIL.Image import Image
+
+DOWNSAMPLE_FACTOR = 0.75
+""" Factor by which the resolution is reduced in each step """
+
+BILEVEL_THRESHOLD = 128
+""" Gray value below which pixels are considered ink """
+
+
+class W24NormalizeEncoding(str, Enum):
+    """ Encodings that the normalization can produce
+    """
+
+    BILEVEL_TIFF = "BILEVEL_TIFF"
+    """ Black and white TIFF with CCITT Group 4 compression.
+    Smallest by far, but discards colours and gray values.
+    """
+
+    PNG = "PNG"
+    """ Optimized PNG that keeps colours and gray values
+    """
+
+
+class W24NormalizeConfig(BaseModel):
+    """ Configuration of the normalization of oversized drawings
+    """
+
+    max_size: int = TechreadClientHttps.MAX_REQUEST_PAYLOAD
+    """ Drawings up to this size (in bytes) are submitted unchanged;
+    larger ones are shrunk to fit """
+
+    encoding: W24NormalizeEncoding = W24NormalizeEncoding.BILEVEL_TIFF
+    """ Encoding of the normalized drawing """
+
+    min_dpi: float = 200
+    """ The drawing is not downsampled below this resolution. If
+    the image does not specify its resolution, it is only
+    re-encoded """
+
+
+def normalize_drawing(
+    drawing: Union[bytes, "os.PathLike[str]"],
+    config: W24NormalizeConfig
+) -> Optional[bytes]:
+    """ Shrink the raster drawing to fit into config.max_size.
+
+    NOTE: the function is CPU-bound and meant to be run in a
+    process pool. The arguments are therefore kept picklable.
+
+    Arguments:
+        drawing {Union[bytes, os.PathLike]} -- Content or path of
+            the drawing
+
+        config {W24NormalizeConfig} -- Configuration
+
+    Raises:
+        ImportError: Raised when Pillow is not installed
+
+    Returns:
+        Optional[bytes] -- The normalized drawing; None if the
+            drawing is no raster image, exceeds Pillow's pixel limit
+            or cannot be shrunk sufficiently without going below
+            config.min_dpi
+    """
+    try:
+        from PIL import Image, ImageSequence, UnidentifiedImageError
+    except ImportError as exception:
+        raise ImportError(
+            "The normalization requires Pillow. Install it with "
+            "`pip install werk24[normalize]`") from exception
+
+    source = io.BytesIO(drawing) if isinstance(drawing, bytes) else drawing
+    try:
+        image = Image.open(source)
+    except UnidentifiedImageError:
+        return None
+
+    # large formats at high resolution (e.g., A1 at 600 dpi) exceed
+    # Pillow's pixel limit. Decoding them would take gigabytes of
+    # memory, so we submit the original instead
+    except Image.DecompressionBombError:
+        return None
+
+    with image:
+        frames = [frame.copy() for frame in ImageSequence.Iterator(image)]
+        dpi = _get_dpi(image)
+
+    for scale in _get_scales(dpi, config.min_dpi):
+        result = _encode(frames, scale, dpi, config.encoding)
+        if result is not None and len(result) <= config.max_size:
+            return result
+    return None
+
+
+def _get_dpi(image: "Image") -> Optional[float]:
+    """ Get the resolution of the image
+
+    Arguments:
+        image {Image} -- Pillow image
+
+    Returns:
+        Optional[float] -- Resolution in dots per inch; None if
+            the image does not specify it
+    """
+    dpi = image.info.get("dpi")
+    if not dpi or not dpi[0]:
+        return None
+    return float(min(dpi))
+
+
+def _get_scales(dpi: Optional[float], min_dpi: float) -> Iterator[float]:
+    """ Get the scales that we try one after the other
+
+    Arguments:
+        dpi {Optional[float]} -- Resolution of the image
+        min_dpi {float} -- Minimal resolution after downsampling
+
+    Yields:
+        float -- Scale relative to the original resolution
+    """
+    yield 1.0
+
+    # we cannot downsample safely if we do not know the resolution
+    if dpi is None or dpi <= min_dpi:
+        return
+
+    scale = DOWNSAMPLE_FACTOR
+    while dpi * scale > min_dpi:
+        yield scale
+        scale *= DOWNSAMPLE_FACTOR
+    yield min_dpi / dpi
+
+
+def _encode(
+    frames: List["Image"],
+    scale: float,
+    dpi: Optional[float],
+    encoding: W24NormalizeEncoding
+) -> Optional[bytes]:
+    """ Resize and encode the frames of the image
+
+    Arguments:
+        frames {List[Image]} -- Pages of the image
+        scale {float} -- Scale relative to the original resolution
+        dpi {Optional[float]} -- Resolution of the original image
+        encoding {W24NormalizeEncoding} -- Target encoding
+
+    Returns:
+        Optional[bytes] -- Encoded image; None if the encoding
+            cannot represent the image (e.g., PNG with several pages)
+    """
+    from PIL import Image
+
+    converted = []
+    for frame in frames:
+        if encoding == W24NormalizeEncoding.BILEVEL_TIFF:
+            frame = frame.convert("L")
+        elif frame.mode not in ("1", "L", "RGB", "RGBA", "P"):
+            frame = frame.convert("RGB")
+
+        if scale < 1.0:
+            size = (max(1, round(frame.width * scale)),
+                    max(1, round(frame.height * scale)))
+            frame = frame.resize(size, Image.LANCZOS)
+
+        # threshold rather than dither, so that lines stay
+        # crisp and the Group 4 compression remains effective
+        if encoding == W24NormalizeEncoding.BILEVEL_TIFF:
+            frame = frame.point(
+                lambda value: 255 if value >= BILEVEL_THRESHOLD else 0, "1")
+        converted.append(frame)
+
+    kwargs = {}
+    if dpi is not None:
+        kwargs["dpi"] = (dpi * scale, dpi * scale)
+
+    buffer = io.BytesIO()
+    if encoding == W24NormalizeEncoding.BILEVEL_TIFF:
+        converted[0].save(
+            buffer,
+            "TIFF",
+            compression="group4",
+            save_all=True,
+            append_images=converted[1:],
+            **kwargs)
+    else:
+        if len(converted) > 1:
+            return None
+        converted[0].save(buffer, "PNG", optimize=True, **kwargs)
+    return buffer.getvalue()
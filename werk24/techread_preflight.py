@@ -0,0 +1,260 @@
+""" Preflight-part of the Werk24 client
+
+DESCRIPTION
+    The module checks the drawing and model locally before any
+    network call is made. Files that the API would reject anyway
+    (too large, unsupported file format, resolution too low) are
+    detected within microseconds rather than after the websocket
+    INITIALIZE round trip and the upload. The client translates
+    the result into the same W24TechreadExceptions that the API
+    would have returned.
+
+    The checks only read the first bytes of the files. Sources
+    that cannot be inspected without consuming them (async
+    iterables and streams that cannot be rewound) are passed on
+    to the API unchecked.
+
+EXAMPLE
+    client = W24TechreadClient.make_from_env(
+        preflight=W24PreflightConfig(min_dpi=150))
+"""
+import struct
+from typing import Callable, Optional, Tuple
+
+from pydantic import BaseModel
+
+from werk24.models.techread import W24TechreadExceptionType
+from werk24.techread_client_https import TechreadClientHttps
+from werk24.techread_source import W24DrawingSource, peek_source
+
+HEAD_SIZE = 64 * 1024  # 64 KB
+""" Number of bytes that are read to detect the file format
+and resolution """
+
+_PDF_SEARCH_WINDOW = 1024
+""" The PDF header does not need to start at the first byte,
+but needs to be within the first 1024 bytes """
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SIGNATURE = b"\xff\xd8\xff"
+_TIFF_SIGNATURES = (b"II*\x00", b"MM\x00*")
+
+_TIFF_TAG_X_RESOLUTION = 282
+_TIFF_TAG_RESOLUTION_UNIT = 296
+
+_INCH_PER_METER = 0.0254
+_CM_PER_INCH = 2.54
+
+
+class W24PreflightConfig(BaseModel):
+    """ Configuration of the local checks that run before a
+    drawing is submitted. Set a limit to None to disable the
+    corresponding check.
+    """
+
+    max_drawing_size: Optional[int] = TechreadClientHttps.MAX_REQUEST_PAYLOAD
+    """ Maximal size of the drawing in bytes """
+
+    max_model_size: Optional[int] = TechreadClientHttps.MAX_REQUEST_PAYLOAD
+    """ Maximal size of the model in bytes """
+
+    check_drawing_format: bool = True
+    """ Whether the drawing needs to be a PDF, PNG, JPEG or TIFF file """
+
+    min_dpi: Optional[float] = None
+    """ Minimal resolution of raster drawings in dots per inch.
+    Drawings without resolution metadata are not rejected.
+    """
+
+
+DEFAULT_PREFLIGHT_CONFIG = W24PreflightConfig()
+""" Checks that are run unless the caller configures them """
+
+
+def preflight_check(
+    drawing: W24DrawingSource,
+    model: Optional[W24DrawingSource],
+    config: W24PreflightConfig
+) -> Optional[W24TechreadExceptionType]:
+    """ Check the drawing and the model before submitting them
+
+    Arguments:
+        drawing {W24DrawingSource} -- Technical drawing
+        model {Optional[W24DrawingSource]} -- 3d model
+        config {W24PreflightConfig} -- Configuration of the checks
+
+    Returns:
+        Optional[W24TechreadExceptionType] -- Type of the exception
+            that the API would return; None if the checks passed
+    """
+    drawing_info = peek_source(drawing, HEAD_SIZE)
+    if drawing_info is not None:
+        size, head = drawing_info
+
+        if config.max_drawing_size is not None \
+                and size > config.max_drawing_size:
+            return W24TechreadExceptionType.DRAWING_FILE_SIZE_TOO_LARGE
+
+        get_dpi = _get_dpi_reader(head)
+        if config.check_drawing_format and get_dpi is None:
+            return W24TechreadExceptionType.DRAWING_FILE_FORMAT_UNSUPPORTED
+
+        if config.min_dpi is not None and get_dpi is not None:
+            dpi = get_dpi(head)
+            if dpi is not None and dpi < config.min_dpi:
+                return W24TechreadExceptionType.DRAWING_RESOLUTION_TOO_LOW
+
+    # we do not know all the model formats, so we
+    # only check the size of the model
+    model_info = peek_source(model, HEAD_SIZE) if model is not None else None
+    if model_info is not None and config.max_model_size is not None \
+            and model_info[0] > config.max_model_size:
+        return W24TechreadExceptionType.MODEL_FILE_SIZE_TOO_LARGE
+
+    return None
+
+
+def _get_dpi_reader(
+    head: bytes
+) -> Optional[Callable[[bytes], Optional[float]]]:
+    """ Detect the file format from the magic bytes and return
+    the function that reads the resolution of the format
+
+    Arguments:
+        head {bytes} -- First bytes of the file
+
+    Returns:
+        Optional[Callable[[bytes], Optional[float]]] -- Function that
+            reads the resolution; None if the format is not supported
+    """
+    if b"%PDF-" in head[:_PDF_SEARCH_WINDOW]:
+        return _get_dpi_pdf
+    if head.startswith(_PNG_SIGNATURE):
+        return _get_dpi_png
+    if head.startswith(_JPEG_SIGNATURE):
+        return _get_dpi_jpeg
+    if head.startswith(_TIFF_SIGNATURES):
+        return _get_dpi_tiff
+    return None
+
+
+def _get_dpi_pdf(head: bytes) -> Optional[float]:
+    """ PDFs are vector documents that can embed images of any
+    resolution. We leave the judgment to the API.
+    """
+    return None
+
+
+def _get_dpi_png(head: bytes) -> Optional[float]:
+    """ Read the resolution from the pHYs chunk of a PNG file
+
+    Arguments:
+        head {bytes} -- First bytes of the file
+
+    Returns:
+        Optional[float] -- Resolution in dots per inch; None if
+            the file does not specify it
+    """
+    position = len(_PNG_SIGNATURE)
+    while position + 8 <= len(head):
+        length, chunk_type = struct.unpack_from(">I4s", head, position)
+        data = head[position + 8:position + 8 + length]
+
+        # the pHYs chunk needs to be placed before the image data
+        if chunk_type == b"IDAT":
+            return None
+
+        if chunk_type == b"pHYs" and len(data) == 9:
+            pixels_x, pixels_y, unit = struct.unpack(">IIB", data)
+
+            # unit 0 only defines the aspect ratio
+            if unit != 1:
+                return None
+            return min(pixels_x, pixels_y) * _INCH_PER_METER
+
+        # skip the data and the crc
+        position += 12 + length
+    return None
+
+
+def _get_dpi_jpeg(head: bytes) -> Optional[float]:
+    """ Read the resolution from the JFIF header of a JPEG file
+
+    Arguments:
+        head {bytes} -- First bytes of the file
+
+    Returns:
+        Optional[float] -- Resolution in dots per inch; None if
+            the file does not specify it
+    """
+    position = 2
+    while position + 4 <= len(head) and head[position] == 0xFF:
+        marker = head[position + 1]
+        length = struct.unpack_from(">H", head, position + 2)[0]
+        data = head[position + 4:position + 2 + length]
+
+        # stop at the start of the scan
+        if marker == 0xDA:
+            return None
+
+        # APP0 segment with the JFIF header
+        if marker == 0xE0 and data[:5] == b"JFIF\x00" and len(data) >= 12:
+            unit, density_x, density_y = struct.unpack_from(">BHH", data, 7)
+            density = min(density_x, density_y)
+            if unit == 1:
+                return float(density)
+            if unit == 2:
+                return density * _CM_PER_INCH
+
+            # unit 0 only defines the aspect ratio
+            return None
+
+        position += 2 + length
+    return None
+
+
+def _get_dpi_tiff(head: bytes) -> Optional[float]:
+    """ Read the resolution from the first image file
+    directory (IFD) of a TIFF file.
+
+    NOTE: the IFD can be located anywhere in the file. If
+    it is not within the head, we leave the judgment to the API.
+
+    Arguments:
+        head {bytes} -- First bytes of the file
+
+    Returns:
+        Optional[float] -- Resolution in dots per inch; None if
+            the file does not specify it
+    """
+    byte_order = "<" if head[:2] == b"II" else ">"
+
+    def unpack(fmt: str, offset: int) -> Tuple[int, ...]:
+        return struct.unpack_from(byte_order + fmt, head, offset)
+
+    try:
+        ifd_offset = unpack("I", 4)[0]
+        num_entries = unpack("H", ifd_offset)[0]
+
+        resolution: Optional[float] = None
+        unit = 2
+        for index in range(num_entries):
+            tag, _, _, value = unpack("HHII", ifd_offset + 2 + 12 * index)
+
+            # the rational value is stored at the offset
+            if tag == _TIFF_TAG_X_RESOLUTION:
+                numerator, denominator = unpack("II", value)
+                if denominator:
+                    resolution = numerator / denominator
+
+            # short values are left-aligned in the value field
+            elif tag == _TIFF_TAG_RESOLUTION_UNIT:
+                unit = unpack("H", ifd_offset + 2 + 12 * index + 8)[0]
+
+    except struct.error:
+        return None
+
+    # unit 1 only defines the aspect ratio; 2 is inch, 3 is cm
+    if resolution is None or unit not in (2, 3):
+        return None
+    return resolution * _CM_PER_INCH if unit == 3 else resolution
@@ -0,0 +1,277 @@
+""" Source-part of the Werk24 client
+
+DESCRIPTION
+    The module contains everything that is needed to turn
+    the drawings and models that the caller submits into
+    something that can be streamed into the multipart body
+    of the presigned post, without first reading the whole
+    file into memory.
+
+    Supported sources are:
+    * bytes / bytearray / memoryview
+    * paths to local files (os.PathLike); memory-mapped
+    * binary file objects
+    * async iterables of bytes
+"""
+import hashlib
+import io
+import mmap
+import os
+import tempfile
+from contextlib import asynccontextmanager, contextmanager
+from typing import (Any, AsyncIterable, AsyncIterator, BinaryIO, Iterator,
+                    Optional, Tuple, Union)
+
+from werk24.exceptions import UnsupportedMediaType
+
+W24DrawingSource = Union[
+    bytes,
+    bytearray,
+    memoryview,
+    "os.PathLike[str]",
+    BinaryIO,
+    AsyncIterable[bytes]]
+""" Everything that can be submitted as drawing or model """
+
+SPOOL_MAX_MEMORY = 1024 * 1024  # 1 MB
+""" Number of bytes up to which streams of unknown size are
+buffered in memory before we spool them to a temporary file.
+The presigned post requires a Content-Length, so streams whose
+size is unknown need to be buffered before the upload.
+"""
+
+CHUNK_SIZE = 64 * 1024  # 64 KB
+""" Chunk size used when copying streams """
+
+
+def check_source(source: Any, name: str) -> None:
+    """ Ensure that the source is of a supported type.
+
+    NOTE: str is explicitly not supported. The presigned post
+    interestingly returns a 403 error_code without additional
+    information when you submit a str (see Github Issue #13).
+    If you want to submit a file from disk, pass a pathlib.Path.
+
+    Arguments:
+        source {Any} -- Drawing or model submitted by the caller
+        name {str} -- Name that is used in the exception message
+
+    Raises:
+        UnsupportedMediaType: Raised when the source is not supported
+    """
+    if isinstance(source, (bytes, bytearray, memoryview, os.PathLike)):
+        return
+
+    if isinstance(source, io.IOBase) or hasattr(source, "__aiter__"):
+        if not isinstance(source, io.TextIOBase):
+            return
+
+    raise UnsupportedMediaType(
+        f"{name} requires 'bytes', a path, a binary file object "
+        "or an async iterable of bytes")
+
+
+@asynccontextmanager
+async def open_source(
+    source: W24DrawingSource
+) -> AsyncIterator[Union[bytes, bytearray, memoryview, BinaryIO]]:
+    """ Open the source for the upload. The yielded object
+    is either bytes-like or a binary file object whose size
+    is known, so that it can be passed to aiohttp.FormData
+    directly and is streamed into the request body.
+
+    Arguments:
+        source {W24DrawingSource} -- Drawing or model
+
+    Yields:
+        Union[bytes, bytearray, memoryview, BinaryIO] -- upload content
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        yield source
+
+    elif isinstance(source, os.PathLike):
+        with _map_file(source) as content:
+            yield content
+
+    elif _has_known_size(source):
+        yield source  # type: ignore
+
+    else:
+        with await _spool(source) as spooled:
+            yield spooled
+
+
+def hash_source(source: Optional[W24DrawingSource]) -> Optional[str]:
+    """ Calculate the SHA-256 hash of the source without consuming it.
+
+    NOTE: async iterables and file objects that cannot be rewound
+    can only be read once. We cannot hash them without buffering
+    the content, so we return None for them.
+
+    Arguments:
+        source {Optional[W24DrawingSource]} -- Drawing or model
+
+    Returns:
+        Optional[str] -- Hex digest of the content; None if the
+            source cannot be hashed
+    """
+    sha256 = hashlib.sha256()
+
+    if source is None:
+        return sha256.hexdigest()
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        sha256.update(source)
+        return sha256.hexdigest()
+
+    if isinstance(source, os.PathLike):
+        with open(source, "rb") as file_handle:
+            for chunk in iter(lambda: file_handle.read(CHUNK_SIZE), b""):
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
+    # read the file object and rewind it, so that the upload
+    # starts at the same position
+    if isinstance(source, io.IOBase) and source.seekable():
+        position = source.tell()
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            sha256.update(chunk)
+        source.seek(position)
+        return sha256.hexdigest()
+
+    return None
+
+
+def peek_source(
+    source: W24DrawingSource,
+    head_size: int
+) -> Optional[Tuple[int, bytes]]:
+    """ Get the size and the first bytes of the source without
+    consuming it.
+
+    NOTE: like hash_source(), we cannot look into async iterables
+    and file objects that cannot be rewound. We return None for them.
+
+    Arguments:
+        source {W24DrawingSource} -- Drawing or model
+        head_size {int} -- Maximal number of bytes that are read
+
+    Returns:
+        Optional[Tuple[int, bytes]] -- Size of the source in bytes
+            and its first head_size bytes; None if the source
+            cannot be inspected
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return len(source), bytes(source[:head_size])
+
+    if isinstance(source, os.PathLike):
+        with open(source, "rb") as file_handle:
+            size = os.fstat(file_handle.fileno()).st_size
+            return size, file_handle.read(head_size)
+
+    # read the beginning and rewind the file object, so
+    # that the upload starts at the same position
+    if isinstance(source, io.IOBase) and source.seekable():
+        position = source.tell()
+        size = source.seek(0, io.SEEK_END) - position
+        source.seek(position)
+        head = source.read(head_size)
+        source.seek(position)
+        return size, head
+
+    return None
+
+
+@contextmanager
+def _map_file(
+    path: "os.PathLike[str]"
+) -> Iterator[Union[bytes, memoryview]]:
+    """ Map a local file into memory and return a memoryview of it.
+    The pages are loaded by the operating system when they are
+    sent, so the file is never copied into the python heap.
+
+    Arguments:
+        path {os.PathLike} -- path to the local file
+
+    Yields:
+        Union[bytes, memoryview] -- content of the file
+    """
+    with open(path, "rb") as file_handle:
+
+        # empty files cannot be mapped
+        if os.fstat(file_handle.fileno()).st_size == 0:
+            yield b""
+            return
+
+        mapped = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        try:
+            yield view
+        finally:
+            view.release()
+
+            # if the transport still holds a slice of the view, we
+            # leave the map to the garbage collector
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+
+
+def _has_known_size(source: Any) -> bool:
+    """ Check whether aiohttp can determine the size of the
+    file object (otherwise it would fall back to chunked
+    transfer encoding, which the presigned post rejects)
+
+    Arguments:
+        source {Any} -- file object or async iterable
+
+    Returns:
+        bool -- True if the size is known
+    """
+    if isinstance(source, io.BytesIO):
+        return True
+
+    if isinstance(source, (io.BufferedReader, io.BufferedRandom)):
+        try:
+            source.fileno()
+            return True
+        except (OSError, io.UnsupportedOperation):
+            return False
+
+    return False
+
+
+async def _spool(source: Any) -> BinaryIO:
+    """ Copy a stream of unknown size into a buffer. Small streams
+    stay in memory, larger ones are moved to a temporary file.
+
+    Arguments:
+        source {Any} -- binary file object or async iterable of bytes
+
+    Returns:
+        BinaryIO -- buffer positioned at the start
+    """
+    buffer: BinaryIO = io.BytesIO()
+
+    async def chunks() -> AsyncIterator[bytes]:
+        if hasattr(source, "__aiter__"):
+            async for chunk in source:
+                yield chunk
+        else:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                yield chunk
+
+    async for chunk in chunks():
+
+        # move to the disk once we exceed the memory limit
+        if isinstance(buffer, io.BytesIO) \
+                and buffer.tell() + len(chunk) > SPOOL_MAX_MEMORY:
+            spooled = tempfile.TemporaryFile()
+            spooled.write(buffer.getbuffer())
+            buffer = spooled  # type: ignore
+
+        buffer.write(chunk)
+
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,187 @@
+""" Split-part of the Werk24 client
+
+DESCRIPTION
+    The module splits multi-page PDFs and TIFFs into single-page
+    drawings. Each page can then be submitted as a request of its
+    own, so that the pages are uploaded and read in parallel rather
+    than one after the other. A large drawing set finishes in
+    roughly the time of its slowest page.
+
+    Pillow (TIFF) and pypdf (PDF) are optional dependencies;
+    install them with `pip install werk24[split]`.
+
+EXAMPLE
+    async with W24TechreadClientPool.make_from_env(pool_size=8) as pool:
+        async for message in pool.read_drawing_pages(drawing_bytes, asks):
+            print(message.page_index, message)
+"""
+import io
+import os
+from typing import AsyncIterator, Callable, List, Optional, Union
+
+from werk24 import techread_batch
+from werk24.models.ask import W24Ask
+from werk24.models.techread import W24TechreadMessage
+from werk24.techread_source import W24DrawingSource
+
+_PDF_SIGNATURE = b"%PDF-"
+_PDF_SEARCH_WINDOW = 1024
+_TIFF_SIGNATURES = (b"II*\x00", b"MM\x00*")
+
+
+def split_drawing(
+    drawing: Union[bytes, "os.PathLike[str]"]
+) -> Optional[List[bytes]]:
+    """ Split the drawing into its pages.
+
+    NOTE: the function is CPU-bound and meant to be run in a
+    process pool. The arguments are therefore kept picklable.
+
+    Arguments:
+        drawing {Union[bytes, os.PathLike]} -- Content or path of
+            the drawing
+
+    Raises:
+        ImportError: Raised when pypdf or Pillow is required,
+            but not installed
+
+    Returns:
+        Optional[List[bytes]] -- Content of the individual pages; None
+            if the drawing is neither a PDF nor a TIFF
+    """
+    if not isinstance(drawing, bytes):
+        with open(drawing, "rb") as file_handle:
+            drawing = file_handle.read()
+
+    if _PDF_SIGNATURE in drawing[:_PDF_SEARCH_WINDOW]:
+        return _split_pdf(drawing)
+
+    if drawing.startswith(_TIFF_SIGNATURES):
+        return _split_tiff(drawing)
+
+    return None
+
+
+async def read_pages(
+    read_drawing: Callable[..., AsyncIterator[W24TechreadMessage]],
+    pages: List[W24DrawingSource],
+    asks: List[W24Ask],
+    model: Optional[W24DrawingSource],
+    max_concurrency: int
+) -> AsyncIterator[W24TechreadMessage]:
+    """ Read the pages concurrently and merge the messages
+
+    Arguments:
+        read_drawing {Callable} -- Method that reads a single drawing;
+            e.g., W24TechreadClient.read_drawing
+
+        pages {List[W24DrawingSource]} -- Pages obtained from
+            split_drawing()
+
+        asks {List[W24Ask]} -- List of Asks that are requested for
+            every page
+
+        model {Optional[W24DrawingSource]} -- 3d model that is
+            submitted with every page
+
+        max_concurrency {int} -- Maximal number of pages in flight
+
+    Yields:
+        W24TechreadMessage -- Messages in the order of their arrival;
+            tagged with the page_index
+    """
+    results = techread_batch.read_drawings(
+        read_drawing,
+        [(page, model) for page in pages],
+        asks,
+        max_concurrency)
+    try:
+        async for page_index, message in results:
+
+            # a failed page fails the whole drawing
+            if isinstance(message, Exception):
+                raise message
+
+            # copy the message, as it might be shared with other
+            # callers (e.g., by the result cache)
+            yield message.copy(update={"page_index": page_index})
+    finally:
+        await results.aclose()  # type: ignore
+
+
+def _split_pdf(drawing: bytes) -> List[bytes]:
+    """ Split the PDF into single-page PDFs
+
+    Arguments:
+        drawing {bytes} -- Content of the PDF
+
+    Returns:
+        List[bytes] -- Content of the single-page PDFs
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError as exception:
+        raise ImportError(
+            "Splitting PDFs requires pypdf. Install it with "
+            "`pip install werk24[split]`") from exception
+
+    reader = PdfReader(io.BytesIO(drawing))
+
+    # do not rewrite single-page documents
+    if len(reader.pages) <= 1:
+        return [drawing]
+
+    pages = []
+    for page in reader.pages:
+        writer = PdfWriter()
+        writer.add_page(page)
+        buffer = io.BytesIO()
+        writer.write(buffer)
+        pages.append(buffer.getvalue())
+    return pages
+
+
+def _split_tiff(drawing: bytes) -> List[bytes]:
+    """ Split the TIFF into single-page TIFFs
+
+    Arguments:
+        drawing {bytes} -- Content of the TIFF
+
+    Returns:
+        List[bytes] -- Content of the single-page TIFFs; the
+            original TIFF if it exceeds Pillow's pixel limit
+    """
+    try:
+        from PIL import Image, ImageSequence
+    except ImportError as exception:
+        raise ImportError(
+            "Splitting TIFFs requires Pillow. Install it with "
+            "`pip install werk24[split]`") from exception
+
+    # large formats at high resolution (e.g., A1 at 600 dpi) exceed
+    # Pillow's pixel limit; submit them as a whole rather than
+    # decoding gigabytes of pixels
+    try:
+        image = Image.open(io.BytesIO(drawing))
+    except Image.DecompressionBombError:
+        return [drawing]
+
+    with image:
+
+        # do not rewrite single-page documents
+        if getattr(image, "n_frames", 1) <= 1:
+            return [drawing]
+
+        pages = []
+        for frame in ImageSequence.Iterator(image):
+
+            # keep bilevel pages small
+            compression = "group4" if frame.mode == "1" else "tiff_lzw"
+            kwargs = {}
+            if "dpi" in frame.info:
+                kwargs["dpi"] = frame.info["dpi"]
+
+            buffer = io.BytesIO()
+            frame.save(buffer, "TIFF", compression=compression, **kwargs)
+            pages.append(buffer.getvalue())
+    return pages
@@ -0,0 +1,267 @@
+""" Token Cache Module
+
+DESCRIPTION
+    The module contains an on-disk cache for the JWT tokens that
+    are obtained from the authentication service. The login
+    requires several round trips to AWS Cognito, which makes it
+    the largest fixed cost of short-lived processes (e.g., the CLI
+    or worker processes). With the cache, every process on the
+    machine reuses the token until shortly before it expires.
+
+    The cache entries are keyed by the hash of the cognito region,
+    client id and username. Each entry is stored in its own file
+    that is only readable by the current user. Access is
+    serialized across processes with a file lock, so that only
+    one process logs in when the token expires.
+
+EXAMPLE
+    client = W24TechreadClient.make_from_env(token_cache=W24TokenCache())
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+if sys.platform == "win32":
+    import msvcrt  # pylint: disable=import-error
+else:
+    import fcntl
+
+DEFAULT_EXPIRY_MARGIN = 300.0
+""" Number of seconds before the expiry at which a cached
+token is no longer handed out """
+
+_FILE_MODE = 0o600
+""" Cache files are only accessible by the current user """
+
+_DIR_MODE = 0o700
+""" The cache directory is only accessible by the current user """
+
+
+class W24TokenCache:
+    """ File-based cache for the JWT tokens that is shared
+    between all processes of the current user.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Optional["os.PathLike[str]"] = None,
+            expiry_margin: float = DEFAULT_EXPIRY_MARGIN):
+        """ Initialize a new W24TokenCache
+
+        Keyword Arguments:
+            cache_dir {Optional[os.PathLike]} -- Directory in which the
+                tokens are stored. Defaults to werk24 in the user's
+                cache directory (e.g., ~/.cache/werk24)
+
+            expiry_margin {float} -- Number of seconds before the
+                expiry of the token at which we log in again
+                (default: {DEFAULT_EXPIRY_MARGIN})
+        """
+        self._cache_dir = Path(cache_dir) if cache_dir is not None \
+            else self._get_default_cache_dir()
+        self._expiry_margin = expiry_margin
+
+    @staticmethod
+    def _get_default_cache_dir() -> Path:
+        """ Get the platform-specific cache directory
+
+        Returns:
+            Path -- Path of the cache directory
+        """
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") \
+                or Path.home() / "AppData" / "Local"
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") \
+                or Path.home() / ".cache"
+        return Path(base) / "werk24"
+
+    @staticmethod
+    def make_key(
+        cognito_region: str,
+        cognito_client_id: str,
+        username: str
+    ) -> str:
+        """ Make the key of the cache entry. The key is hashed,
+        so that the username does not appear in the file name.
+
+        Arguments:
+            cognito_region {str} -- Region of the authentication service
+            cognito_client_id {str} -- Client id of your application
+            username {str} -- Username
+
+        Returns:
+            str -- Key of the cache entry
+        """
+        message = "\n".join([cognito_region, cognito_client_id, username])
+        return hashlib.sha256(message.encode("UTF-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """ Get the token from the cache
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+
+        Returns:
+            Optional[str] -- The token; None if the cache does
+                not contain a token that is still valid
+        """
+        try:
+            with open(self._get_path(key), "rt") as file_handle:
+                entry = json.load(file_handle)
+            token = entry["token"]
+            expires_at = float(entry["expires_at"])
+
+        # treat unreadable entries as missing. They will be
+        # overwritten by the next put()
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if time.time() + self._expiry_margin >= expires_at:
+            return None
+
+        return token
+
+    def put(self, key: str, token: str) -> None:
+        """ Store the token in the cache. Tokens without
+        expiry are not stored.
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+            token {str} -- JWT token
+        """
+        expires_at = get_token_expiry(token)
+        if expires_at is None:
+            return
+
+        self._make_cache_dir()
+
+        # write to a temporary file first and replace the entry
+        # atomically, so that readers never see a partial file
+        path = self._get_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        file_descriptor = os.open(
+            tmp_path,
+            os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+            _FILE_MODE)
+        with os.fdopen(file_descriptor, "wt") as file_handle:
+            json.dump({"token": token, "expires_at": expires_at}, file_handle)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, key: str) -> None:
+        """ Remove the token from the cache; e.g., when the
+        server no longer accepts it
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+        """
+        try:
+            os.remove(self._get_path(key))
+        except FileNotFoundError:
+            pass
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[None]:
+        """ Acquire the inter-process lock of the cache entry. Hold
+        the lock while checking the cache and logging in, so that
+        only one process logs in at a time.
+
+        NOTE: The lock is acquired in the executor, so that the
+        event loop is not blocked while another process logs in.
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+        """
+        self._make_cache_dir()
+        file_descriptor = os.open(
+            self._get_path(key).with_suffix(".lock"),
+            os.O_RDWR | os.O_CREAT,
+            _FILE_MODE)
+        try:
+            await asyncio.get_event_loop().run_in_executor(
+                None, _lock_file, file_descriptor)
+            try:
+                yield
+            finally:
+                _unlock_file(file_descriptor)
+        finally:
+            os.close(file_descriptor)
+
+    def _make_cache_dir(self) -> None:
+        """ Create the cache directory if it does not exist
+        """
+        self._cache_dir.mkdir(mode=_DIR_MODE, parents=True, exist_ok=True)
+
+    def _get_path(self, key: str) -> Path:
+        """ Get the path of the cache entry
+
+        Arguments:
+            key {str} -- Key obtained from make_key()
+
+        Returns:
+            Path -- Path of the cache entry
+        """
+        return self._cache_dir / f"token_{key}.json"
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """ Read the expiry (exp claim) from the JWT token.
+
+    NOTE: The signature is not verified. The server does that.
+    We only need to know when we have to log in again.
+
+    Arguments:
+        token {str} -- JWT token
+
+    Returns:
+        Optional[float] -- Expiry as seconds since the epoch; None
+            if the token does not carry an exp claim
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, ValueError, KeyError, TypeError, binascii.Error):
+        return None
+
+
+def _lock_file(file_descriptor: int) -> None:
+    """ Acquire an exclusive lock on the file (blocking)
+
+    Arguments:
+        file_descriptor {int} -- File descriptor of the lock file
+    """
+    if sys.platform == "win32":
+
+        # msvcrt gives up after 10 attempts, so we keep trying
+        os.lseek(file_descriptor, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(file_descriptor, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        fcntl.flock(file_descriptor, fcntl.LOCK_EX)
+
+
+def _unlock_file(file_descriptor: int) -> None:
+    """ Release the lock acquired by _lock_file()
+
+    Arguments:
+        file_descriptor {int} -- File descriptor of the lock file
+    """
+    if sys.platform == "win32":
+        os.lseek(file_descriptor, 0, os.SEEK_SET)
+        msvcrt.locking(file_descriptor, msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(file_descriptor, fcntl.LOCK_UN)